@@ -0,0 +1,182 @@
+"""
+Video Pollution Analysis Script
+Classifies videos or frame sequences from fixed cameras into smoothed pollution timelines
+"""
+
+import os
+import sys
+import csv
+import time
+import argparse
+from datetime import datetime
+import matplotlib.pyplot as plt
+from cascade_detector import load_stage
+from video_analysis import VideoPollutionAnalyzer, timeline_segments
+
+
+def save_timeline(entries, class_names, output_file):
+    """Write timeline entries as CSV: one row per sampled frame, raw and smoothed probabilities"""
+    with open(output_file, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['stream', 'frame', 'timestamp', 'change', 'predicted_class', 'confidence']
+                        + [f"raw_{c}" for c in class_names] + [f"smoothed_{c}" for c in class_names])
+        for entry in entries:
+            writer.writerow(
+                [entry['stream'], entry['frame'], entry['timestamp'], entry['change'],
+                 entry['predicted_class'], round(entry['confidence'], 4)]
+                + [round(entry['raw_probabilities'][c], 4) for c in class_names]
+                + [round(entry['all_probabilities'][c], 4) for c in class_names]
+            )
+    print(f"Timeline saved to: {output_file}")
+
+
+def plot_timelines(timelines, class_names, save_path):
+    """Smoothed probabilities (lines) and raw per-frame probabilities (dots) over time, one panel per stream"""
+    fig, axes = plt.subplots(len(timelines), 1, figsize=(12, 3.5 * len(timelines)), squeeze=False)
+    for ax, (stream, entries) in zip(axes[:, 0], timelines.items()):
+        times = [e['timestamp'] for e in entries]
+        for class_name in class_names:
+            line, = ax.plot(times, [e['all_probabilities'][class_name] for e in entries], label=class_name)
+            ax.scatter(times, [e['raw_probabilities'][class_name] for e in entries],
+                       s=8, alpha=0.4, color=line.get_color())
+        ax.set_title(os.path.basename(os.path.normpath(stream)))
+        ax.set_ylim(0, 1)
+        ax.set_ylabel('Probability')
+        ax.grid(True, alpha=0.3)
+        ax.legend(loc='upper right')
+    axes[-1, 0].set_xlabel('Time (s)')
+    plt.tight_layout()
+    plt.savefig(save_path, dpi=150, bbox_inches='tight')
+    plt.close()
+    print(f"Timeline chart saved to {save_path}")
+
+
+def main(args):
+    """Main analysis function"""
+    print("="*70)
+    print("POLLUTION DETECTION - VIDEO ANALYSIS")
+    print("="*70)
+    
+    for path in [args.model_path] + args.input:
+        if not os.path.exists(path):
+            print(f"\nERROR: Not found: {path}")
+            sys.exit(1)
+    
+    img_size = (args.img_size, args.img_size) if args.img_size else None
+    detector = load_stage(args.model_path, img_size, args.num_threads)
+    analyzer = VideoPollutionAnalyzer(
+        detector,
+        check_interval=args.check_interval,
+        change_threshold=args.change_threshold,
+        max_interval=args.max_interval,
+        time_constant=args.time_constant,
+        batch_size=args.batch_size,
+        sequence_fps=args.sequence_fps
+    )
+    print(f"\nStreams: {len(args.input)}, checking every {args.check_interval}s of video, "
+          f"sampling on {args.change_threshold:.1%} change or every {args.max_interval}s")
+    
+    timelines = {source: [] for source in dict.fromkeys(args.input)}
+    start = time.perf_counter()
+    for entry in analyzer.analyze(args.input, args.confidence_threshold):
+        timelines[entry['stream']].append(entry)
+    seconds = time.perf_counter() - start
+    
+    print("\n" + "-"*70)
+    print(f"{'stream':28s}{'video s':>9s}{'checked':>9s}{'sampled':>9s}{'realtime':>10s}  dominant")
+    print("-"*70)
+    total_duration = 0.0
+    for source, entries in timelines.items():
+        stats = analyzer.stats[source]
+        name = os.path.basename(os.path.normpath(source))[:27]
+        if stats['error']:
+            print(f"{name:28s}  ERROR: {stats['error']}")
+            continue
+        total_duration += stats['duration']
+        dominant = '-'
+        if entries:
+            counts = {}
+            for entry in entries:
+                counts[entry['predicted_class']] = counts.get(entry['predicted_class'], 0) + 1
+            dominant = max(counts, key=counts.get)
+        print(f"{name:28s}{stats['duration']:>9.1f}{stats['checked']:>9d}{stats['sampled']:>9d}"
+              f"{stats['duration'] / seconds:>9.1f}x  {dominant}")
+    print(f"\n{total_duration:.1f}s of video in {seconds:.1f}s "
+          f"({total_duration / seconds:.1f}x real time over all streams)")
+    
+    for source, entries in timelines.items():
+        segments = timeline_segments(entries)
+        if not segments:
+            continue
+        print(f"\n{source}:")
+        for segment in segments:
+            print(f"  {segment['start']:8.1f}s - {segment['end']:8.1f}s  {segment['predicted_class']:18s}"
+                  f"{segment['mean_confidence']:7.2%}  ({segment['samples']} samples)")
+    
+    if args.save_results:
+        output_file = args.output or f"pollution_video_timeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        print()
+        save_timeline([e for entries in timelines.values() for e in entries], detector.class_names, output_file)
+    if args.plot and any(timelines.values()):
+        plot_timelines({s: e for s, e in timelines.items() if e}, detector.class_names, args.plot)
+    
+    print("\n" + "="*70)
+    print("ANALYSIS COMPLETE!")
+    print("="*70 + "\n")
+    if any(stats['error'] for stats in analyzer.stats.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Analyze pollution in videos or frame sequences from fixed cameras',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # One outlet camera recording
+  python analyze_video.py --model_path pollution_detector_model.h5 --input outlet_cam.mp4
+  
+  # Several cameras batched together, with a timeline chart
+  python analyze_video.py --input cam1.mp4 cam2.mp4 cam3.mp4 --plot timeline.png
+  
+  # Time-lapse frames (one per 10 s), slower smoothing
+  python analyze_video.py --input frames/stack_2/ --sequence_fps 0.1 --time_constant 60
+  
+  # INT8 model, more sensitive change detection
+  python analyze_video.py --model_path pollution_detector_int8.tflite --input cam.mp4 --change_threshold 0.015
+        """
+    )
+    
+    parser.add_argument('--model_path', type=str, default='pollution_detector_model.h5',
+                        help='Trained model, Keras or .tflite (default: pollution_detector_model.h5)')
+    parser.add_argument('--img_size', type=int, default=None,
+                        help='Required input size for .tflite files (default: read from the model)')
+    parser.add_argument('--num_threads', type=int, default=None,
+                        help='TFLite interpreter threads (default: one per CPU)')
+    parser.add_argument('--input', type=str, nargs='+', required=True,
+                        help='Video files and/or directories of frames named in time order')
+    parser.add_argument('--check_interval', type=float, default=0.2,
+                        help='Seconds of video between frames checked for change (default: 0.2)')
+    parser.add_argument('--change_threshold', type=float, default=0.03,
+                        help='Mean absolute pixel change, as a fraction of 255, that triggers a sample (default: 0.03)')
+    parser.add_argument('--max_interval', type=float, default=10.0,
+                        help='Longest gap in seconds between samples of a static scene (default: 10)')
+    parser.add_argument('--time_constant', type=float, default=5.0,
+                        help='Probability smoothing time constant in seconds, 0 = none (default: 5)')
+    parser.add_argument('--sequence_fps', type=float, default=1.0,
+                        help='Frame rate of frame directories (default: 1.0)')
+    parser.add_argument('--batch_size', type=int, default=None,
+                        help='Most sampled frames per forward pass (default: the detector default)')
+    parser.add_argument('--confidence_threshold', type=float, default=0.6,
+                        help='Smoothed confidence below which an entry gets a warning (default: 0.6)')
+    parser.add_argument('--save_results', action='store_true', default=True,
+                        help='Save the timeline to CSV (default: True)')
+    parser.add_argument('--no_save', dest='save_results', action='store_false',
+                        help='Do not save the timeline')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Timeline CSV (default: pollution_video_timeline_<timestamp>.csv)')
+    parser.add_argument('--plot', type=str, default=None,
+                        help='Save a chart of the smoothed timelines')
+    
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,387 @@
+"""
+Throughput Benchmark for Pollution Detection Model
+Measures JPEG decode cost and images/sec of PollutionDetector.predict_batch at
+several batch sizes and decode worker counts, the host cost of in-graph vs
+host-side pixel rescaling, and how sharded multi-process inference scales
+with the number of cores
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+from glob import glob
+from datetime import datetime
+import numpy as np
+from PIL import Image
+from tensorflow.keras import layers, models
+from pollution_detector import PollutionDetector, PIXEL_SCALE
+from image_pipeline import IMAGE_EXTENSIONS, decode_image
+from sharded_inference import ShardedPredictor
+
+
+def create_sample_images(output_dir, n_images, size=(1280, 960), seed=42):
+    """
+    Write synthetic JPEG photos for benchmarking
+    
+    Images are smooth random color fields plus noise, so they compress and
+    decode roughly like real outdoor photos rather than like pure noise.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for i in range(n_images):
+        coarse = rng.integers(0, 256, (12, 16, 3), dtype=np.uint8)
+        img = Image.fromarray(coarse).resize(size, Image.BICUBIC)
+        noisy = np.asarray(img, dtype=np.int16) + rng.integers(-12, 13, (size[1], size[0], 3))
+        path = os.path.join(output_dir, f"sample_{i:05d}.jpg")
+        Image.fromarray(np.clip(noisy, 0, 255).astype(np.uint8)).save(path, quality=90)
+        paths.append(path)
+    return paths
+
+
+def time_call(fn, repeats=3):
+    """Best wall time of several runs"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_batch_sizes(detector, image_paths, batch_sizes, repeats=3):
+    """images/sec of predict_batch for each batch size"""
+    results = []
+    for batch_size in batch_sizes:
+        # Warm up so graph tracing for this batch shape isn't timed
+        detector.predict_batch(image_paths[:batch_size], batch_size=batch_size)
+        seconds = time_call(lambda: detector.predict_batch(image_paths, batch_size=batch_size), repeats)
+        results.append({
+            'batch_size': batch_size,
+            'seconds': round(seconds, 4),
+            'images_per_sec': round(len(image_paths) / seconds, 2)
+        })
+        print(f"  batch_size={batch_size:4d}: {len(image_paths) / seconds:8.2f} images/sec")
+    return results
+
+
+def benchmark_decode_workers(detector, image_paths, batch_size, worker_counts, repeats=3,
+                             use_processes=False):
+    """images/sec of predict_batch for each decode worker count (0 = inline)"""
+    results = []
+    detector.predict_batch(image_paths[:batch_size], batch_size=batch_size)
+    for num_workers in worker_counts:
+        seconds = time_call(lambda: detector.predict_batch(
+            image_paths, batch_size=batch_size, num_workers=num_workers, use_processes=use_processes
+        ), repeats)
+        results.append({
+            'num_workers': num_workers,
+            'use_processes': use_processes,
+            'seconds': round(seconds, 4),
+            'images_per_sec': round(len(image_paths) / seconds, 2)
+        })
+        print(f"  num_workers={num_workers:3d}: {len(image_paths) / seconds:8.2f} images/sec")
+    return results
+
+
+def parse_process_counts(value):
+    """'all' = powers of two up to the CPU count plus the CPU count itself"""
+    if value == 'all':
+        cpus = os.cpu_count() or 1
+        counts = {cpus}
+        n = 1
+        while n < cpus:
+            counts.add(n)
+            n *= 2
+        return sorted(counts)
+    return [int(n) for n in value.split(',')]
+
+
+def benchmark_processes(model_path, image_paths, process_counts, img_size=(224, 224),
+                        batch_size=32, repeats=3):
+    """
+    Scaling of ShardedPredictor with one intra-op thread per worker process
+    
+    Efficiency is the speedup over one process divided by the process count
+    (1.0 = perfect linear scaling). Startup (spawning and loading the model
+    in every worker) is reported separately and not part of images/sec.
+    """
+    results = []
+    base = None
+    for n in process_counts:
+        predictor = ShardedPredictor(
+            model_path, num_processes=n, threads_per_process=1, img_size=img_size, shard_size=batch_size
+        )
+        start = time.perf_counter()
+        predictor.start()
+        startup = time.perf_counter() - start
+        try:
+            # Warm up every worker's graph for this batch shape
+            predictor.predict_batch(image_paths[:batch_size * n], batch_size=batch_size)
+            seconds = time_call(lambda: predictor.predict_batch(image_paths, batch_size=batch_size), repeats)
+        finally:
+            predictor.close()
+        
+        images_per_sec = len(image_paths) / seconds
+        base = base or images_per_sec
+        speedup = images_per_sec / base
+        results.append({
+            'processes': n,
+            'startup_seconds': round(startup, 2),
+            'images_per_sec': round(images_per_sec, 2),
+            'speedup': round(speedup, 2),
+            'efficiency': round(speedup / n, 3)
+        })
+        print(f"  processes={n:3d}: {images_per_sec:8.2f} images/sec, speedup {speedup:5.2f}x, "
+              f"efficiency {speedup / n:6.1%} (startup {startup:.1f}s)")
+    return results
+
+
+def decoded_size(image_path, img_size, draft):
+    """Size the decoder actually produces before the final resize"""
+    with Image.open(image_path) as img:
+        if draft:
+            img.draft('RGB', tuple(img_size))
+        return img.size
+
+
+def benchmark_draft_decode(detector, image_paths, repeats=3):
+    """
+    Compare full decode with reduced-resolution (draft) JPEG decode
+    
+    Reports decode time, the decoded frame size (the dominant per-image
+    allocation) and how far predictions move between the two paths.
+    """
+    results = {}
+    decoded = {}
+    for draft in (False, True):
+        label = 'draft' if draft else 'full'
+        seconds = time_call(lambda: [decode_image(p, detector.img_size, draft=draft) for p in image_paths], repeats)
+        width, height = decoded_size(image_paths[0], detector.img_size, draft)
+        decoded[label] = np.stack([decode_image(p, detector.img_size, draft=draft) for p in image_paths])
+        results[label] = {
+            'decode_ms_per_image': round(1000 * seconds / len(image_paths), 3),
+            'decoded_size': [width, height],
+            'decoded_mb_per_image': round(width * height * 3 / 2**20, 2)
+        }
+        print(f"  {label:5s}: {1000 * seconds / len(image_paths):7.2f} ms/image, "
+              f"decoded at {width}x{height} ({width * height * 3 / 2**20:.1f} MB)")
+    
+    full_probs = detector.predict_arrays(decoded['full'])
+    draft_probs = detector.predict_arrays(decoded['draft'])
+    pixel_diff = np.abs(decoded['full'].astype(np.int16) - decoded['draft'].astype(np.int16))
+    results['mean_pixel_diff'] = round(float(pixel_diff.mean()), 3)
+    results['max_probability_diff'] = round(float(np.abs(full_probs - draft_probs).max()), 5)
+    results['top1_agreement'] = round(float(np.mean(full_probs.argmax(1) == draft_probs.argmax(1))), 4)
+    results['speedup'] = round(results['full']['decode_ms_per_image'] / results['draft']['decode_ms_per_image'], 2)
+    print(f"  speedup: {results['speedup']:.2f}x, mean pixel diff: {results['mean_pixel_diff']:.2f}/255, max probability diff: {results['max_probability_diff']:.4f}, "
+          f"top-1 agreement: {results['top1_agreement']:.2%}")
+    return results
+
+
+def host_rescaled_twin(model):
+    """The same model without its Rescaling layer, taking [0, 1] floats (shares weights)"""
+    return models.Sequential([layers.Input(shape=model.input_shape[1:])] + model.layers[1:])
+
+
+def benchmark_preprocessing(detector, image_paths, batch_size, repeats=3):
+    """
+    Compare in-graph rescaling of uint8 batches with float32 conversion on the host
+    
+    Both paths run the same weights on the same decoded batch. Reported per
+    batch: wall time, process CPU time (all threads, including TensorFlow's),
+    bytes handed to the model, and the peak NumPy allocation while preparing and
+    running the batch.
+    """
+    if not detector.uint8_inputs:
+        print("  Skipped: model has no in-graph rescaling (built before uint8 inputs)")
+        return None
+    images = np.stack([detector.load_image(p) for p in image_paths[:batch_size]])
+    paths = {
+        'in_graph_uint8': (detector.model, lambda: images),
+        'host_float32': (host_rescaled_twin(detector.model), lambda: images.astype(np.float32) * PIXEL_SCALE)
+    }
+    
+    results = {}
+    probabilities = {}
+    for label, (model, prepare) in paths.items():
+        def run():
+            return np.asarray(model.predict_on_batch(prepare()))
+        # Warm up so graph tracing isn't timed
+        probabilities[label] = run()
+        
+        cpu_start = time.process_time()
+        seconds = time_call(run, repeats)
+        cpu_seconds = (time.process_time() - cpu_start) / repeats
+        
+        tracemalloc.start()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        input_bytes = prepare().nbytes
+        results[label] = {
+            'ms_per_batch': round(1000 * seconds, 3),
+            'cpu_ms_per_batch': round(1000 * cpu_seconds, 3),
+            'input_mb_per_batch': round(input_bytes / 2**20, 3),
+            'peak_numpy_mb_per_batch': round(peak / 2**20, 3)
+        }
+        print(f"  {label:15s}: {1000 * seconds:8.2f} ms/batch, {1000 * cpu_seconds:8.2f} ms CPU, "
+              f"input {input_bytes / 2**20:6.2f} MB, peak NumPy allocation {peak / 2**20:6.2f} MB")
+    
+    host, graph = results['host_float32'], results['in_graph_uint8']
+    results['batch_size'] = len(images)
+    results['cpu_saving'] = round(1 - graph['cpu_ms_per_batch'] / host['cpu_ms_per_batch'], 4)
+    results['max_probability_diff'] = round(float(np.abs(
+        probabilities['in_graph_uint8'] - probabilities['host_float32']).max()), 6)
+    print(f"  in-graph rescaling: {results['cpu_saving']:.1%} less CPU time, "
+          f"{host['input_mb_per_batch'] / graph['input_mb_per_batch']:.0f}x smaller input, "
+          f"max probability diff: {results['max_probability_diff']:.2g}")
+    return results
+
+
+def load_detector(args):
+    detector = PollutionDetector(img_size=(args.img_size, args.img_size))
+    if args.model_path:
+        detector.load_model(args.model_path)
+    else:
+        detector.build_model(pretrained=args.pretrained)
+    return detector
+
+
+def main(args):
+    """Main benchmark function"""
+    print("="*70)
+    print("POLLUTION DETECTION - THROUGHPUT BENCHMARK")
+    print("="*70)
+    
+    if args.model_path and not os.path.exists(args.model_path):
+        print(f"\nERROR: Model file not found: {args.model_path}")
+        sys.exit(1)
+    
+    detector = load_detector(args)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.image_dir:
+            image_paths = sorted(
+                p for p in glob(os.path.join(args.image_dir, '*'))
+                if p.lower().endswith(IMAGE_EXTENSIONS)
+            )[:args.num_images]
+        else:
+            print(f"\nWriting {args.num_images} synthetic {args.image_width}x{args.image_height} JPEGs...")
+            image_paths = create_sample_images(
+                tmp_dir, args.num_images, size=(args.image_width, args.image_height)
+            )
+        
+        if not image_paths:
+            print("\nERROR: No images to benchmark")
+            sys.exit(1)
+        
+        results = {
+            'created': datetime.now().isoformat(),
+            'cpu_count': os.cpu_count(),
+            'num_images': len(image_paths),
+            'img_size': args.img_size,
+            'model': args.model_path or ('mobilenetv2' if args.pretrained else 'custom_cnn')
+        }
+        
+        print(f"\nJPEG decode, full vs draft ({len(image_paths)} images):")
+        results['draft_decode'] = benchmark_draft_decode(detector, image_paths, args.repeats)
+        
+        print(f"\nPixel rescaling, in-graph vs host (batch_size={args.pipeline_batch_size}, best of {args.repeats}):")
+        results['preprocessing'] = benchmark_preprocessing(
+            detector, image_paths, args.pipeline_batch_size, args.repeats
+        )
+        
+        batch_sizes = [int(b) for b in args.batch_sizes.split(',')]
+        print(f"\npredict_batch throughput ({len(image_paths)} images, best of {args.repeats}):")
+        results['predict_batch'] = benchmark_batch_sizes(detector, image_paths, batch_sizes, args.repeats)
+    
+        worker_counts = [int(w) for w in args.num_workers.split(',')]
+        mode = 'processes' if args.decode_processes else 'threads'
+        print(f"\nDecode pipeline ({mode}, batch_size={args.pipeline_batch_size}):")
+        results['decode_pipeline'] = benchmark_decode_workers(
+            detector, image_paths, args.pipeline_batch_size, worker_counts,
+            args.repeats, args.decode_processes
+        )
+    
+        if args.process_counts:
+            if not args.model_path:
+                print("\nSkipping process scaling: worker processes need --model_path")
+            else:
+                process_counts = parse_process_counts(args.process_counts)
+                print(f"\nSharded multi-process inference (1 thread per process, "
+                      f"batch_size={args.pipeline_batch_size}, {os.cpu_count()} CPUs):")
+                results['process_scaling'] = benchmark_processes(
+                    args.model_path, image_paths, process_counts, detector.img_size,
+                    args.pipeline_batch_size, args.repeats
+                )
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to: {args.output}")
+    
+    print("\n" + "="*70)
+    print("BENCHMARK COMPLETE!")
+    print("="*70 + "\n")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Benchmark pollution detection throughput',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Benchmark a trained model on synthetic photos
+  python benchmark_pollution.py --model_path pollution_detector_model.h5
+  
+  # Reduced-resolution decode on 12 MP photos
+  python benchmark_pollution.py --model_path model.h5 --image_width 4000 --image_height 3000 --num_images 64
+  
+  # Scaling of multi-process inference from 1 process to all cores
+  python benchmark_pollution.py --model_path model.h5 --num_images 1024 --process_counts all
+  
+  # Benchmark on real images with custom batch sizes
+  python benchmark_pollution.py --model_path model.h5 --image_dir ./images/ --batch_sizes 1,16,64
+        """
+    )
+    
+    parser.add_argument('--model_path', type=str, default=None,
+                        help='Trained model file (default: freshly built architecture)')
+    parser.add_argument('--image_dir', type=str, default=None,
+                        help='Directory of images to use (default: synthetic JPEGs)')
+    parser.add_argument('--num_images', type=int, default=256,
+                        help='Number of images per run (default: 256)')
+    parser.add_argument('--image_width', type=int, default=1280,
+                        help='Width of synthetic images (default: 1280)')
+    parser.add_argument('--image_height', type=int, default=960,
+                        help='Height of synthetic images (default: 960)')
+    parser.add_argument('--img_size', type=int, default=224,
+                        help='Model input size (default: 224)')
+    parser.add_argument('--batch_sizes', type=str, default='1,8,32,64',
+                        help='Comma-separated batch sizes (default: 1,8,32,64)')
+    parser.add_argument('--num_workers', type=str, default='0,1,2,4',
+                        help='Comma-separated decode worker counts, 0 = inline (default: 0,1,2,4)')
+    parser.add_argument('--pipeline_batch_size', type=int, default=32,
+                        help='Batch size for the decode pipeline comparison (default: 32)')
+    parser.add_argument('--decode_processes', action='store_true',
+                        help='Benchmark process-based instead of thread-based decoding')
+    parser.add_argument('--process_counts', type=str, default=None,
+                        help="Comma-separated worker process counts for sharded inference, or 'all' (default: skip)")
+    parser.add_argument('--repeats', type=int, default=3,
+                        help='Timed runs per configuration, best is reported (default: 3)')
+    parser.add_argument('--pretrained', action='store_true', default=True,
+                        help='Build the MobileNetV2 architecture when no model is given (default: True)')
+    parser.add_argument('--no_pretrained', dest='pretrained', action='store_false',
+                        help='Build the custom CNN when no model is given')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Save results to a JSON file')
+    
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,116 @@
+"""
+Confidence-Gated Cascade for Pollution Detection
+A cheap first-stage classifier handles clear images; only uncertain ones reach the full model
+"""
+
+import time
+import numpy as np
+import tensorflow as tf
+from pollution_detector import PollutionDetector
+from tflite_detector import TFLitePollutionDetector
+
+
+def load_stage(model_path, img_size=None, num_threads=None):
+    """
+    Load a Keras or .tflite model as a PollutionDetector
+    
+    Both kinds are sized from their input; img_size, if given, is checked
+    against a .tflite model's.
+    """
+    if model_path.endswith('.tflite'):
+        detector = TFLitePollutionDetector(img_size=img_size, num_threads=num_threads)
+        detector.load_model(model_path)
+        return detector
+    detector = PollutionDetector(inference_profile=None)
+    detector.load_model(model_path)
+    return detector
+
+
+class CascadePollutionDetector(PollutionDetector):
+    """
+    Two-stage PollutionDetector: small model first, full model on low confidence
+    
+    Every image runs through the small model (e.g. build_model(pretrained=False,
+    width=0.25) at 96x96). Images whose top probability is below threshold are
+    run through the full model as a sub-batch, and its probabilities replace
+    the small model's. Images are decoded once at the full model's size and
+    downscaled in memory for the small one.
+    
+    predict_image, predict_batch, the decode pipeline, the prediction cache
+    and the result format are inherited; only the forward pass differs.
+    Per-stage counts and time accumulate in self.stats.
+    """
+    
+    def __init__(self, small, full, threshold=0.8):
+        """
+        Args:
+            small: Loaded first-stage PollutionDetector (any input size)
+            full: Loaded full PollutionDetector; its input size is used for decoding
+            threshold: Small-model confidence below which an image is escalated
+        """
+        if small.class_names != full.class_names:
+            raise ValueError(f"Stage classes differ: {small.class_names} vs {full.class_names}")
+        super().__init__(full.img_size, full.num_classes, inference_profile=None)
+        self.small = small
+        self.full = full
+        self.threshold = threshold
+        self.class_names = full.class_names
+        self.draft_decode = full.draft_decode
+        self.batch_size = full.batch_size
+        self.model = full.model
+        if small.model_id and full.model_id:
+            # Cached results depend on both models and on where the gate sits
+            self.model_id = f"cascade:{small.model_id}:{full.model_id}:{threshold}"
+        self.reset_stats()
+    
+    def reset_stats(self):
+        self.stats = {'images': 0, 'escalated': 0, 'small_seconds': 0.0, 'full_seconds': 0.0}
+    
+    def small_inputs(self, images):
+        """Downscale full-size decoded images to the small model's input"""
+        if tuple(self.small.img_size) == tuple(self.img_size):
+            return images
+        width, height = self.small.img_size
+        resized = tf.image.resize(images, (height, width), method='area')
+        return np.asarray(tf.cast(tf.round(resized), tf.uint8))
+    
+    def predict_arrays(self, images):
+        """
+        Run the cascade over a batch of decoded images
+        
+        Args:
+            images: uint8 array of shape (batch, *img_size, 3) at the full model's size
+        
+        Returns:
+            Array of class probabilities, shape (batch, num_classes)
+        """
+        start = time.perf_counter()
+        probabilities = np.array(self.small.predict_arrays(self.small_inputs(images)), dtype=np.float32)
+        self.stats['small_seconds'] += time.perf_counter() - start
+        
+        uncertain = np.flatnonzero(probabilities.max(axis=1) < self.threshold)
+        if len(uncertain):
+            start = time.perf_counter()
+            probabilities[uncertain] = self.full.predict_arrays(images[uncertain])
+            self.stats['full_seconds'] += time.perf_counter() - start
+        
+        self.stats['images'] += len(images)
+        self.stats['escalated'] += len(uncertain)
+        return probabilities
+    
+    def summary(self):
+        """
+        Escalation rate and forward-pass cost so far
+        
+        Returns:
+            dict with images, escalated, escalated_fraction and ms_per_image
+            (small + full model time, excluding decoding)
+        """
+        images = self.stats['images']
+        seconds = self.stats['small_seconds'] + self.stats['full_seconds']
+        return {
+            'images': images,
+            'escalated': self.stats['escalated'],
+            'escalated_fraction': self.stats['escalated'] / images if images else 0.0,
+            'ms_per_image': 1000 * seconds / images if images else 0.0
+        }
@@ -0,0 +1,281 @@
+"""
+Near-Duplicate Image Index
+Groups near-identical photos by perceptual hash so each burst is classified once
+"""
+
+import os
+from itertools import combinations
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+
+
+_POPCOUNT8 = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount64(values):
+    """Number of set bits of each uint64"""
+    values = np.ascontiguousarray(values, dtype=np.uint64)
+    return _POPCOUNT8[values.view(np.uint8)].reshape(-1, 8).sum(axis=1, dtype=np.int64)
+
+
+def dhash(image_path):
+    """
+    64-bit difference hash of an image
+    
+    The image is reduced to a 9x8 grayscale thumbnail and each bit records
+    whether a pixel is brighter than its right neighbour. Recompression,
+    resizing and small crops or exposure changes flip only a few bits.
+    """
+    with Image.open(image_path) as img:
+        img.draft('L', (9, 8))
+        small = np.asarray(img.convert('L').resize((9, 8), Image.BOX), dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def hash_files(image_paths, workers=None):
+    """dhash of each path (None where the file cannot be read), in input order"""
+    def safe_hash(path):
+        try:
+            return dhash(path)
+        except Exception:
+            return None
+    
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        return list(pool.map(safe_hash, image_paths))
+
+
+class NearDuplicateIndex:
+    """
+    Exact Hamming-radius search over 64-bit hashes using multi-index hashing
+    
+    Hashes are split into num_blocks blocks. Two hashes within max_distance
+    bits must agree on some block to within max_distance // num_blocks bits,
+    so a query only checks the buckets of its block values and their few
+    near neighbours. The block tables are CSR layouts (bucket offsets + entry
+    order) kept as a few sorted runs, like an LSM tree: the newest
+    rebuild_every entries are scanned directly, then sorted into a run, and
+    runs of equal size are merged, so every entry is re-sorted only
+    O(log n) times and a query probes at most log2(n / rebuild_every) + 1
+    runs in one vectorized gather. Memory is about 32 bytes per stored hash
+    plus 2 MB per run, so millions fit easily.
+    """
+    
+    def __init__(self, max_distance=6, num_blocks=4, rebuild_every=256):
+        """
+        Args:
+            max_distance: Largest Hamming distance treated as a duplicate
+            num_blocks: Blocks per hash (64 / num_blocks bits each, at most 16)
+            rebuild_every: Unindexed inserts scanned directly before they are sorted into a run
+        """
+        if 64 % num_blocks or 64 // num_blocks > 16:
+            raise ValueError("num_blocks must divide 64 into blocks of at most 16 bits")
+        self.max_distance = max_distance
+        self.num_blocks = num_blocks
+        self.rebuild_every = rebuild_every
+        self.block_bits = 64 // num_blocks
+        
+        # XOR masks reaching every block value within the per-block radius
+        radius = max_distance // num_blocks
+        self._masks = np.array([
+            sum(1 << bit for bit in bits)
+            for r in range(radius + 1)
+            for bits in combinations(range(self.block_bits), r)
+        ], dtype=np.int64)
+        
+        self.size = 0
+        self._hashes = np.empty(1024, dtype=np.uint64)
+        self._groups = np.empty(1024, dtype=np.int64)
+        self._indexed = 0
+        # Per block: entry ids, each run's slice sorted by block value
+        self._order = np.empty((num_blocks, 1024), dtype=np.int32)
+        # Sorted runs as contiguous entry ranges [start, end), oldest first
+        self._runs = []
+        # Per run slot and block: bucket start positions in _order; slot i belongs
+        # to _runs[i], and the array only grows when there are more runs than slots
+        self._offsets = np.zeros((4, num_blocks, 2 ** self.block_bits + 1), dtype=np.int64)
+    
+    def _sort_run(self, start, end, offsets):
+        """Sort entries [start, end) into _order, writing the run's bucket offsets into offsets"""
+        hashes = self._hashes[start:end]
+        mask = np.uint64(2 ** self.block_bits - 1)
+        offsets[:, 0] = start
+        for block in range(self.num_blocks):
+            values = ((hashes >> np.uint64(block * self.block_bits)) & mask).astype(np.int64)
+            self._order[block, start:end] = start + np.argsort(values, kind='stable')
+            counts = np.bincount(values, minlength=2 ** self.block_bits)
+            offsets[block, 1:] = start + np.cumsum(counts)
+    
+    def _seal(self):
+        """Sort the unindexed tail into a run, merging it with equal-sized runs before it"""
+        if self._order.shape[1] < self.size:
+            order = np.empty((self.num_blocks, len(self._hashes)), dtype=np.int32)
+            order[:, :self._indexed] = self._order[:, :self._indexed]
+            self._order = order
+        
+        start = self._indexed
+        # Binary-counter merging: run sizes roughly halve from oldest to newest
+        while self._runs and self._runs[-1][1] - self._runs[-1][0] <= self.size - start:
+            start = self._runs.pop()[0]
+        self._runs.append((start, self.size))
+        if len(self._runs) > len(self._offsets):
+            offsets = np.zeros((2 * len(self._offsets),) + self._offsets.shape[1:], dtype=np.int64)
+            offsets[:len(self._offsets)] = self._offsets
+            self._offsets = offsets
+        # Only the merged run's slot is rewritten; older runs keep theirs
+        self._sort_run(start, self.size, self._offsets[len(self._runs) - 1])
+        self._indexed = self.size
+    
+    def query(self, hash_value):
+        """
+        Find stored hashes within max_distance
+        
+        Returns:
+            (entry ids, distances) as arrays
+        """
+        hash_value = int(hash_value)
+        block_mask = 2 ** self.block_bits - 1
+        values = np.array([
+            (hash_value >> (block * self.block_bits)) & block_mask for block in range(self.num_blocks)
+        ])
+        
+        # Gather all probed buckets of all runs and blocks in one vectorized step
+        neighbours = values[:, None] ^ self._masks[None, :]
+        blocks = np.arange(self.num_blocks)[:, None]
+        offsets = self._offsets[:len(self._runs)]
+        starts = offsets[:, blocks, neighbours].ravel()
+        lengths = offsets[:, blocks, neighbours + 1].ravel() - starts
+        block_ids = np.repeat(np.tile(np.repeat(np.arange(self.num_blocks), len(self._masks)), len(self._runs)),
+                              lengths)
+        positions = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths - starts, lengths)
+        candidates = np.concatenate((
+            self._order[block_ids, positions].astype(np.int64),
+            np.arange(self._indexed, self.size)
+        ))
+        
+        distances = popcount64(self._hashes[candidates] ^ np.uint64(hash_value))
+        keep = distances <= self.max_distance
+        # An entry can match in several blocks
+        entries, first = np.unique(candidates[keep], return_index=True)
+        return entries, distances[keep][first]
+    
+    def add(self, hash_value, group=None):
+        """
+        Store a hash
+        
+        Args:
+            hash_value: 64-bit hash
+            group: Group id (None = start a new group named by the entry id)
+        
+        Returns:
+            Entry id
+        """
+        if self.size == len(self._hashes):
+            self._hashes = np.resize(self._hashes, 2 * self.size)
+            self._groups = np.resize(self._groups, 2 * self.size)
+        entry = self.size
+        self._hashes[entry] = np.uint64(hash_value)
+        self._groups[entry] = entry if group is None else group
+        self.size += 1
+        if self.size - self._indexed >= self.rebuild_every:
+            self._seal()
+        return entry
+    
+    def assign(self, hash_value):
+        """
+        Put a hash in the group of its nearest stored neighbour, or a new group
+        
+        Returns:
+            (group id, distance to the nearest neighbour or None, is_new_group)
+        """
+        entries, distances = self.query(hash_value)
+        if len(entries) == 0:
+            entry = self.add(hash_value)
+            return int(self._groups[entry]), None, True
+        nearest = np.argmin(distances)
+        group = int(self._groups[entries[nearest]])
+        # Identical fingerprints add nothing, so reruns don't grow the index
+        if distances[nearest] > 0:
+            self.add(hash_value, group)
+        return group, int(distances[nearest]), False
+    
+    def group_count(self):
+        return len(np.unique(self._groups[:self.size]))
+    
+    def save(self, filepath):
+        """Persist hashes and groups (.npz)"""
+        # File object, so numpy does not append .npz to other names
+        with open(filepath, 'wb') as f:
+            np.savez(
+                f,
+                hashes=self._hashes[:self.size],
+                groups=self._groups[:self.size],
+                settings=np.array([self.max_distance, self.num_blocks, self.rebuild_every])
+            )
+    
+    @classmethod
+    def load(cls, filepath):
+        with np.load(filepath) as data:
+            max_distance, num_blocks, rebuild_every = (int(v) for v in data['settings'])
+            index = cls(max_distance, num_blocks, rebuild_every)
+            index._hashes = data['hashes'].copy()
+            index._groups = data['groups'].copy()
+        index.size = len(index._hashes)
+        if index.size == 0:
+            index._hashes = np.empty(1024, dtype=np.uint64)
+            index._groups = np.empty(1024, dtype=np.int64)
+        if index.size:
+            index._seal()
+        return index
+
+
+def predict_deduplicated(detector, image_paths, index=None, workers=None, **predict_kwargs):
+    """
+    Classify images once per near-duplicate group
+    
+    The first image of each group in image_paths goes through
+    detector.predict_batch; every other member gets a copy of that result.
+    
+    Args:
+        detector: Loaded PollutionDetector
+        image_paths: List of image file paths
+        index: NearDuplicateIndex (persisted groups carry over between runs)
+        workers: Threads for hashing
+        **predict_kwargs: Passed to detector.predict_batch
+    
+    Returns:
+        List of result dicts in input order, each with 'duplicate_group' and,
+        for non-representatives, 'duplicate_of' and 'hamming_distance'
+    """
+    if index is None:
+        index = NearDuplicateIndex()
+    image_paths = list(image_paths)
+    hashes = hash_files(image_paths, workers)
+    
+    representative_of = {}
+    members = []
+    for position, hash_value in enumerate(hashes):
+        if hash_value is None:
+            # Unreadable: predict on its own so it gets its error entry
+            members.append((position, None, None))
+            continue
+        group, distance, _ = index.assign(hash_value)
+        representative = representative_of.setdefault(group, position)
+        members.append((representative, group, distance))
+    
+    to_predict = sorted({representative for representative, _, _ in members})
+    predicted = detector.predict_batch([image_paths[i] for i in to_predict], **predict_kwargs)
+    by_position = dict(zip(to_predict, predicted))
+    
+    results = []
+    for position, (representative, group, distance) in enumerate(members):
+        result = dict(by_position[representative])
+        result['image_path'] = image_paths[position]
+        if group is not None:
+            result['duplicate_group'] = group
+        if representative != position:
+            result['duplicate_of'] = image_paths[representative]
+            result['hamming_distance'] = distance
+        results.append(result)
+    return results
@@ -0,0 +1,212 @@
+"""
+Evaluation Script for the Confidence-Gated Pollution Detection Cascade
+Sweeps the escalation threshold and compares the cascade with the full model alone
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+import numpy as np
+from cascade_detector import CascadePollutionDetector, load_stage
+from image_pipeline import ImageBatchPipeline, list_class_files
+from export_tflite import evaluate
+
+
+def stage_probabilities(cascade, image_paths, batch_size=32):
+    """
+    Both stages' probabilities for every image, from one decode pass
+    
+    Returns:
+        (small probabilities, full probabilities, small ms/image, full ms/image);
+        rows of unreadable images are NaN
+    """
+    num_classes = cascade.num_classes
+    small_probs = np.full((len(image_paths), num_classes), np.nan, dtype=np.float32)
+    full_probs = np.full((len(image_paths), num_classes), np.nan, dtype=np.float32)
+    small_seconds = full_seconds = 0.0
+    decoded = offset = 0
+    warm = False
+    
+    pipeline = ImageBatchPipeline(cascade.img_size, batch_size)
+    for batch in pipeline.batches(image_paths):
+        rows = offset + np.asarray(batch.positions, dtype=np.int64)
+        offset += len(batch.paths)
+        if not len(batch.images):
+            continue
+        small_images = cascade.small_inputs(batch.images)
+        if not warm:
+            # Graph tracing of the first call isn't part of the per-image cost
+            cascade.small.predict_arrays(small_images)
+            cascade.full.predict_arrays(batch.images)
+            warm = True
+        
+        start = time.perf_counter()
+        small_probs[rows] = cascade.small.predict_arrays(small_images)
+        small_seconds += time.perf_counter() - start
+        
+        start = time.perf_counter()
+        full_probs[rows] = cascade.full.predict_arrays(batch.images)
+        full_seconds += time.perf_counter() - start
+        decoded += len(batch.images)
+    
+    decoded = max(decoded, 1)
+    return small_probs, full_probs, 1000 * small_seconds / decoded, 1000 * full_seconds / decoded
+
+
+def sweep(small_probs, full_probs, labels, thresholds, small_ms, full_ms):
+    """
+    Escalation rate, estimated cost and accuracy of the cascade at each threshold
+    
+    Cost is the small model's forward time per image plus the full model's
+    for the escalated fraction, both measured at full batches.
+    """
+    readable = ~np.isnan(full_probs).any(axis=1)
+    small_probs, full_probs, labels = small_probs[readable], full_probs[readable], np.asarray(labels)[readable]
+    full_predicted = full_probs.argmax(axis=1)
+    small_confidence = small_probs.max(axis=1)
+    
+    rows = []
+    for threshold in thresholds:
+        escalated = small_confidence < threshold
+        predicted = np.where(escalated, full_predicted, small_probs.argmax(axis=1))
+        rows.append({
+            'threshold': threshold,
+            'escalated_fraction': round(float(np.mean(escalated)), 4),
+            'ms_per_image': round(small_ms + float(np.mean(escalated)) * full_ms, 3),
+            'accuracy': round(float(np.mean(predicted == labels)), 4),
+            'agreement_with_full': round(float(np.mean(predicted == full_predicted)), 4)
+        })
+    full_only = {
+        'accuracy': round(float(np.mean(full_predicted == labels)), 4),
+        'ms_per_image': round(full_ms, 3)
+    }
+    return rows, full_only
+
+
+def main(args):
+    """Main evaluation function"""
+    print("="*70)
+    print("POLLUTION DETECTION - CASCADE EVALUATION")
+    print("="*70)
+    
+    for path in (args.full_model_path, args.small_model_path, args.val_dir):
+        if not os.path.exists(path):
+            print(f"\nERROR: Not found: {path}")
+            sys.exit(1)
+    thresholds = sorted(float(t) for t in args.thresholds.split(','))
+    
+    full = load_stage(args.full_model_path, (args.img_size, args.img_size) if args.img_size else None)
+    small = load_stage(args.small_model_path,
+                       (args.small_img_size, args.small_img_size) if args.small_img_size else None)
+    cascade = CascadePollutionDetector(small, full, threshold=args.threshold)
+    print(f"\nSmall model: {args.small_model_path} ({small.img_size[0]}x{small.img_size[1]})")
+    print(f"Full model:  {args.full_model_path} ({full.img_size[0]}x{full.img_size[1]})")
+    
+    paths, labels, class_names = list_class_files(args.val_dir)
+    if class_names != full.class_names:
+        print(f"\nERROR: Validation classes {class_names} do not match {full.class_names}")
+        sys.exit(1)
+    
+    print(f"\nRunning both models on {len(paths)} validation images...")
+    small_probs, full_probs, small_ms, full_ms = stage_probabilities(cascade, paths, args.batch_size)
+    rows, full_only = sweep(small_probs, full_probs, labels, thresholds, small_ms, full_ms)
+    print(f"Forward pass: small {small_ms:.2f} ms/image, full {full_ms:.2f} ms/image "
+          f"({full_ms / small_ms:.1f}x)")
+    
+    print("\n" + "-"*70)
+    print(f"{'threshold':>10s}{'escalated':>12s}{'ms/image':>12s}{'speedup':>10s}{'accuracy':>12s}{'agreement':>12s}")
+    print("-"*70)
+    for row in rows:
+        print(f"{row['threshold']:>10.2f}{row['escalated_fraction']:>12.1%}{row['ms_per_image']:>12.2f}"
+              f"{full_ms / row['ms_per_image']:>9.2f}x{row['accuracy']:>12.2%}{row['agreement_with_full']:>12.2%}")
+    print(f"{'full only':>10s}{1:>12.1%}{full_ms:>12.2f}{1:>9.2f}x{full_only['accuracy']:>12.2%}{1:>12.2%}")
+    print("(ms/image = forward passes only, estimated from full-batch timings)")
+    
+    print(f"\nEnd-to-end predict_batch at threshold {args.threshold}...")
+    full_report, full_predicted = evaluate(full, paths, labels, args.batch_size)
+    cascade.reset_stats()
+    cascade_report, cascade_predicted = evaluate(cascade, paths, labels, args.batch_size)
+    # The warm-up batch is counted too; the fraction and cost per image are unaffected
+    cascade_report.update(cascade.summary())
+    agreement = float(np.mean(cascade_predicted == full_predicted))
+    
+    print("\n" + "-"*70)
+    print(f"{'':24s}{'Full':>14s}{'Cascade':>14s}{'Change':>14s}")
+    print("-"*70)
+    before, after = full_report['accuracy'], cascade_report['accuracy']
+    print(f"{'overall accuracy':24s}{before:>14.2%}{after:>14.2%}{after - before:>+14.2%}")
+    before, after = full_report['images_per_sec'], cascade_report['images_per_sec']
+    print(f"{'images/sec end-to-end':24s}{before:>14.2f}{after:>14.2f}{after / before:>13.2f}x")
+    print(f"\nEscalated to the full model: {cascade_report['escalated_fraction']:.1%} "
+          f"({cascade_report['ms_per_image']:.2f} ms/image in forward passes)")
+    print(f"Top-1 agreement with the full model: {agreement:.2%}")
+    
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({
+                'created': datetime.now().isoformat(),
+                'full_model_path': args.full_model_path,
+                'small_model_path': args.small_model_path,
+                'num_images': len(paths),
+                'small_ms_per_image': round(small_ms, 3),
+                'full_ms_per_image': round(full_ms, 3),
+                'sweep': rows,
+                'full_only': full_only,
+                'threshold': args.threshold,
+                'top1_agreement': round(agreement, 4),
+                'full': full_report,
+                'cascade': cascade_report
+            }, f, indent=2)
+        print(f"Report saved to: {args.report}")
+    
+    print("\n" + "="*70)
+    print("EVALUATION COMPLETE!")
+    print("="*70)
+    print(f"\nUse it with: python predict_pollution.py --model_path {args.full_model_path} "
+          f"--cascade_model {args.small_model_path} --cascade_threshold {args.threshold} --input ./images/\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Evaluate a small-then-full pollution detection cascade',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Train a narrow 96x96 first stage
+  python train_pollution_detector.py --train_dir data/train --val_dir data/validation \\
+      --no_pretrained --width 0.25 --img_size 96
+  
+  # Sweep thresholds against the full model
+  python evaluate_cascade.py --small_model_path pollution_detector_best.h5 \\
+      --full_model_path pollution_detector_model.h5 --val_dir data/validation
+  
+  # Finer sweep, save the comparison
+  python evaluate_cascade.py --small_model_path small.h5 --val_dir data/validation \\
+      --thresholds 0.6,0.7,0.8,0.85,0.9,0.95 --threshold 0.85 --report cascade_report.json
+        """
+    )
+    
+    parser.add_argument('--full_model_path', type=str, default='pollution_detector_model.h5',
+                        help='Full model, Keras or .tflite (default: pollution_detector_model.h5)')
+    parser.add_argument('--small_model_path', type=str, required=True,
+                        help='First-stage model, Keras or .tflite')
+    parser.add_argument('--val_dir', type=str, required=True,
+                        help='Validation directory with one subfolder per class')
+    parser.add_argument('--img_size', type=int, default=None,
+                        help='Required full model input size for .tflite files (default: read from the model)')
+    parser.add_argument('--small_img_size', type=int, default=None,
+                        help='Required small model input size for .tflite files (default: read from the model)')
+    parser.add_argument('--thresholds', type=str, default='0.5,0.6,0.7,0.8,0.9,0.95',
+                        help='Comma-separated thresholds to sweep (default: 0.5,0.6,0.7,0.8,0.9,0.95)')
+    parser.add_argument('--threshold', type=float, default=0.8,
+                        help='Threshold for the end-to-end comparison (default: 0.8)')
+    parser.add_argument('--batch_size', type=int, default=32,
+                        help='Batch size (default: 32)')
+    parser.add_argument('--report', type=str, default=None,
+                        help='Save the comparison to a JSON file')
+    
+    args = parser.parse_args()
+    main(args)
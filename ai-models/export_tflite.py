@@ -0,0 +1,159 @@
+"""
+Export Script for INT8 TFLite Pollution Detection Model
+Quantizes a trained Keras model and compares it with the original on the validation set
+"""
+
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+import numpy as np
+from pollution_detector import PollutionDetector
+from tflite_detector import export_tflite, TFLitePollutionDetector
+from image_pipeline import list_class_files
+from benchmark_pollution import time_call
+
+
+def evaluate(detector, image_paths, labels, batch_size=32):
+    """
+    Accuracy per class and end-to-end throughput of predict_batch
+    
+    Returns:
+        (report dict, predicted class index per image, -1 for unreadable files)
+    """
+    # Warm up so graph tracing / tensor allocation isn't timed
+    detector.predict_batch(image_paths[:batch_size], batch_size=batch_size)
+    start = datetime.now()
+    results = detector.predict_batch(image_paths, batch_size=batch_size)
+    seconds = (datetime.now() - start).total_seconds()
+    
+    predicted = np.array([
+        detector.class_names.index(r['predicted_class']) if 'predicted_class' in r else -1
+        for r in results
+    ])
+    labels = np.asarray(labels)
+    per_class = {
+        class_name: round(float(np.mean(predicted[labels == c] == c)), 4)
+        for c, class_name in enumerate(detector.class_names) if np.any(labels == c)
+    }
+    report = {
+        'accuracy': round(float(np.mean(predicted == labels)), 4),
+        'per_class_accuracy': per_class,
+        'images_per_sec': round(len(image_paths) / seconds, 2)
+    }
+    return report, predicted
+
+
+def forward_throughput(detector, images, repeats=3):
+    """images/sec of the forward pass alone on pre-decoded images"""
+    detector.predict_arrays(images)
+    return round(len(images) / time_call(lambda: detector.predict_arrays(images), repeats), 2)
+
+
+def main(args):
+    """Main export function"""
+    print("="*70)
+    print("POLLUTION DETECTION - INT8 TFLITE EXPORT")
+    print("="*70)
+    
+    for path in (args.model_path, args.val_dir):
+        if not os.path.exists(path):
+            print(f"\nERROR: Not found: {path}")
+            sys.exit(1)
+    
+    img_size = (args.img_size, args.img_size)
+    keras_detector = PollutionDetector(img_size=img_size)
+    keras_detector.load_model(args.model_path)
+    
+    print(f"\nCalibrating on up to {args.num_calibration} images from {args.val_dir}...")
+    export_tflite(keras_detector, args.val_dir, args.output_path, args.num_calibration)
+    
+    tflite_detector = TFLitePollutionDetector(img_size=keras_detector.img_size, num_threads=args.num_threads)
+    tflite_detector.load_model(args.output_path)
+    tflite_detector.get_model_summary()
+    
+    paths, labels, class_names = list_class_files(args.val_dir)
+    if class_names != keras_detector.class_names:
+        print(f"\nERROR: Validation classes {class_names} do not match {keras_detector.class_names}")
+        sys.exit(1)
+    
+    print(f"\nEvaluating both models on {len(paths)} validation images...")
+    keras_report, keras_predicted = evaluate(keras_detector, paths, labels, args.batch_size)
+    tflite_report, tflite_predicted = evaluate(tflite_detector, paths, labels, args.batch_size)
+    
+    sample = np.stack([keras_detector.load_image(p) for p in paths[:args.batch_size]])
+    keras_report['forward_images_per_sec'] = forward_throughput(keras_detector, sample)
+    tflite_report['forward_images_per_sec'] = forward_throughput(tflite_detector, sample)
+    keras_report['size_mb'] = round(os.path.getsize(args.model_path) / 1e6, 2)
+    tflite_report['size_mb'] = round(os.path.getsize(args.output_path) / 1e6, 2)
+    
+    print("\n" + "-"*70)
+    print(f"{'':24s}{'Keras':>14s}{'INT8 TFLite':>14s}{'Change':>14s}")
+    print("-"*70)
+    for class_name in keras_report['per_class_accuracy']:
+        before = keras_report['per_class_accuracy'][class_name]
+        after = tflite_report['per_class_accuracy'][class_name]
+        print(f"{class_name:24s}{before:>14.2%}{after:>14.2%}{after - before:>+14.2%}")
+    before, after = keras_report['accuracy'], tflite_report['accuracy']
+    print(f"{'overall accuracy':24s}{before:>14.2%}{after:>14.2%}{after - before:>+14.2%}")
+    for key, label in [('size_mb', 'model size (MB)'),
+                       ('images_per_sec', 'images/sec end-to-end'),
+                       ('forward_images_per_sec', 'images/sec forward')]:
+        before, after = keras_report[key], tflite_report[key]
+        print(f"{label:24s}{before:>14.2f}{after:>14.2f}{after / before:>13.2f}x")
+    agreement = float(np.mean(keras_predicted == tflite_predicted))
+    print(f"\nTop-1 agreement with the Keras model: {agreement:.2%}")
+    
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({
+                'created': datetime.now().isoformat(),
+                'model_path': args.model_path,
+                'tflite_path': args.output_path,
+                'num_images': len(paths),
+                'top1_agreement': round(agreement, 4),
+                'keras': keras_report,
+                'tflite_int8': tflite_report
+            }, f, indent=2)
+        print(f"Report saved to: {args.report}")
+    
+    print("\n" + "="*70)
+    print("EXPORT COMPLETE!")
+    print("="*70)
+    print(f"\nUse it with: python predict_pollution.py --model_path {args.output_path} --input ./images/\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Export an INT8 TFLite pollution detection model',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Quantize and compare on the validation set
+  python export_tflite.py --model_path pollution_detector_model.h5 --val_dir data/validation
+  
+  # More calibration images, save the comparison
+  python export_tflite.py --model_path model.h5 --val_dir data/validation --num_calibration 500 --report tflite_report.json
+        """
+    )
+    
+    parser.add_argument('--model_path', type=str, default='pollution_detector_model.h5',
+                        help='Trained Keras model (default: pollution_detector_model.h5)')
+    parser.add_argument('--val_dir', type=str, required=True,
+                        help='Validation directory with one subfolder per class')
+    parser.add_argument('--output_path', type=str, default='pollution_detector_int8.tflite',
+                        help='Output .tflite file (default: pollution_detector_int8.tflite)')
+    parser.add_argument('--num_calibration', type=int, default=200,
+                        help='Validation images used to calibrate activation ranges (default: 200)')
+    parser.add_argument('--img_size', type=int, default=224,
+                        help='Model input size (default: 224)')
+    parser.add_argument('--batch_size', type=int, default=32,
+                        help='Batch size for the comparison (default: 32)')
+    parser.add_argument('--num_threads', type=int, default=None,
+                        help='TFLite interpreter threads (default: one per CPU)')
+    parser.add_argument('--report', type=str, default=None,
+                        help='Save the comparison to a JSON file')
+    
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,100 @@
+"""
+Cached Backbone Features
+Memory-mapped store of frozen MobileNetV2 features for fast head-only training
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+from tensorflow import keras
+
+
+class FeatureStore:
+    """
+    Pooled backbone features and labels for one image directory
+    
+    Files in the store directory:
+        features.npy  float32 (rows, feature_dim), opened as a memmap
+        labels.npy    int16 class index per row
+        meta.json     settings the features were built with; written last,
+                      so an interrupted extraction is never reused
+    """
+    
+    def __init__(self, directory):
+        self.directory = directory
+        self.features_path = os.path.join(directory, 'features.npy')
+        self.labels_path = os.path.join(directory, 'labels.npy')
+        self.meta_path = os.path.join(directory, 'meta.json')
+    
+    @staticmethod
+    def fingerprint(file_paths):
+        """Hash of file names, sizes and mtimes, to detect a changed dataset"""
+        digest = hashlib.sha256()
+        for path in file_paths:
+            stat = os.stat(path)
+            digest.update(f"{path}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+        return digest.hexdigest()
+    
+    def matches(self, meta):
+        """True if a complete store built with the same settings exists"""
+        if not os.path.exists(self.meta_path):
+            return False
+        with open(self.meta_path) as f:
+            return json.load(f) == meta
+    
+    def create(self, rows, feature_dim):
+        """Allocate the feature file and return it as a writable memmap"""
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.meta_path):
+            os.remove(self.meta_path)
+        return np.lib.format.open_memmap(
+            self.features_path, mode='w+', dtype=np.float32, shape=(rows, feature_dim)
+        )
+    
+    def finalize(self, features, labels, meta):
+        features.flush()
+        np.save(self.labels_path, np.asarray(labels, dtype=np.int16))
+        with open(self.meta_path, 'w') as f:
+            json.dump(meta, f, indent=2)
+    
+    def load(self):
+        """
+        Returns:
+            (features memmap, labels array)
+        """
+        if not os.path.exists(self.meta_path):
+            raise ValueError(f"No complete feature store in {self.directory}")
+        return np.load(self.features_path, mmap_mode='r'), np.load(self.labels_path)
+
+
+class FeatureSequence(keras.utils.Sequence):
+    """
+    Batches of cached features read straight from the memmap
+    
+    Only the current batch is held in memory, so stores larger than RAM work.
+    """
+    
+    def __init__(self, store, num_classes, batch_size=128, shuffle=True, seed=None):
+        super().__init__()
+        self.features, self.labels = store.load()
+        self.num_classes = num_classes
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.rng = np.random.default_rng(seed)
+        self.order = np.arange(len(self.labels))
+        self.on_epoch_end()
+    
+    def __len__(self):
+        return -(-len(self.order) // self.batch_size)
+    
+    def __getitem__(self, idx):
+        # Sorted indices keep memmap reads mostly sequential
+        rows = np.sort(self.order[idx * self.batch_size:(idx + 1) * self.batch_size])
+        x = np.asarray(self.features[rows])
+        y = keras.utils.to_categorical(self.labels[rows], self.num_classes)
+        return x, y
+    
+    def on_epoch_end(self):
+        if self.shuffle:
+            self.rng.shuffle(self.order)
@@ -0,0 +1,103 @@
+"""
+Streaming Image Discovery
+Lazily walks nested image archives so inference can start before listing ends
+"""
+
+import os
+import re
+from fnmatch import fnmatch
+from datetime import datetime, timedelta
+from image_pipeline import IMAGE_EXTENSIONS
+
+
+def parse_modified_since(value):
+    """
+    Parse a modified-since filter to a POSIX timestamp
+    
+    Accepts an ISO date or datetime ('2024-05-01', '2024-05-01T08:00') or an
+    age relative to now ('90m', '12h', '7d', '2w').
+    """
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([mhdw])', value.strip())
+    if match:
+        units = {'m': 'minutes', 'h': 'hours', 'd': 'days', 'w': 'weeks'}
+        delta = timedelta(**{units[match.group(2)]: float(match.group(1))})
+        return (datetime.now() - delta).timestamp()
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise ValueError(f"Invalid modified-since value '{value}' (use e.g. 2024-05-01 or 7d)")
+
+
+def _matches(rel_path, name, patterns):
+    return any(fnmatch(rel_path, pattern) or fnmatch(name, pattern) for pattern in patterns)
+
+
+def discover_images(root, include=None, exclude=None, modified_since=None, recursive=True,
+                    extensions=IMAGE_EXTENSIONS, on_error=None):
+    """
+    Yield image file paths under root as they are found
+    
+    Directories are walked depth-first with os.scandir, one directory entry
+    at a time, so the first paths are available immediately and memory does
+    not grow with the number of files. Order follows the file system, not
+    the alphabet. Symlinked directories are not followed.
+    
+    Patterns are shell-style (fnmatch) and match either the path relative to
+    root (with '/' separators) or the bare file/directory name.
+    
+    Args:
+        root: Directory to walk (a file path is yielded as-is if it passes the filters)
+        include: Patterns a file must match at least one of (None = all images)
+        exclude: Patterns of files to skip; a matching directory is not entered
+        modified_since: POSIX timestamp; older files are skipped
+        recursive: Descend into subdirectories
+        extensions: Lower-case file extensions treated as images
+        on_error: Called with each OSError from an unreadable directory
+            (default: skip it silently)
+    
+    Yields:
+        File paths
+    """
+    include = list(include or [])
+    exclude = list(exclude or [])
+    
+    def accept(name, rel_path, stat):
+        if not name.lower().endswith(extensions):
+            return False
+        if include and not _matches(rel_path, name, include):
+            return False
+        if exclude and _matches(rel_path, name, exclude):
+            return False
+        # Only stat when filtering by time; the walk itself needs no stat calls
+        return modified_since is None or stat().st_mtime >= modified_since
+    
+    if os.path.isfile(root):
+        name = os.path.basename(root)
+        if accept(name, name, lambda: os.stat(root)):
+            yield root
+        return
+    
+    # Stack of (directory path, path relative to root)
+    stack = [(root, '')]
+    while stack:
+        directory, rel_dir = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive and not (exclude and _matches(rel_path, entry.name, exclude)):
+                                subdirs.append((entry.path, rel_path))
+                        elif entry.is_file() and accept(entry.name, rel_path, entry.stat):
+                            yield entry.path
+                    except OSError as e:
+                        # Entry vanished or became unreadable mid-walk
+                        if on_error is not None:
+                            on_error(e)
+        except OSError as e:
+            if on_error is not None:
+                on_error(e)
+        # Reversed, so subdirectories are visited in listing order
+        stack.extend(reversed(subdirs))
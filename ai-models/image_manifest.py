@@ -0,0 +1,321 @@
+"""
+Indexed Image Dataset Manifest
+SQLite record of every image's size, mtime, content hash, class, dimensions and decode validity
+"""
+
+import io
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, UnidentifiedImageError
+from image_discovery import discover_images
+from image_pipeline import IMAGE_EXTENSIONS
+
+
+MANIFEST_PATH = 'pollution_manifest.db'
+SPLIT_NAMES = ('train', 'validation', 'val', 'test')
+
+
+def inspect_image(path, decode=True):
+    """
+    Hash and check one image file, reading it once
+    
+    Args:
+        path: Image file
+        decode: Decode the pixel data, not just the header. JPEGs are decoded
+            at 1/8 scale, which still parses every block, so truncated or
+            corrupt files are caught at a fraction of the cost.
+    
+    Returns:
+        dict with sha256, width, height, format, valid and error
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    result = {
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'width': None, 'height': None, 'format': None, 'valid': True, 'error': None
+    }
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            result['width'], result['height'] = img.size
+            result['format'] = img.format
+            if decode:
+                img.draft('RGB', (1, 1))
+                img.load()
+    except UnidentifiedImageError:
+        result['valid'] = False
+        result['error'] = "UnidentifiedImageError: not a recognised image format"
+    except Exception as e:
+        result['valid'] = False
+        result['error'] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def path_labels(rel_path):
+    """
+    (split, class) of a path relative to the scanned root
+    
+    'train/air_pollution/x.jpg' -> ('train', 'air_pollution'),
+    'air_pollution/x.jpg' -> (None, 'air_pollution'), 'x.jpg' -> (None, None)
+    """
+    parts = rel_path.split(os.sep)
+    if len(parts) >= 3 and parts[0] in SPLIT_NAMES:
+        return parts[0], parts[1]
+    if len(parts) >= 2:
+        return None, parts[0]
+    return None, None
+
+
+class ImageManifest:
+    """
+    SQLite-backed index of an image dataset
+    
+    scan() walks a directory once, hashing and decoding new or modified files
+    on a thread pool, and records path, size, mtime, SHA-256, split, class,
+    dimensions and whether the image decodes. Later scans only stat files:
+    those with unchanged size and mtime are skipped, and rows of deleted
+    files are dropped. Queries (class counts, corrupt files, duplicates, the
+    valid files of a class-folder directory) then run against the index
+    instead of the file system.
+    
+    The hashes are the same SHA-256 of the file bytes that PredictionCache
+    keys on. Like PredictionCache, the database runs in WAL mode with one
+    connection per thread and process.
+    """
+    
+    def __init__(self, path=MANIFEST_PATH, timeout=30.0):
+        """
+        Args:
+            path: SQLite database file (created if missing)
+            timeout: Seconds to wait on a lock held by another process
+        """
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS images ("
+                "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime REAL NOT NULL, "
+                "sha256 TEXT NOT NULL, split TEXT, class TEXT, width INTEGER, height INTEGER, "
+                "format TEXT, valid INTEGER NOT NULL, error TEXT, scanned REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sha256 ON images (sha256)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_class ON images (class)")
+    
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        # A forked child must not reuse its parent's connection
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+    
+    def __getstate__(self):
+        return {'path': self.path, 'timeout': self.timeout}
+    
+    def __setstate__(self, state):
+        self.__init__(**state)
+    
+    @staticmethod
+    def _prefix_range(directory):
+        """Bounds of the paths under directory, for a primary-key range query"""
+        prefix = os.path.join(os.path.abspath(directory), '')
+        # os.sep + 1 sorts after every path continuing the prefix
+        return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+    
+    def _rows_under(self, directory, columns, where='', params=()):
+        low, high = self._prefix_range(directory)
+        return self._connect().execute(
+            f"SELECT {columns} FROM images WHERE path >= ? AND path < ?{where} ORDER BY path",
+            (low, high, *params)
+        )
+    
+    def scan(self, root, workers=None, decode=True, commit_every=500, on_error=None):
+        """
+        Index the images under root, only inspecting new or modified files
+        
+        Args:
+            root: Dataset directory (e.g. pollution_dataset/ with train/ and validation/)
+            workers: Hash/decode threads (None = one per CPU)
+            decode: Check that pixel data decodes, not only the header
+            commit_every: Rows per write transaction
+            on_error: Called with each OSError from an unreadable path
+        
+        Returns:
+            dict with seen, unchanged, added, updated, removed and corrupt counts
+        """
+        root = os.path.abspath(root)
+        known = {path: (size, mtime) for path, size, mtime in self._rows_under(root, 'path, size, mtime')}
+        stats = {'seen': 0, 'unchanged': 0, 'added': 0, 'updated': 0, 'removed': 0, 'corrupt': 0}
+        rows = []
+        conn = self._connect()
+        
+        def write(batch):
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO images (path, size, mtime, sha256, split, class, width, height, "
+                    "format, valid, error, scanned) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch
+                )
+        
+        def finish(future, path, size, mtime):
+            try:
+                info = future.result()
+            except OSError as e:
+                # Deleted or unreadable between the walk and the read
+                if on_error is not None:
+                    on_error(e)
+                return
+            split, class_name = path_labels(os.path.relpath(path, root))
+            stats['updated' if path in known else 'added'] += 1
+            stats['corrupt'] += not info['valid']
+            rows.append((
+                path, size, mtime, info['sha256'], split, class_name, info['width'], info['height'],
+                info['format'], int(info['valid']), info['error'], time.time()
+            ))
+            if len(rows) >= commit_every:
+                write(rows)
+                rows.clear()
+        
+        seen = set()
+        # (future, path, size, mtime) in submission order
+        pending = deque()
+        workers = workers or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for path in discover_images(root, extensions=IMAGE_EXTENSIONS, on_error=on_error):
+                try:
+                    st = os.stat(path)
+                except OSError as e:
+                    if on_error is not None:
+                        on_error(e)
+                    continue
+                seen.add(path)
+                stats['seen'] += 1
+                if known.get(path) == (st.st_size, st.st_mtime):
+                    stats['unchanged'] += 1
+                    continue
+                pending.append((pool.submit(inspect_image, path, decode), path, st.st_size, st.st_mtime))
+                # Bounded in flight, so memory does not grow with the dataset
+                while len(pending) > 4 * workers:
+                    finish(*pending.popleft())
+            while pending:
+                finish(*pending.popleft())
+        write(rows)
+        
+        removed = [(path,) for path in known if path not in seen]
+        if removed:
+            with conn:
+                conn.executemany("DELETE FROM images WHERE path = ?", removed)
+        stats['removed'] = len(removed)
+        return stats
+    
+    def summary(self, directory=None):
+        """
+        Counts of what is indexed (under directory, if given)
+        
+        Returns:
+            dict with images, valid, corrupt, total_bytes, classes
+            ({split or 'unsplit': {class: valid images}}), duplicate_groups,
+            and min/max width and height of the valid images
+        """
+        low, high = self._prefix_range(directory) if directory else ('', '\U0010ffff')
+        conn = self._connect()
+        where = "path >= ? AND path < ?"
+        images, valid, total_bytes, min_w, max_w, min_h, max_h = conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(valid), 0), COALESCE(SUM(size), 0), "
+            f"MIN(CASE WHEN valid THEN width END), MAX(CASE WHEN valid THEN width END), "
+            f"MIN(CASE WHEN valid THEN height END), MAX(CASE WHEN valid THEN height END) "
+            f"FROM images WHERE {where}", (low, high)
+        ).fetchone()
+        classes = {}
+        for split, class_name, count in conn.execute(
+            f"SELECT split, class, COUNT(*) FROM images WHERE {where} AND valid "
+            f"GROUP BY split, class ORDER BY split, class", (low, high)
+        ):
+            classes.setdefault(split or 'unsplit', {})[class_name] = count
+        duplicate_groups = conn.execute(
+            f"SELECT COUNT(*) FROM (SELECT sha256 FROM images WHERE {where} "
+            f"GROUP BY sha256 HAVING COUNT(*) > 1)", (low, high)
+        ).fetchone()[0]
+        return {
+            'images': images,
+            'valid': valid,
+            'corrupt': images - valid,
+            'total_bytes': total_bytes,
+            'classes': classes,
+            'duplicate_groups': duplicate_groups,
+            'width_range': (min_w, max_w),
+            'height_range': (min_h, max_h)
+        }
+    
+    def corrupt(self, directory):
+        """(path, error) of every image under directory that failed to decode"""
+        return list(self._rows_under(directory, 'path, error', ' AND NOT valid'))
+    
+    def duplicates(self, directory):
+        """Groups (lists of paths) of byte-identical images under directory"""
+        groups = {}
+        low, high = self._prefix_range(directory)
+        for sha256, path in self._connect().execute(
+            "SELECT sha256, path FROM images WHERE sha256 IN ("
+            "SELECT sha256 FROM images WHERE path >= ? AND path < ? GROUP BY sha256 HAVING COUNT(*) > 1) "
+            "AND path >= ? AND path < ? ORDER BY sha256, path", (low, high, low, high)
+        ):
+            groups.setdefault(sha256, []).append(path)
+        return list(groups.values())
+    
+    def image_paths(self, directory, recursive=True, modified_since=None):
+        """
+        Valid images under directory, in path order
+        
+        Paths start with directory as given, like those of discover_images.
+        
+        Raises:
+            ValueError: if nothing under directory has been scanned
+        """
+        where, params = ' AND valid', ()
+        if modified_since is not None:
+            where, params = where + ' AND mtime >= ?', (modified_since,)
+        top = os.path.abspath(directory)
+        paths = [
+            os.path.join(directory, path[len(top) + 1:])
+            for (path,) in self._rows_under(directory, 'path', where, params)
+            if recursive or os.path.dirname(path) == top
+        ]
+        if not paths and not self.covers(directory):
+            raise ValueError(f"{directory} is not in manifest {self.path}; run prepare_data.py --task manifest")
+        return paths
+    
+    def class_files(self, directory):
+        """
+        Valid images of a class-folder directory, like list_class_files
+        
+        Files directly inside each class folder are included; corrupt ones
+        are left out.
+        
+        Returns:
+            (paths, labels, class_names) with classes in alphabetical order
+        """
+        top = os.path.abspath(directory)
+        per_class = {}
+        for (path,) in self._rows_under(directory, 'path', ' AND valid'):
+            parent = os.path.dirname(path)
+            if os.path.dirname(parent) == top:
+                per_class.setdefault(os.path.basename(parent), []).append(os.path.join(directory, path[len(top) + 1:]))
+        if not per_class and not self.covers(directory):
+            raise ValueError(f"{directory} is not in manifest {self.path}; run prepare_data.py --task manifest")
+        class_names = sorted(per_class)
+        paths = [path for class_name in class_names for path in per_class[class_name]]
+        labels = [label for label, class_name in enumerate(class_names) for _ in per_class[class_name]]
+        return paths, labels, class_names
+    
+    def covers(self, directory):
+        """Whether any file under directory has been scanned"""
+        return self._rows_under(directory, '1').fetchone() is not None
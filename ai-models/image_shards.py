@@ -0,0 +1,182 @@
+"""
+Pre-Decoded Image Shards
+Training images decoded and resized once into memory-mapped uint8 shards
+"""
+
+import os
+import json
+import numpy as np
+from image_pipeline import ImageBatchPipeline, list_class_files
+
+
+MANIFEST = 'manifest.json'
+
+
+class ImageShardWriter:
+    """
+    Converts a class-folder image directory into uint8 shards
+    
+    Layout of output_dir:
+        manifest.json              img_size, class names and the shard list
+        shard_00000.bin            raw uint8 array (count, height, width, 3)
+        shard_00000_labels.npy     int16 class index per image
+        shard_00000_sources.txt    source path (relative to the image dir) per image
+    
+    Shards are never modified after they are written, so appends are safe
+    while training reads the existing ones. Each run converts only images
+    that no committed shard contains yet. The manifest is replaced atomically
+    after each shard, so an interrupted run loses at most one partial shard.
+    """
+    
+    def __init__(self, output_dir, img_size=(224, 224), shard_size=1024, num_workers=None):
+        """
+        Args:
+            output_dir: Shard directory (created if missing)
+            img_size: (width, height) images are resized to
+            shard_size: Images per shard
+            num_workers: Decode workers (None = one per CPU)
+        """
+        self.output_dir = output_dir
+        self.img_size = tuple(img_size)
+        self.shard_size = shard_size
+        self.num_workers = num_workers
+    
+    def _load_manifest(self, class_names):
+        path = os.path.join(self.output_dir, MANIFEST)
+        if not os.path.exists(path):
+            return {'img_size': list(self.img_size), 'class_names': class_names, 'shards': []}
+        
+        with open(path) as f:
+            manifest = json.load(f)
+        if tuple(manifest['img_size']) != self.img_size:
+            raise ValueError(f"Shards in {self.output_dir} are {manifest['img_size']}, not {list(self.img_size)}")
+        unknown = set(class_names) - set(manifest['class_names'])
+        if unknown:
+            raise ValueError(f"Classes not in existing shards: {', '.join(sorted(unknown))}")
+        return manifest
+    
+    def _converted_sources(self, manifest):
+        done = set()
+        for shard in manifest['shards']:
+            with open(os.path.join(self.output_dir, shard['sources'])) as f:
+                done.update(line.rstrip('\n') for line in f)
+        return done
+    
+    def _write_manifest(self, manifest):
+        path = os.path.join(self.output_dir, MANIFEST)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(path + '.tmp', path)
+    
+    def convert(self, image_dir):
+        """
+        Convert every image of image_dir not already in the shards
+        
+        Returns:
+            dict with counts of added, skipped (already converted) and failed images
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        paths, labels, class_names = list_class_files(image_dir)
+        manifest = self._load_manifest(class_names)
+        # Map this directory's label indices onto the manifest's class order
+        label_map = [manifest['class_names'].index(name) for name in class_names]
+        
+        done = self._converted_sources(manifest)
+        sources = [os.path.relpath(path, image_dir) for path in paths]
+        todo = [i for i, source in enumerate(sources) if source not in done]
+        
+        pipeline = ImageBatchPipeline(
+            img_size=self.img_size,
+            batch_size=64,
+            num_workers=self.num_workers
+        )
+        
+        stats = {'added': 0, 'skipped': len(paths) - len(todo), 'failed': 0}
+        pending_images, pending_rows = [], []
+        rows = iter(todo)
+        for batch in pipeline.batches(paths[i] for i in todo):
+            batch_rows = [next(rows) for _ in batch.paths]
+            stats['failed'] += len(batch.errors)
+            for position, image in zip(batch.positions, batch.images):
+                pending_images.append(image)
+                pending_rows.append(batch_rows[position])
+                if len(pending_images) == self.shard_size:
+                    self._write_shard(manifest, pending_images, pending_rows, labels, label_map, sources)
+                    stats['added'] += len(pending_images)
+                    pending_images, pending_rows = [], []
+        
+        if pending_images:
+            self._write_shard(manifest, pending_images, pending_rows, labels, label_map, sources)
+            stats['added'] += len(pending_images)
+        # Also records the settings of a directory with no new images
+        self._write_manifest(manifest)
+        return stats
+    
+    def _write_shard(self, manifest, images, rows, labels, label_map, sources):
+        name = f"shard_{len(manifest['shards']):05d}"
+        shard = {
+            'images': f"{name}.bin",
+            'labels': f"{name}_labels.npy",
+            'sources': f"{name}_sources.txt",
+            'count': len(images)
+        }
+        
+        with open(os.path.join(self.output_dir, shard['images']), 'wb') as f:
+            for image in images:
+                f.write(np.ascontiguousarray(image, dtype=np.uint8).tobytes())
+        np.save(os.path.join(self.output_dir, shard['labels']),
+                np.array([label_map[labels[row]] for row in rows], dtype=np.int16))
+        with open(os.path.join(self.output_dir, shard['sources']), 'w') as f:
+            f.writelines(sources[row] + '\n' for row in rows)
+        
+        # The shard only counts once the manifest lists it
+        manifest['shards'].append(shard)
+        self._write_manifest(manifest)
+
+
+class ImageShardDataset:
+    """
+    Read-only view over all shards of a shard directory
+    
+    Images stay on disk as memmaps; gather() copies just the requested rows.
+    """
+    
+    def __init__(self, shard_dir):
+        with open(os.path.join(shard_dir, MANIFEST)) as f:
+            manifest = json.load(f)
+        self.shard_dir = shard_dir
+        self.img_size = tuple(manifest['img_size'])
+        self.class_names = manifest['class_names']
+        width, height = self.img_size
+        
+        self.images = [
+            np.memmap(os.path.join(shard_dir, shard['images']), dtype=np.uint8, mode='r',
+                      shape=(shard['count'], height, width, 3))
+            for shard in manifest['shards']
+        ]
+        labels = [np.load(os.path.join(shard_dir, shard['labels'])) for shard in manifest['shards']]
+        self.labels = np.concatenate(labels) if labels else np.empty(0, dtype=np.int16)
+        self.offsets = np.cumsum([0] + [shard['count'] for shard in manifest['shards']])
+    
+    @staticmethod
+    def is_shard_dir(path):
+        return os.path.isfile(os.path.join(path, MANIFEST))
+    
+    def __len__(self):
+        return int(self.offsets[-1])
+    
+    def gather(self, indices):
+        """
+        Images and labels for global row indices
+        
+        Returns:
+            (uint8 array (n, height, width, 3), int16 labels), in the order of indices
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        width, height = self.img_size
+        out = np.empty((len(indices), height, width, 3), dtype=np.uint8)
+        shard_ids = np.searchsorted(self.offsets, indices, side='right') - 1
+        for shard_id in np.unique(shard_ids):
+            mask = shard_ids == shard_id
+            out[mask] = self.images[shard_id][indices[mask] - self.offsets[shard_id]]
+        return out, self.labels[indices]
@@ -0,0 +1,117 @@
+"""
+Hardware Inference Profiles
+Tuned batch sizes and TensorFlow thread settings, loaded by the predictors at startup
+"""
+
+import os
+import json
+import platform
+from datetime import datetime
+
+
+PROFILE_PATH = 'inference_profile.json'
+
+
+def hardware_signature():
+    """
+    Identify the machine a profile was tuned on
+    
+    Thread and batch settings only carry over between machines with the same
+    CPU model and core count (and TensorFlow build).
+    """
+    import tensorflow as tf
+    cpu_model = platform.processor()
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    cpu_model = line.split(':', 1)[1].strip()
+                    break
+    except OSError:
+        pass
+    return {
+        'cpu_model': cpu_model,
+        'cpu_count': os.cpu_count(),
+        'machine': platform.machine(),
+        'tensorflow': tf.__version__
+    }
+
+
+def read_profile(path=PROFILE_PATH):
+    """Whole profile file, or None if it is missing or unreadable"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def write_profile(sections, path=PROFILE_PATH, p99_limit_ms=None):
+    """
+    Save tuned sections, keeping other sections tuned earlier on this machine
+    
+    Args:
+        sections: dict mapping predictor name ('pollution_detector',
+            'sensor_predictor') to its tuned settings
+        path: Profile file
+        p99_limit_ms: Latency limit the settings were chosen under
+    """
+    signature = hardware_signature()
+    profile = read_profile(path)
+    if profile is None or profile.get('hardware') != signature:
+        profile = {'hardware': signature}
+    profile['created'] = datetime.now().isoformat()
+    if p99_limit_ms is not None:
+        profile['p99_limit_ms'] = p99_limit_ms
+    profile.update(sections)
+    
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(profile, f, indent=2)
+    os.replace(tmp_path, path)
+    return profile
+
+
+def apply_thread_settings(intra_op_threads, inter_op_threads):
+    """
+    Set TensorFlow's thread pools (0 keeps TensorFlow's default)
+    
+    Returns:
+        False if TensorFlow already started with different settings
+    """
+    import tensorflow as tf
+    try:
+        if intra_op_threads:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+        if inter_op_threads:
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+    except RuntimeError:
+        # Thread pools are fixed once the first op has run
+        return False
+    return True
+
+
+def load_inference_profile(section, path=PROFILE_PATH):
+    """
+    Settings for one predictor, with its thread settings applied
+    
+    Profiles from a different machine are ignored.
+    
+    Args:
+        section: 'pollution_detector' or 'sensor_predictor'
+        path: Profile file written by tune_inference.py
+    
+    Returns:
+        dict with batch_size, intra_op_threads, inter_op_threads, ... or None
+    """
+    profile = read_profile(path)
+    if profile is None or section not in profile:
+        return None
+    if profile.get('hardware') != hardware_signature():
+        print(f"Warning: {path} was tuned on different hardware; rerun tune_inference.py")
+        return None
+    
+    settings = profile[section]
+    if not apply_thread_settings(settings.get('intra_op_threads'), settings.get('inter_op_threads')):
+        print(f"Warning: TensorFlow already initialized, thread settings from {path} not applied")
+    return settings
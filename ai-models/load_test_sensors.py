@@ -0,0 +1,479 @@
+"""
+Load and Soak Test Harness for the Sensor Forecasting Path
+Replays per-node sensor streams at a fixed rate into SensorPredictor and records
+latency percentiles, throughput, CPU and RSS over time
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import socket
+import argparse
+import platform
+import threading
+import subprocess
+import http.client
+from glob import glob
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+from sensor_predictor import SensorPredictor
+from sensor_data_generator import SyntheticSensorGenerator, SENSOR_PROFILES
+
+
+class ResourceSampler(threading.Thread):
+    """
+    Samples CPU utilisation and RSS of a process from /proc (Linux only)
+    """
+    
+    def __init__(self, pid=None, interval=1.0):
+        super().__init__(daemon=True)
+        self.pid = pid or os.getpid()
+        self.interval = interval
+        self.samples = []
+        self._stop_event = threading.Event()
+        self._clock_ticks = os.sysconf('SC_CLK_TCK')
+        self._page_kb = os.sysconf('SC_PAGE_SIZE') / 1024
+    
+    def _read(self):
+        with open(f'/proc/{self.pid}/stat', 'r') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        cpu_seconds = (int(fields[11]) + int(fields[12])) / self._clock_ticks
+        rss_mb = int(fields[21]) * self._page_kb / 1024
+        return cpu_seconds, rss_mb
+    
+    def run(self):
+        start = time.perf_counter()
+        last_wall, (last_cpu, _) = start, self._read()
+        while not self._stop_event.wait(self.interval):
+            try:
+                cpu, rss_mb = self._read()
+            except (FileNotFoundError, ProcessLookupError):
+                break
+            now = time.perf_counter()
+            self.samples.append({
+                't': round(now - start, 3),
+                'cpu_percent': round(100.0 * (cpu - last_cpu) / (now - last_wall), 1),
+                'rss_mb': round(rss_mb, 1)
+            })
+            last_wall, last_cpu = now, cpu
+    
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class NodeStreams:
+    """Per-node sensor histories replayed in a loop, one reading per request"""
+    
+    def __init__(self, streams, sequence_length):
+        self.streams = streams
+        self.sequence_length = sequence_length
+        self.cursors = [sequence_length] * len(streams)
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def synthetic(cls, n_nodes, feature_names, sequence_length, samples_per_node=5000, seed=42):
+        """Synthetic streams using the generator profile that matches the model features"""
+        generator = SyntheticSensorGenerator(
+            profile=_profile_for(feature_names), n_nodes=n_nodes,
+            n_samples=samples_per_node, seed=seed
+        )
+        streams = [
+            generator.generate_chunk(node, 0)[feature_names].values.astype(np.float32)
+            for node in range(n_nodes)
+        ]
+        return cls(streams, sequence_length)
+    
+    @classmethod
+    def recorded(cls, data_dir, n_nodes, feature_names, sequence_length):
+        """Recorded streams: one CSV per node, reused round-robin if fewer files than nodes"""
+        files = sorted(glob(os.path.join(data_dir, '*.csv')))
+        if not files:
+            raise ValueError(f"No CSV files found in {data_dir}")
+        loaded = [pd.read_csv(f)[feature_names].dropna().values.astype(np.float32) for f in files]
+        streams = [loaded[node % len(loaded)] for node in range(n_nodes)]
+        return cls(streams, sequence_length)
+    
+    def next_window(self, node):
+        """Advance the node by one reading and return its latest history window"""
+        with self._lock:
+            stream = self.streams[node]
+            end = self.cursors[node]
+            self.cursors[node] = end + 1 if end + 1 <= len(stream) else self.sequence_length
+        return stream[end - self.sequence_length:end]
+
+
+def _profile_for(feature_names):
+    for name, sensors in SENSOR_PROFILES.items():
+        if set(feature_names) <= {s['name'] for s in sensors}:
+            return name
+    raise ValueError(f"No synthetic profile covers features {feature_names}; use --data_dir")
+
+
+class InProcessTarget:
+    """Forecasts by calling SensorPredictor directly, one call at a time like the service"""
+    
+    def __init__(self, predictor):
+        self.predictor = predictor
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+    
+    def forecast(self, window):
+        with self._lock:
+            return self.predictor.predict_future(window)
+    
+    def close(self):
+        pass
+
+
+class ServiceTarget:
+    """Forecasts through a long-running local HTTP forecasting service"""
+    
+    def __init__(self, args):
+        self.port = args.port or _free_port()
+        self.process = subprocess.Popen([
+            sys.executable, os.path.abspath(__file__), '--serve',
+            '--port', str(self.port),
+            '--model_path', args.model_path,
+            '--scaler_path', args.scaler_path,
+            '--config_path', args.config_path
+        ])
+        self.pid = self.process.pid
+        self._local = threading.local()
+        self._wait_ready(timeout=120)
+    
+    def _connection(self):
+        if not hasattr(self._local, 'conn'):
+            self._local.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+        return self._local.conn
+    
+    def _wait_ready(self, timeout):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError("Forecast service exited during startup")
+            try:
+                conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=2)
+                conn.request('GET', '/health')
+                if conn.getresponse().status == 200:
+                    return
+            except OSError:
+                time.sleep(0.5)
+        raise RuntimeError("Forecast service did not become ready")
+    
+    def forecast(self, window):
+        conn = self._connection()
+        body = json.dumps({'window': window.tolist()})
+        try:
+            conn.request('POST', '/forecast', body, {'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException):
+            del self._local.conn
+            raise
+        if response.status != 200:
+            raise RuntimeError(f"Service returned HTTP {response.status}")
+        return json.loads(payload)['forecast']
+    
+    def close(self):
+        self.process.terminate()
+        self.process.wait(timeout=30)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class SensorLoadTest:
+    """
+    Open-loop load generator: requests are scheduled at fixed times regardless of
+    how fast earlier ones complete, and latency is measured from the scheduled
+    time, so queueing delay is included once the target falls behind.
+    """
+    
+    def __init__(self, target, streams, concurrency=4, max_backlog=10_000, sample_interval=1.0):
+        self.target = target
+        self.streams = streams
+        self.concurrency = concurrency
+        self.max_backlog = max_backlog
+        self.sample_interval = sample_interval
+    
+    def run_step(self, n_nodes, rate_per_node, duration, warmup=0.0):
+        """
+        Replay n_nodes streams at rate_per_node readings/sec for duration seconds
+        
+        Returns:
+            dict with latency percentiles, throughput, errors and a time series
+        """
+        total_rate = n_nodes * rate_per_node
+        requests = queue.Queue()
+        latencies = []
+        completions = []
+        errors = [0]
+        dropped = 0
+        record_lock = threading.Lock()
+        measure_from = time.perf_counter() + warmup
+        
+        def worker():
+            while True:
+                item = requests.get()
+                if item is None:
+                    return
+                node, scheduled = item
+                try:
+                    self.target.forecast(self.streams.next_window(node))
+                    done = time.perf_counter()
+                    if scheduled >= measure_from:
+                        with record_lock:
+                            latencies.append(done - scheduled)
+                            completions.append(done)
+                except Exception:
+                    with record_lock:
+                        errors[0] += 1
+        
+        workers = [threading.Thread(target=worker, daemon=True) for _ in range(self.concurrency)]
+        for w in workers:
+            w.start()
+        
+        sampler = ResourceSampler(self.target.pid, self.sample_interval)
+        sampler.start()
+        
+        start = time.perf_counter()
+        n_requests = int(total_rate * (warmup + duration))
+        for i in range(n_requests):
+            scheduled = start + i / total_rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            if requests.qsize() >= self.max_backlog:
+                dropped += 1
+                continue
+            requests.put((i % n_nodes, scheduled))
+        
+        for _ in workers:
+            requests.put(None)
+        for w in workers:
+            w.join()
+        sampler.stop()
+        
+        end = time.perf_counter()
+        measured = np.array(latencies) * 1000
+        elapsed = max(end - measure_from, 1e-9)
+        return {
+            'nodes': n_nodes,
+            'rate_per_node': rate_per_node,
+            'offered_rps': total_rate,
+            'achieved_rps': len(measured) / elapsed,
+            'completed': int(len(measured)),
+            'errors': errors[0],
+            'dropped': dropped,
+            'latency_ms': _percentiles(measured),
+            'timeseries': self._timeseries(sampler.samples, completions, latencies, start)
+        }
+    
+    def _timeseries(self, samples, completions, latencies, start):
+        """Attach per-interval throughput and p99 to the resource samples"""
+        completions = np.array(completions) - start
+        latencies = np.array(latencies) * 1000
+        series = []
+        prev_t = 0.0
+        for sample in samples:
+            in_window = (completions > prev_t) & (completions <= sample['t'])
+            interval = max(sample['t'] - prev_t, 1e-9)
+            series.append({
+                **sample,
+                'throughput_rps': round(float(in_window.sum()) / interval, 2),
+                'p99_ms': round(float(np.percentile(latencies[in_window], 99)), 3) if in_window.any() else None
+            })
+            prev_t = sample['t']
+        return series
+
+
+def _percentiles(values_ms):
+    if len(values_ms) == 0:
+        return {'p50': None, 'p95': None, 'p99': None, 'max': None, 'mean': None}
+    p50, p95, p99 = np.percentile(values_ms, [50, 95, 99])
+    return {
+        'p50': round(float(p50), 3),
+        'p95': round(float(p95), 3),
+        'p99': round(float(p99), 3),
+        'max': round(float(values_ms.max()), 3),
+        'mean': round(float(values_ms.mean()), 3)
+    }
+
+
+def load_predictor(args):
+    predictor = SensorPredictor()
+    predictor.load_model(
+        model_path=args.model_path,
+        scaler_path=args.scaler_path,
+        config_path=args.config_path
+    )
+    return predictor
+
+
+def serve(args):
+    """Run a minimal forecasting service (used by --mode service)"""
+    predictor = load_predictor(args)
+    lock = threading.Lock()
+    
+    class ForecastHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        
+        def _reply(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def do_GET(self):
+            self._reply(200 if self.path == '/health' else 404, {'status': 'ok'})
+        
+        def do_POST(self):
+            if self.path != '/forecast':
+                self._reply(404, {'error': 'not found'})
+                return
+            try:
+                request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                window = np.asarray(request['window'], dtype=np.float32)
+                with lock:
+                    forecast = predictor.predict_future(window)
+                self._reply(200, {'forecast': forecast.tolist()})
+            except (ValueError, KeyError) as e:
+                self._reply(400, {'error': str(e)})
+        
+        def log_message(self, format, *log_args):
+            pass
+    
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), ForecastHandler)
+    server.serve_forever()
+
+
+def main(args):
+    """Main load test function"""
+    print("="*70)
+    print("SENSOR FORECASTING - LOAD TEST")
+    print("="*70)
+    
+    node_steps = [int(n) for n in args.nodes.split(',')]
+    
+    with open(args.config_path, 'r') as f:
+        config = json.load(f)
+    feature_names = config['feature_names']
+    sequence_length = config['sequence_length']
+    
+    if args.data_dir:
+        streams = NodeStreams.recorded(args.data_dir, max(node_steps), feature_names, sequence_length)
+    else:
+        streams = NodeStreams.synthetic(max(node_steps), feature_names, sequence_length)
+    
+    if args.mode == 'service':
+        print("\nStarting forecast service...")
+        target = ServiceTarget(args)
+    else:
+        print("\nLoading model...")
+        target = InProcessTarget(load_predictor(args))
+    
+    print(f"\nTest Parameters:")
+    print(f"  - Mode: {args.mode}")
+    print(f"  - Node steps: {node_steps}")
+    print(f"  - Rate per node: {args.rate} readings/sec")
+    print(f"  - Step duration: {args.duration}s (warmup {args.warmup}s)")
+    print(f"  - Concurrency: {args.concurrency}")
+    
+    load_test = SensorLoadTest(
+        target, streams,
+        concurrency=args.concurrency,
+        sample_interval=args.sample_interval
+    )
+    
+    steps = []
+    try:
+        for n_nodes in node_steps:
+            print(f"\nRunning {n_nodes} nodes ({n_nodes * args.rate:.1f} req/s offered)...")
+            result = load_test.run_step(n_nodes, args.rate, args.duration, warmup=args.warmup)
+            steps.append(result)
+            lat = result['latency_ms']
+            print(f"  achieved {result['achieved_rps']:.1f} req/s | "
+                  f"p50 {lat['p50']} ms | p95 {lat['p95']} ms | p99 {lat['p99']} ms | "
+                  f"errors {result['errors']} | dropped {result['dropped']}")
+    finally:
+        target.close()
+    
+    results = {
+        'created': datetime.now().isoformat(),
+        'environment': {
+            'hostname': platform.node(),
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count()
+        },
+        'config': vars(args),
+        'steps': steps
+    }
+    
+    output_file = args.output or f"sensor_load_test_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_file, 'w') as f:
+        json.dump(results, f, indent=2)
+    
+    print("\n" + "="*70)
+    print(f"Results saved to: {output_file}")
+    print("="*70 + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Load and soak test the sensor forecasting path',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Step through 10, 50 and 200 nodes at one reading per second each
+  python load_test_sensors.py --nodes 10,50,200 --rate 1 --duration 60
+  
+  # One-hour soak against a separate service process with recorded node data
+  python load_test_sensors.py --mode service --nodes 100 --duration 3600 --data_dir ./nodes/
+        """
+    )
+    
+    parser.add_argument('--model_path', type=str, default='sensor_predictor_model.h5',
+                        help='Path to trained model file (default: sensor_predictor_model.h5)')
+    parser.add_argument('--scaler_path', type=str, default='sensor_scaler.pkl',
+                        help='Path to scaler file (default: sensor_scaler.pkl)')
+    parser.add_argument('--config_path', type=str, default='sensor_config.json',
+                        help='Path to config file (default: sensor_config.json)')
+    parser.add_argument('--mode', choices=['inprocess', 'service'], default='inprocess',
+                        help='Call SensorPredictor directly or through a local service (default: inprocess)')
+    parser.add_argument('--nodes', type=str, default='10',
+                        help='Comma-separated node counts, one test step each (default: 10)')
+    parser.add_argument('--rate', type=float, default=1.0,
+                        help='Readings per second per node (default: 1.0)')
+    parser.add_argument('--duration', type=float, default=60,
+                        help='Measured seconds per step (default: 60)')
+    parser.add_argument('--warmup', type=float, default=5,
+                        help='Unmeasured seconds at the start of each step (default: 5)')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='Concurrent in-flight forecasts (default: 4)')
+    parser.add_argument('--sample_interval', type=float, default=1.0,
+                        help='Seconds between CPU/RSS samples (default: 1.0)')
+    parser.add_argument('--data_dir', type=str, default=None,
+                        help='Directory of recorded per-node CSV files (default: synthetic streams)')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Results JSON file (default: sensor_load_test_<timestamp>.json)')
+    parser.add_argument('--port', type=int, default=0,
+                        help='Service port (default: any free port)')
+    parser.add_argument('--serve', action='store_true',
+                        help=argparse.SUPPRESS)
+    
+    args = parser.parse_args()
+    if args.serve:
+        serve(args)
+    else:
+        main(args)
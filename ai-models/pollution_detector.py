@@ -3,6 +3,7 @@ Pollution Type Detection Model
 Detects pollution type (water, waste, or air) from images using CNN
 """
 
+import io
 import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras import layers, models
@@ -11,6 +12,29 @@ from tensorflow.keras.preprocessing.image import ImageDataGenerator
 import numpy as np
 from PIL import Image
 import os
+import hashlib
+from collections import deque
+from functools import partial
+from itertools import count
+from image_pipeline import ImageBatchPipeline, decode_image, list_class_files
+from image_shards import ImageShardDataset
+from feature_cache import FeatureStore, FeatureSequence
+from inference_profile import PROFILE_PATH, load_inference_profile
+
+
+# Random transforms applied to training images
+AUGMENTATION = dict(
+    rotation_range=20,
+    width_shift_range=0.2,
+    height_shift_range=0.2,
+    horizontal_flip=True,
+    zoom_range=0.2,
+    shear_range=0.2,
+    fill_mode='nearest'
+)
+
+# Pixel scaling of build_model's in-graph Rescaling layer: uint8 -> [0, 1]
+PIXEL_SCALE = 1. / 255
 
 
 class PollutionDetector:
@@ -21,27 +45,67 @@ class PollutionDetector:
     - Air Pollution
     """
     
-    def __init__(self, img_size=(224, 224), num_classes=3):
+    def __init__(self, img_size=(224, 224), num_classes=3, inference_profile=PROFILE_PATH):
+        """
+        Args:
+            img_size: Model input (width, height)
+            num_classes: Number of output classes
+            inference_profile: Profile from tune_inference.py; if it exists and
+                matches this machine, its thread settings are applied and its
+                batch size becomes the default (None = ignore profiles)
+        """
         self.img_size = img_size
         self.num_classes = num_classes
         self.class_names = ['air_pollution', 'waste_pollution', 'water_pollution']
         self.model = None
+        # Let the JPEG decoder downscale (DCT scaling) before the final resize
+        self.draft_decode = True
+        # Optional PredictionCache; used once the weights have a file identity
+        self.cache = None
+        # Optional ImageManifest; get_datasets lists valid files from it instead of the directories
+        self.manifest = None
+        self.model_id = None
+        # Default batch size of predict_batch / iter_predictions
+        self.batch_size = 32
+        profile = load_inference_profile('pollution_detector', inference_profile) if inference_profile else None
+        if profile is not None:
+            self.batch_size = profile['batch_size']
+            print(f"Inference profile: batch size {self.batch_size}, "
+                  f"{profile['intra_op_threads'] or 'default'} intra-op / "
+                  f"{profile['inter_op_threads'] or 'default'} inter-op threads")
         
-    def build_model(self, pretrained=True):
+    def build_model(self, pretrained=True, width=1.0):
         """
         Build CNN model using MobileNetV2 as base with transfer learning
+        
+        Args:
+            pretrained: MobileNetV2 with ImageNet weights, else the custom CNN
+            width: Width multiplier. For MobileNetV2 this is alpha; ImageNet
+                weights exist for 0.35, 0.5, 0.75, 1.0, 1.3 and 1.4, at input
+                sizes 96, 128, 160, 192 and 224. For the custom CNN it scales
+                filter and unit counts, e.g. 0.25 with a 96x96 input gives a
+                cheap first stage for CascadePollutionDetector
+        
+        The model takes uint8 pixel batches and rescales them itself, so
+        training, inference and saved or exported models share one
+        preprocessing definition and callers never build float32 copies.
         """
+        preprocessing = [
+            layers.Input(shape=(*self.img_size, 3), dtype='uint8'),
+            layers.Rescaling(PIXEL_SCALE, name='rescale')
+        ]
         if pretrained:
             # Use MobileNetV2 as base model (pre-trained on ImageNet)
             base_model = MobileNetV2(
                 input_shape=(*self.img_size, 3),
+                alpha=width,
                 include_top=False,
                 weights='imagenet'
             )
             base_model.trainable = False  # Freeze base model initially
             
             # Add custom classification head
-            model = models.Sequential([
+            model = models.Sequential(preprocessing + [
                 base_model,
                 layers.GlobalAveragePooling2D(),
                 layers.Dropout(0.3),
@@ -54,48 +118,61 @@ class PollutionDetector:
                 layers.Dense(self.num_classes, activation='softmax')
             ])
         else:
+            def units(n):
+                return max(8, int(round(n * width)))
+            
             # Build custom CNN from scratch
-            model = models.Sequential([
-                layers.Input(shape=(*self.img_size, 3)),
-                
+            model = models.Sequential(preprocessing + [
                 # Block 1
-                layers.Conv2D(32, (3, 3), activation='relu', padding='same'),
+                layers.Conv2D(units(32), (3, 3), activation='relu', padding='same'),
                 layers.BatchNormalization(),
-                layers.Conv2D(32, (3, 3), activation='relu', padding='same'),
+                layers.Conv2D(units(32), (3, 3), activation='relu', padding='same'),
                 layers.MaxPooling2D((2, 2)),
                 layers.Dropout(0.25),
                 
                 # Block 2
-                layers.Conv2D(64, (3, 3), activation='relu', padding='same'),
+                layers.Conv2D(units(64), (3, 3), activation='relu', padding='same'),
                 layers.BatchNormalization(),
-                layers.Conv2D(64, (3, 3), activation='relu', padding='same'),
+                layers.Conv2D(units(64), (3, 3), activation='relu', padding='same'),
                 layers.MaxPooling2D((2, 2)),
                 layers.Dropout(0.25),
                 
                 # Block 3
-                layers.Conv2D(128, (3, 3), activation='relu', padding='same'),
+                layers.Conv2D(units(128), (3, 3), activation='relu', padding='same'),
                 layers.BatchNormalization(),
-                layers.Conv2D(128, (3, 3), activation='relu', padding='same'),
+                layers.Conv2D(units(128), (3, 3), activation='relu', padding='same'),
                 layers.MaxPooling2D((2, 2)),
                 layers.Dropout(0.25),
                 
                 # Block 4
-                layers.Conv2D(256, (3, 3), activation='relu', padding='same'),
+                layers.Conv2D(units(256), (3, 3), activation='relu', padding='same'),
                 layers.BatchNormalization(),
-                layers.Conv2D(256, (3, 3), activation='relu', padding='same'),
+                layers.Conv2D(units(256), (3, 3), activation='relu', padding='same'),
                 layers.GlobalAveragePooling2D(),
                 layers.Dropout(0.5),
                 
                 # Dense layers
-                layers.Dense(512, activation='relu'),
+                layers.Dense(units(512), activation='relu'),
                 layers.BatchNormalization(),
                 layers.Dropout(0.5),
                 layers.Dense(self.num_classes, activation='softmax')
             ])
         
         self.model = model
+        self.model_id = None
         return model
     
+    @property
+    def uint8_inputs(self):
+        """Whether the model rescales in-graph and takes uint8 pixels (older models take [0, 1] floats)"""
+        return self.model is not None and self.model.inputs[0].dtype == tf.uint8
+    
+    def _generator_scaling(self):
+        """ImageDataGenerator arguments yielding batches in the form the model takes"""
+        if self.uint8_inputs:
+            return dict(dtype='uint8')
+        return dict(rescale=PIXEL_SCALE)
+    
     def compile_model(self, learning_rate=0.001):
         """Compile the model with optimizer and loss function"""
         if self.model is None:
@@ -122,19 +199,10 @@ class PollutionDetector:
             water_pollution/
         """
         # Data augmentation for training
-        train_datagen = ImageDataGenerator(
-            rescale=1./255,
-            rotation_range=20,
-            width_shift_range=0.2,
-            height_shift_range=0.2,
-            horizontal_flip=True,
-            zoom_range=0.2,
-            shear_range=0.2,
-            fill_mode='nearest'
-        )
+        train_datagen = ImageDataGenerator(**self._generator_scaling(), **AUGMENTATION)
         
-        # Only rescaling for validation
-        val_datagen = ImageDataGenerator(rescale=1./255)
+        # No augmentation for validation
+        val_datagen = ImageDataGenerator(**self._generator_scaling())
         
         train_generator = train_datagen.flow_from_directory(
             train_dir,
@@ -154,6 +222,198 @@ class PollutionDetector:
         
         return train_generator, val_generator
     
+    @staticmethod
+    def list_class_files(directory):
+        """(paths, labels, class_names) of a class-folder directory"""
+        return list_class_files(directory)
+    
+    def _training_files(self, directory):
+        """(paths, labels, class_names) of a class-folder directory, from self.manifest if set"""
+        if self.manifest is not None and os.path.isdir(directory):
+            return self.manifest.class_files(directory)
+        return self.list_class_files(directory)
+    
+    @staticmethod
+    def augment_batch(images, seed=None):
+        """
+        Apply AUGMENTATION to a float image batch (any pixel scale) inside a tf.data pipeline
+        
+        Rotation, shift, zoom, shear and horizontal flip are composed into one
+        affine transform per image and applied in a single warp, with the same
+        ranges and nearest fill as the ImageDataGenerator settings.
+        """
+        shape = tf.shape(images)
+        n = shape[0]
+        h, w = tf.cast(shape[1], tf.float32), tf.cast(shape[2], tf.float32)
+        
+        def uniform(limit):
+            return tf.random.uniform((n,), -limit, limit, seed=seed)
+        
+        angle = uniform(AUGMENTATION['rotation_range'] * np.pi / 180)
+        shear = uniform(AUGMENTATION['shear_range'] * np.pi / 180)
+        zoom_x = 1 + uniform(AUGMENTATION['zoom_range'])
+        zoom_y = 1 + uniform(AUGMENTATION['zoom_range'])
+        shift_x = uniform(AUGMENTATION['width_shift_range']) * w
+        shift_y = uniform(AUGMENTATION['height_shift_range']) * h
+        flip = tf.where(tf.random.uniform((n,), seed=seed) < 0.5, -1.0, 1.0) \
+            if AUGMENTATION['horizontal_flip'] else tf.ones((n,))
+        
+        # Output -> input pixel mapping: rotation @ shear @ zoom @ flip around the center
+        cos, sin = tf.cos(angle), tf.sin(angle)
+        a00 = cos * zoom_x * flip
+        a01 = (-cos * tf.sin(shear) - sin * tf.cos(shear)) * zoom_y
+        a10 = sin * zoom_x * flip
+        a11 = (-sin * tf.sin(shear) + cos * tf.cos(shear)) * zoom_y
+        cx, cy = (w - 1) / 2, (h - 1) / 2
+        a02 = cx + shift_x - a00 * cx - a01 * cy
+        a12 = cy + shift_y - a10 * cx - a11 * cy
+        zeros = tf.zeros((n,))
+        transforms = tf.stack([a00, a01, a02, a10, a11, a12, zeros, zeros], axis=1)
+        
+        return tf.raw_ops.ImageProjectiveTransformV3(
+            images=images,
+            transforms=transforms,
+            output_shape=shape[1:3],
+            fill_value=0.0,
+            interpolation='BILINEAR',
+            fill_mode=AUGMENTATION['fill_mode'].upper()
+        )
+    
+    def get_datasets(self, train_dir, val_dir, batch_size=32, cache_val=True,
+                     cache_train=False, seed=None):
+        """
+        Create tf.data pipelines for training and validation
+        
+        Same class-folder layout as get_data_generators, but files are listed
+        in parallel, decoded and augmented on all cores by tf.data, validation
+        images are decoded once and cached, and batches are prefetched while
+        the model trains.
+        
+        Either directory may instead be a shard directory written by
+        ImageShardWriter (prepare_data.py --task shards); its images are read
+        pre-decoded from memory-mapped shards and the cache options do not apply.
+        
+        With self.manifest set, class-folder directories are listed from the
+        ImageManifest and images it found corrupt are left out.
+        
+        Args:
+            train_dir: Training directory with one subfolder per class, or shard directory
+            val_dir: Validation directory with one subfolder per class, or shard directory
+            batch_size: Batch size
+            cache_val: Cache decoded validation images (True = in memory,
+                a string = cache file path)
+            cache_train: Same for training images (before augmentation)
+            seed: Shuffle/augmentation seed
+        
+        Returns:
+            (train_dataset, val_dataset) yielding (image batches, one-hot labels);
+            images are uint8 for models with in-graph rescaling, else floats in [0, 1]
+        """
+        autotune = tf.data.AUTOTUNE
+        uint8_inputs = self.uint8_inputs
+        height, width = self.img_size[1], self.img_size[0]
+        
+        def decode_jpeg_scaled(contents):
+            # DCT scaling, as in decode_image's draft mode: largest 1/2^k still covering img_size
+            shape = tf.io.extract_jpeg_shape(contents)
+            scale = tf.minimum(shape[0] // height, shape[1] // width)
+            branch = tf.where(scale >= 8, 3, tf.where(scale >= 4, 2, tf.where(scale >= 2, 1, 0)))
+            return tf.switch_case(branch, [
+                # Same IDCT as PIL (libjpeg ISLOW), so decoded pixels match inference
+                lambda ratio=ratio: tf.io.decode_jpeg(contents, channels=3, ratio=ratio,
+                                                      dct_method='INTEGER_ACCURATE')
+                for ratio in (1, 2, 4, 8)
+            ])
+        
+        def decode_pil(contents):
+            # Formats tf.io cannot decode (WebP)
+            with Image.open(io.BytesIO(contents)) as img:
+                return np.asarray(img.convert('RGB'), dtype=np.uint8)
+        
+        def decode_other(contents):
+            # RIFF....WEBP; padded so files shorter than the header can still be sliced
+            header = tf.strings.join([tf.strings.substr(contents, 0, 12), ' ' * 12])
+            is_webp = tf.logical_and(tf.strings.substr(header, 0, 4) == 'RIFF',
+                                     tf.strings.substr(header, 8, 4) == 'WEBP')
+            img = tf.cond(
+                is_webp,
+                lambda: tf.numpy_function(decode_pil, [contents], tf.uint8),
+                lambda: tf.io.decode_image(contents, channels=3, expand_animations=False)
+            )
+            img.set_shape((None, None, 3))
+            return img
+        
+        def load(path, label):
+            contents = tf.io.read_file(path)
+            img = tf.cond(
+                tf.io.is_jpeg(contents),
+                lambda: decode_jpeg_scaled(contents),
+                lambda: decode_other(contents)
+            )
+            # Antialiased bicubic, like the PIL resize of decode_image used at inference
+            img = tf.image.resize(img, (height, width), method='bicubic', antialias=True)
+            # Cached as uint8: a quarter of the memory of float32
+            img = tf.cast(tf.clip_by_value(tf.round(img), 0, 255), tf.uint8)
+            return img, tf.one_hot(label, self.num_classes)
+        
+        def rescale(images, labels):
+            return tf.cast(images, tf.float32) * PIXEL_SCALE, labels
+        
+        def augment(images, labels):
+            images = self.augment_batch(tf.cast(images, tf.float32), seed)
+            if uint8_inputs:
+                return tf.cast(tf.clip_by_value(tf.round(images), 0, 255), tf.uint8), labels
+            return images * PIXEL_SCALE, labels
+        
+        def to_inputs(ds, training):
+            # Validation batches of uint8-input models go to the model untouched
+            if training:
+                return ds.map(augment, num_parallel_calls=autotune)
+            if not uint8_inputs:
+                return ds.map(rescale, num_parallel_calls=autotune)
+            return ds
+        
+        def build_from_shards(directory, training):
+            shards = ImageShardDataset(directory)
+            if shards.img_size != tuple(self.img_size):
+                raise ValueError(f"Shards in {directory} are {shards.img_size}, model expects {tuple(self.img_size)}")
+            print(f"Found {len(shards)} pre-decoded images belonging to {len(shards.class_names)} classes.")
+            
+            def gather(indices):
+                images, labels = shards.gather(np.sort(indices))
+                return images, labels.astype(np.int32)
+            
+            def read(indices):
+                images, labels = tf.numpy_function(gather, [indices], (tf.uint8, tf.int32))
+                images.set_shape((None, height, width, 3))
+                labels.set_shape((None,))
+                return images, tf.one_hot(labels, self.num_classes)
+            
+            # Shuffle indices, not images: each batch is one memmap gather
+            ds = tf.data.Dataset.range(len(shards))
+            if training:
+                ds = ds.shuffle(len(shards), seed=seed, reshuffle_each_iteration=True)
+            ds = ds.batch(batch_size).map(read, num_parallel_calls=autotune, deterministic=not training)
+            return to_inputs(ds, training).prefetch(autotune)
+        
+        def build(directory, training, cache):
+            if ImageShardDataset.is_shard_dir(directory):
+                return build_from_shards(directory, training)
+            paths, labels, class_names = self._training_files(directory)
+            print(f"Found {len(paths)} images belonging to {len(class_names)} classes.")
+            ds = tf.data.Dataset.from_tensor_slices((paths, labels))
+            if training:
+                ds = ds.shuffle(len(paths), seed=seed, reshuffle_each_iteration=True)
+            ds = ds.map(load, num_parallel_calls=autotune, deterministic=not training)
+            ds = ds.ignore_errors(log_warning=True)
+            if cache:
+                ds = ds.cache('' if cache is True else cache)
+                if training:
+                    ds = ds.shuffle(min(len(paths), 4096), seed=seed)
+            return to_inputs(ds.batch(batch_size), training).prefetch(autotune)
+        
+        return build(train_dir, True, cache_train), build(val_dir, False, cache_val)
+    
     def train(self, train_generator, val_generator, epochs=50, callbacks=None):
         """Train the model"""
         if self.model is None:
@@ -187,6 +447,150 @@ class PollutionDetector:
             callbacks=callbacks
         )
         
+        # Weights changed; cached predictions no longer apply
+        self.model_id = None
+        return history
+    
+    def _split_backbone(self):
+        """(preprocessing + backbone + pooling model, head model) sharing layers with self.model"""
+        model_layers = self.model.layers if self.model is not None else []
+        # Models built before in-graph rescaling start directly with the backbone
+        start = 1 if model_layers and isinstance(model_layers[0], layers.Rescaling) else 0
+        if (len(model_layers) < start + 3
+                or not isinstance(model_layers[start], keras.Model)
+                or not isinstance(model_layers[start + 1], layers.GlobalAveragePooling2D)):
+            raise ValueError("Cached-feature training requires build_model(pretrained=True)")
+        
+        inputs = layers.Input(shape=self.model.input_shape[1:], dtype=self.model.inputs[0].dtype)
+        backbone = models.Sequential([inputs] + model_layers[:start + 2])
+        feature_dim = model_layers[start + 1].output_shape[-1]
+        head = models.Sequential([layers.Input(shape=(feature_dim,))] + model_layers[start + 2:])
+        return backbone, head
+    
+    def extract_features(self, image_dir, output_dir, augment_copies=0, batch_size=32):
+        """
+        Run the frozen backbone once over a class-folder directory
+        
+        Images are decoded with decode_image, as at inference, and each
+        decoded batch is also passed through augment_batch once per copy.
+        Row block 0 holds the unaugmented images; blocks 1..augment_copies each
+        hold one randomly augmented variant of every image. Existing features
+        built with the same settings from an unchanged directory are reused.
+        
+        Args:
+            image_dir: Directory with one subfolder per class (or split manifest)
+            output_dir: Where the FeatureStore is written
+            augment_copies: Augmented variants per image
+            batch_size: Images per backbone forward pass
+        
+        Returns:
+            FeatureStore
+        """
+        backbone, _ = self._split_backbone()
+        store = FeatureStore(output_dir)
+        paths, labels, class_names = self._training_files(image_dir)
+        print(f"Found {len(paths)} images belonging to {len(class_names)} classes.")
+        
+        meta = {
+            'image_dir': os.path.abspath(image_dir),
+            'files': FeatureStore.fingerprint(paths),
+            'img_size': list(self.img_size),
+            'draft_decode': self.draft_decode,
+            'augment_copies': augment_copies,
+            'backbone': backbone.layers[-2].name,
+            'class_indices': {name: i for i, name in enumerate(class_names)}
+        }
+        if store.matches(meta):
+            print(f"Reusing cached features in {output_dir}")
+            return store
+        
+        uint8_inputs = self.uint8_inputs
+        
+        def to_inputs(images):
+            # Same conversion as get_datasets: uint8 pixels, or floats in [0, 1]
+            if uint8_inputs:
+                return np.asarray(tf.cast(tf.clip_by_value(tf.round(images), 0, 255), tf.uint8))
+            return np.asarray(images, dtype=np.float32) * PIXEL_SCALE
+        
+        n_images = len(paths)
+        copies = 1 + augment_copies
+        features = store.create(n_images * copies, backbone.output_shape[-1])
+        pipeline = ImageBatchPipeline(
+            img_size=self.img_size,
+            batch_size=batch_size,
+            decode_fn=partial(decode_image, draft=self.draft_decode)
+        )
+        print(f"Extracting features: {n_images} images, {augment_copies} augmented copies each")
+        
+        row = 0
+        for batch in pipeline.batches(paths):
+            if batch.errors:
+                index, error = next(iter(batch.errors.items()))
+                raise ValueError(f"Cannot decode {batch.paths[index]}: {error} "
+                                 f"(index the images with prepare_data.py --task manifest and pass --manifest "
+                                 f"to skip corrupt files)")
+            images = batch.images.astype(np.float32)
+            for copy in range(copies):
+                inputs = images if copy == 0 else self.augment_batch(images)
+                rows = copy * n_images + row
+                features[rows:rows + len(images)] = np.asarray(backbone.predict_on_batch(to_inputs(inputs)))
+            row += len(images)
+        
+        store.finalize(features, np.tile(labels, copies), meta)
+        return store
+    
+    def train_head(self, train_store, val_store, epochs=200, batch_size=128,
+                   learning_rate=0.001, callbacks=None):
+        """
+        Train the classification head on cached backbone features
+        
+        The head shares its layers with self.model, so afterwards self.model
+        is a complete, normally saveable model with the trained head.
+        
+        Args:
+            train_store: FeatureStore from extract_features on training images
+            val_store: FeatureStore from extract_features on validation images
+            epochs: Maximum epochs (each is a few passes over small vectors)
+            batch_size: Feature vectors per step
+            learning_rate: Adam learning rate
+            callbacks: Keras callbacks (default: early stopping + LR schedule)
+        
+        Returns:
+            Keras History of the head training
+        """
+        _, head = self._split_backbone()
+        head.compile(
+            optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+            loss='categorical_crossentropy',
+            metrics=['accuracy', keras.metrics.Precision(name='precision'),
+                     keras.metrics.Recall(name='recall')]
+        )
+        
+        if callbacks is None:
+            callbacks = [
+                keras.callbacks.EarlyStopping(
+                    monitor='val_loss',
+                    patience=20,
+                    restore_best_weights=True
+                ),
+                keras.callbacks.ReduceLROnPlateau(
+                    monitor='val_loss',
+                    factor=0.5,
+                    patience=8,
+                    min_lr=1e-7
+                )
+            ]
+        
+        history = head.fit(
+            FeatureSequence(train_store, self.num_classes, batch_size),
+            validation_data=FeatureSequence(val_store, self.num_classes, batch_size, shuffle=False),
+            epochs=epochs,
+            callbacks=callbacks,
+            verbose=2
+        )
+        
+        # Weights changed; cached predictions no longer apply
+        self.model_id = None
         return history
     
     def predict_image(self, image_path, confidence_threshold=0.6):
@@ -203,23 +607,51 @@ class PollutionDetector:
         if self.model is None:
             raise ValueError("Model must be loaded before prediction")
         
+        cache_key = self.cache_model_id()
+        if cache_key is not None:
+            image_hash = self.cache.hash_file(image_path)
+            cached = self.cache.get(image_hash, cache_key)
+            if cached is not None:
+                self.cache.flush()
+                return self._format_result(np.asarray(cached), confidence_threshold)
+        
         # Load and preprocess image
-        img = Image.open(image_path).convert('RGB')
-        img = img.resize(self.img_size)
-        img_array = np.array(img) / 255.0
-        img_array = np.expand_dims(img_array, axis=0)
+        img_array = np.expand_dims(self.load_image(image_path), axis=0)
         
         # Make prediction
-        predictions = self.model.predict(img_array, verbose=0)
-        predicted_class_idx = np.argmax(predictions[0])
-        confidence = predictions[0][predicted_class_idx]
+        predictions = self.predict_arrays(img_array)
+        if cache_key is not None:
+            self.cache.put_many([(image_hash, predictions[0])], cache_key)
+            self.cache.flush()
+        return self._format_result(predictions[0], confidence_threshold)
+    
+    def cache_model_id(self):
+        """
+        Cache key part identifying the weights and decode settings
+        
+        Returns None (caching off) when no cache is attached or the weights
+        were not loaded from or saved to a file.
+        """
+        if self.cache is None or self.model_id is None:
+            return None
+        decode = 'draft' if self.draft_decode else 'full'
+        return f"{self.model_id}:{self.img_size[0]}x{self.img_size[1]}:{decode}"
+    
+    def load_image(self, image_path):
+        """Decode an image file to a uint8 RGB array of shape (*img_size, 3)"""
+        return decode_image(image_path, self.img_size, draft=self.draft_decode)
+    
+    def _format_result(self, probabilities, confidence_threshold=0.6):
+        """Build the prediction dict for one image from its class probabilities"""
+        predicted_class_idx = np.argmax(probabilities)
+        confidence = probabilities[predicted_class_idx]
         
         result = {
             'predicted_class': self.class_names[predicted_class_idx],
             'confidence': float(confidence),
             'all_probabilities': {
                 class_name: float(prob) 
-                for class_name, prob in zip(self.class_names, predictions[0])
+                for class_name, prob in zip(self.class_names, probabilities)
             }
         }
         
@@ -228,33 +660,189 @@ class PollutionDetector:
         
         return result
     
-    def predict_batch(self, image_paths):
-        """Predict pollution types for multiple images"""
-        results = []
-        for image_path in image_paths:
-            try:
-                result = self.predict_image(image_path)
-                result['image_path'] = image_path
-                results.append(result)
-            except Exception as e:
-                results.append({
-                    'image_path': image_path,
-                    'error': str(e)
-                })
-        return results
+    def predict_arrays(self, images):
+        """
+        Run one forward pass over a batch of decoded images
+        
+        Args:
+            images: uint8 array of shape (batch, *img_size, 3)
+        
+        Returns:
+            Array of class probabilities, shape (batch, num_classes)
+        """
+        if self.model is None:
+            raise ValueError("Model must be loaded before prediction")
+        # uint8-input models rescale in-graph: no float32 copy on the host
+        batch = images if self.uint8_inputs else images.astype(np.float32) * PIXEL_SCALE
+        return np.asarray(self.model.predict_on_batch(batch))
+    
+    def predict_batch(self, image_paths, batch_size=None, confidence_threshold=0.6,
+                      num_workers=None, prefetch=2, use_processes=False):
+        """
+        Predict pollution types for multiple images
+        
+        Collects iter_predictions() into a list; see there for details.
+        
+        Args:
+            image_paths: Iterable of image file paths
+            batch_size: Images per forward pass (None = self.batch_size)
+            confidence_threshold: Minimum confidence for prediction
+            num_workers: Decode workers (None = one per CPU, 0 = decode inline)
+            prefetch: Batches decoded ahead of inference
+            use_processes: Decode in processes instead of threads
+        
+        Returns:
+            List of result dicts in input order
+        """
+        if self.model is None:
+            raise ValueError("Model must be loaded before prediction")
+        return list(self.iter_predictions(
+            image_paths, batch_size, confidence_threshold, num_workers, prefetch, use_processes
+        ))
+    
+    def iter_predictions(self, image_paths, batch_size=None, confidence_threshold=0.6,
+                         num_workers=None, prefetch=2, use_processes=False):
+        """
+        Predict pollution types for a stream of images, yielding results as batches finish
+        
+        Images are decoded on a worker pool (see ImageBatchPipeline) while the
+        previous batch runs through the model, and each batch is a single
+        forward pass. A file that fails to decode gets an error entry without
+        affecting the rest of its batch. With a cache attached, each file is
+        hashed first and only cache misses are decoded and inferred.
+        
+        image_paths is consumed lazily and only a few batches of results are
+        held at a time, so arbitrarily long inputs run in constant memory.
+        It may contain ImageBatchPipeline.FLUSH to end a batch early, e.g.
+        while the source of paths waits for more work.
+        
+        Args:
+            Same as predict_batch
+        
+        Yields:
+            Result dicts in input order
+        """
+        if self.model is None:
+            raise ValueError("Model must be loaded before prediction")
+        batch_size = batch_size or self.batch_size
+        
+        cache_key = self.cache_model_id()
+        results = {}
+        # (input index, image hash) of each path sent to the decoder, in order
+        pending = deque()
+        
+        def uncached_paths():
+            hits_since_flush = 0
+            indices = count()
+            for image_path in image_paths:
+                if image_path is ImageBatchPipeline.FLUSH:
+                    # The caller wants the current batch finished without waiting for more paths
+                    hits_since_flush = 0
+                    yield image_path
+                    continue
+                index = next(indices)
+                if cache_key is None:
+                    pending.append((index, None))
+                    yield image_path
+                    continue
+                try:
+                    image_hash = self.cache.hash_file(image_path)
+                except OSError as e:
+                    results[index] = {'image_path': image_path, 'error': str(e)}
+                    continue
+                cached = self.cache.get(image_hash, cache_key)
+                if cached is not None:
+                    result = self._format_result(np.asarray(cached), confidence_threshold)
+                    result['image_path'] = image_path
+                    results[index] = result
+                    hits_since_flush += 1
+                    if hits_since_flush == batch_size:
+                        # Let the consumer emit cache hits; the bounded queue
+                        # then keeps a long run of hits from piling up here
+                        hits_since_flush = 0
+                        yield ImageBatchPipeline.FLUSH
+                else:
+                    pending.append((index, image_hash))
+                    yield image_path
+        
+        pipeline = ImageBatchPipeline(
+            img_size=self.img_size,
+            batch_size=batch_size,
+            num_workers=num_workers,
+            prefetch=prefetch,
+            use_processes=use_processes,
+            decode_fn=partial(decode_image, draft=self.draft_decode)
+        )
+        
+        next_index = 0
+        try:
+            for batch in pipeline.batches(uncached_paths()):
+                keys = [pending.popleft() for _ in batch.paths]
+                for i, error in batch.errors.items():
+                    results[keys[i][0]] = {'image_path': batch.paths[i], 'error': error}
+            
+                if batch.positions:
+                    try:
+                        probabilities = self.predict_arrays(batch.images)
+                    except Exception as e:
+                        probabilities = None
+                        for i in batch.positions:
+                            results[keys[i][0]] = {'image_path': batch.paths[i], 'error': str(e)}
+            
+                    if probabilities is not None:
+                        for i, probs in zip(batch.positions, probabilities):
+                            result = self._format_result(probs, confidence_threshold)
+                            result['image_path'] = batch.paths[i]
+                            results[keys[i][0]] = result
+                        if cache_key is not None:
+                            self.cache.put_many(
+                                [(keys[i][1], probs) for i, probs in zip(batch.positions, probabilities)],
+                                cache_key
+                            )
+        
+                while next_index in results:
+                    yield results.pop(next_index)
+                    next_index += 1
+            
+            # Cache hits after the last decoded batch
+            while next_index in results:
+                yield results.pop(next_index)
+                next_index += 1
+        finally:
+            if cache_key is not None:
+                self.cache.flush()
     
     def save_model(self, filepath='pollution_detector_model.h5'):
         """Save the trained model"""
         if self.model is None:
             raise ValueError("No model to save")
         self.model.save(filepath)
+        self.model_id = self._file_identity(filepath)
         print(f"Model saved to {filepath}")
     
     def load_model(self, filepath='pollution_detector_model.h5'):
-        """Load a pre-trained model"""
+        """Load a pre-trained model; img_size follows its input layer"""
         self.model = keras.models.load_model(filepath)
+        # Variants trained at 96-192 px are decoded at their own size
+        self.img_size = tuple(self.model.input_shape[1:3])
+        self.model_id = self._file_identity(filepath)
         print(f"Model loaded from {filepath}")
     
+    @staticmethod
+    def _file_identity(filepath):
+        """Short content hash of a model artifact (file or SavedModel directory)"""
+        digest = hashlib.sha256()
+        paths = [filepath]
+        if os.path.isdir(filepath):
+            paths = sorted(
+                os.path.join(root, name) for root, _, names in os.walk(filepath) for name in names
+            )
+        for path in paths:
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+        return digest.hexdigest()[:16]
+    
     def get_model_summary(self):
         """Print model architecture summary"""
         if self.model is None:
@@ -0,0 +1,494 @@
+"""
+Pollution Classification Server
+Keeps the detector resident and batches concurrent image requests within a latency budget
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import queue
+import signal
+import argparse
+import threading
+import socketserver
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from pollution_detector import PollutionDetector
+from tflite_detector import TFLitePollutionDetector
+from image_pipeline import decode_image
+
+
+class InferenceRequest:
+    """One decoded image waiting for a batch slot"""
+    
+    __slots__ = ('image', 'lane', 'confidence_threshold', 'enqueued', 'deadline', 'future', 'started')
+    
+    def __init__(self, image, lane, confidence_threshold, deadline):
+        self.image = image
+        self.lane = lane
+        self.confidence_threshold = confidence_threshold
+        self.enqueued = time.monotonic()
+        self.deadline = deadline
+        self.future = Future()
+        self.started = None
+
+
+def _percentiles(values_ms):
+    if len(values_ms) == 0:
+        return {'p50': None, 'p95': None, 'p99': None, 'max': None}
+    values_ms = np.asarray(values_ms)
+    p50, p95, p99 = np.percentile(values_ms, [50, 95, 99])
+    return {
+        'p50': round(float(p50), 3),
+        'p95': round(float(p95), 3),
+        'p99': round(float(p99), 3),
+        'max': round(float(values_ms.max()), 3)
+    }
+
+
+class DynamicBatcher:
+    """
+    Groups queued requests into model batches on one inference thread
+    
+    Requests wait in two lanes. 'interactive' (single citizen reports) is
+    always served before 'bulk' (backfill); bulk requests only fill the
+    slots interactive ones leave free. A batch closes when it is full, when
+    the oldest request of a lane has waited that lane's max wait, or just
+    early enough to meet the nearest deadline given the recent inference
+    time. Each lane has a bounded queue: submit() raises queue.Full instead
+    of queueing without limit. Requests whose deadline passes while queued
+    are dropped before inference and fail with TimeoutError.
+    """
+    
+    LANES = ('interactive', 'bulk')
+    
+    def __init__(self, detector, max_batch_size=32, interactive_wait_ms=5, bulk_wait_ms=50,
+                 interactive_queue=64, bulk_queue=512, history=10_000):
+        """
+        Args:
+            detector: Loaded PollutionDetector (or TFLitePollutionDetector)
+            max_batch_size: Images per forward pass
+            interactive_wait_ms: Longest an interactive request waits for batch mates
+            bulk_wait_ms: Same for bulk requests (longer = fuller batches)
+            interactive_queue: Queued interactive requests before rejecting
+            bulk_queue: Queued bulk requests before rejecting
+            history: Completed requests kept for latency percentiles
+        """
+        self.detector = detector
+        self.max_batch_size = max_batch_size
+        self.max_wait = {'interactive': interactive_wait_ms / 1000, 'bulk': bulk_wait_ms / 1000}
+        self.limits = {'interactive': interactive_queue, 'bulk': bulk_queue}
+        self.queues = {lane: deque() for lane in self.LANES}
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = None
+        # Smoothed seconds per forward pass, used to close batches before deadlines
+        self._inference_estimate = 0.0
+        
+        self.started_at = time.monotonic()
+        self.counters = {
+            lane: {'submitted': 0, 'completed': 0, 'rejected': 0, 'expired': 0, 'failed': 0}
+            for lane in self.LANES
+        }
+        self.latency_ms = {lane: deque(maxlen=history) for lane in self.LANES}
+        self.queue_ms = {lane: deque(maxlen=history) for lane in self.LANES}
+        self.batch_sizes = deque(maxlen=history)
+        self.inference_ms = deque(maxlen=history)
+    
+    def start(self, warmup=True):
+        if warmup:
+            # Trace/allocate the model for the common batch shapes before serving
+            height, width = self.detector.img_size[1], self.detector.img_size[0]
+            for size in sorted({1, 2, self.max_batch_size}):
+                self.detector.predict_arrays(np.zeros((size, height, width, 3), dtype=np.uint8))
+        self._thread = threading.Thread(target=self._run, name='inference', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        for lane in self.LANES:
+            while self.queues[lane]:
+                self.queues[lane].popleft().future.set_exception(RuntimeError("Server shutting down"))
+    
+    def submit(self, image, lane='interactive', timeout=None, confidence_threshold=0.6):
+        """
+        Queue one decoded uint8 image
+        
+        Args:
+            image: uint8 array (height, width, 3) at the detector's img_size
+            lane: 'interactive' or 'bulk'
+            timeout: Seconds until the result is no longer useful (None = no deadline)
+            confidence_threshold: Minimum confidence for prediction
+        
+        Returns:
+            Future resolving to the result dict
+        
+        Raises:
+            ValueError: Unknown lane
+            queue.Full: The lane is at its queue limit
+        """
+        if lane not in self.queues:
+            raise ValueError(f"Unknown lane '{lane}' (use {', '.join(self.LANES)})")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        request = InferenceRequest(image, lane, confidence_threshold, deadline)
+        with self._condition:
+            if self._stopped:
+                raise RuntimeError("Server shutting down")
+            if len(self.queues[lane]) >= self.limits[lane]:
+                self.counters[lane]['rejected'] += 1
+                raise queue.Full(f"{lane} queue is full ({self.limits[lane]} requests)")
+            self.queues[lane].append(request)
+            self.counters[lane]['submitted'] += 1
+            self._condition.notify()
+        return request.future
+    
+    def _close_time(self):
+        """When the batch being gathered must be sent, given what is queued"""
+        close_at = min(
+            self.queues[lane][0].enqueued + self.max_wait[lane]
+            for lane in self.LANES if self.queues[lane]
+        )
+        deadlines = [
+            request.deadline for lane in self.LANES for request in self.queues[lane]
+            if request.deadline is not None
+        ]
+        if deadlines:
+            close_at = min(close_at, min(deadlines) - self._inference_estimate)
+        return close_at
+    
+    def _take_batch(self):
+        """Block until a batch is due, then pop it (interactive first)"""
+        with self._condition:
+            while not self._stopped:
+                queued = sum(len(q) for q in self.queues.values())
+                if queued == 0:
+                    self._condition.wait()
+                    continue
+                remaining = self._close_time() - time.monotonic()
+                if queued >= self.max_batch_size or remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            if self._stopped:
+                return []
+            
+            batch = []
+            for lane in self.LANES:
+                while self.queues[lane] and len(batch) < self.max_batch_size:
+                    batch.append(self.queues[lane].popleft())
+            return batch
+    
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            
+            now = time.monotonic()
+            live = []
+            for request in batch:
+                if request.deadline is not None and now > request.deadline:
+                    self.counters[request.lane]['expired'] += 1
+                    request.future.set_exception(TimeoutError("Deadline passed while queued"))
+                elif request.future.set_running_or_notify_cancel():
+                    request.started = now
+                    live.append(request)
+            if not live:
+                continue
+            
+            start = time.monotonic()
+            try:
+                probabilities = self.detector.predict_arrays(np.stack([r.image for r in live]))
+            except Exception as e:
+                for request in live:
+                    self.counters[request.lane]['failed'] += 1
+                    request.future.set_exception(e)
+                continue
+            seconds = time.monotonic() - start
+            self._inference_estimate = seconds if not self._inference_estimate else \
+                0.8 * self._inference_estimate + 0.2 * seconds
+            self.batch_sizes.append(len(live))
+            self.inference_ms.append(1000 * seconds)
+            
+            done = time.monotonic()
+            for request, probs in zip(live, probabilities):
+                result = self.detector._format_result(probs, request.confidence_threshold)
+                result['batch_size'] = len(live)
+                result['queue_ms'] = round(1000 * (request.started - request.enqueued), 3)
+                self.counters[request.lane]['completed'] += 1
+                self.latency_ms[request.lane].append(1000 * (done - request.enqueued))
+                self.queue_ms[request.lane].append(1000 * (request.started - request.enqueued))
+                request.future.set_result(result)
+    
+    def metrics(self):
+        """Queue depths, counters and latency percentiles per lane, plus batch statistics"""
+        uptime = time.monotonic() - self.started_at
+        with self._condition:
+            depths = {lane: len(self.queues[lane]) for lane in self.LANES}
+        batch_sizes = np.asarray(self.batch_sizes)
+        completed = sum(c['completed'] for c in self.counters.values())
+        return {
+            'uptime_s': round(uptime, 1),
+            'images_per_sec': round(completed / uptime, 2) if uptime else 0.0,
+            'lanes': {
+                lane: {
+                    'queued': depths[lane],
+                    'queue_limit': self.limits[lane],
+                    'max_wait_ms': 1000 * self.max_wait[lane],
+                    **self.counters[lane],
+                    'latency_ms': _percentiles(list(self.latency_ms[lane])),
+                    'queue_ms': _percentiles(list(self.queue_ms[lane]))
+                }
+                for lane in self.LANES
+            },
+            'batches': {
+                'count': len(batch_sizes),
+                'mean_size': round(float(batch_sizes.mean()), 2) if len(batch_sizes) else None,
+                'max_size': self.max_batch_size,
+                'inference_ms': _percentiles(list(self.inference_ms))
+            }
+        }
+
+
+class PollutionHTTPServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 resets connections under bursty load
+    request_queue_size = 256
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """ThreadingHTTPServer equivalent on a Unix domain socket"""
+    
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def make_server(batcher, host='127.0.0.1', port=8500, socket_path=None, max_image_mb=20,
+                default_timeouts=None, draft_decode=True):
+    """
+    HTTP server exposing a DynamicBatcher
+    
+    Endpoints:
+        POST /predict?lane=interactive|bulk&timeout_ms=..&confidence_threshold=..
+            Body: raw image bytes. 200 result JSON, 400 undecodable image,
+            413 too large, 429 lane full (Retry-After), 504 deadline passed
+        GET /metrics   Batcher metrics as JSON
+        GET /health    Liveness
+    
+    Images are decoded on the connection threads, so decoding runs in
+    parallel while the inference thread works on the previous batch.
+    """
+    detector = batcher.detector
+    default_timeouts = default_timeouts or {'interactive': 2.0, 'bulk': 60.0}
+    max_bytes = int(max_image_mb * 2**20)
+    
+    class PredictHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        
+        def _reply(self, status, payload, headers=None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if path == '/health':
+                self._reply(200, {'status': 'ok'})
+            elif path == '/metrics':
+                self._reply(200, batcher.metrics())
+            else:
+                self._reply(404, {'error': 'not found'})
+        
+        def do_POST(self):
+            start = time.monotonic()
+            url = urlparse(self.path)
+            if url.path != '/predict':
+                self._reply(404, {'error': 'not found'})
+                return
+            
+            length = int(self.headers.get('Content-Length') or 0)
+            if length > max_bytes:
+                self.close_connection = True
+                self._reply(413, {'error': f'image larger than {max_image_mb} MB'})
+                return
+            body = self.rfile.read(length)
+            
+            try:
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                lane = params.get('lane', 'interactive')
+                if lane not in batcher.queues:
+                    raise ValueError(f"Unknown lane '{lane}'")
+                timeout = float(params['timeout_ms']) / 1000 if 'timeout_ms' in params else default_timeouts[lane]
+                confidence_threshold = float(params.get('confidence_threshold', 0.6))
+                image = decode_image(io.BytesIO(body), detector.img_size, draft=draft_decode)
+            except Exception as e:
+                self._reply(400, {'error': str(e)})
+                return
+            
+            # Decoding counts against the deadline too
+            remaining = timeout - (time.monotonic() - start)
+            try:
+                future = batcher.submit(image, lane, remaining, confidence_threshold)
+            except queue.Full as e:
+                self._reply(429, {'error': str(e)}, {'Retry-After': '1'})
+                return
+            except RuntimeError as e:
+                self._reply(503, {'error': str(e)})
+                return
+            
+            try:
+                result = future.result(timeout=max(0.0, timeout - (time.monotonic() - start)))
+            except (TimeoutError, FutureTimeout):
+                # Still queued requests are dropped by the batcher when their deadline passes
+                self._reply(504, {'error': 'deadline exceeded'})
+                return
+            except Exception as e:
+                self._reply(500, {'error': str(e)})
+                return
+            
+            result['total_ms'] = round(1000 * (time.monotonic() - start), 3)
+            self._reply(200, result)
+        
+        def log_message(self, format, *log_args):
+            pass
+    
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        return UnixHTTPServer(socket_path, PredictHandler)
+    return PollutionHTTPServer((host, port), PredictHandler)
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def load_detector(model_path, img_size=None, num_threads=None):
+    """Load a Keras or .tflite model; both are sized from their input, img_size is checked for .tflite"""
+    if model_path.endswith('.tflite'):
+        size = (img_size, img_size) if img_size else None
+        detector = TFLitePollutionDetector(img_size=size, num_threads=num_threads)
+    else:
+        detector = PollutionDetector()
+    detector.load_model(model_path)
+    return detector
+
+
+def main(args):
+    """Main server function"""
+    print("="*70)
+    print("POLLUTION DETECTION - CLASSIFICATION SERVER")
+    print("="*70)
+    
+    if not os.path.exists(args.model_path):
+        print(f"\nERROR: Model file not found: {args.model_path}")
+        sys.exit(1)
+    
+    print(f"\nLoading model from: {args.model_path}")
+    detector = load_detector(args.model_path, args.img_size, args.num_threads)
+    batcher = DynamicBatcher(
+        detector,
+        max_batch_size=args.max_batch_size,
+        interactive_wait_ms=args.interactive_wait_ms,
+        bulk_wait_ms=args.bulk_wait_ms,
+        interactive_queue=args.interactive_queue,
+        bulk_queue=args.bulk_queue
+    )
+    print("Warming up...")
+    batcher.start()
+    
+    server = make_server(
+        batcher,
+        host=args.host,
+        port=args.port,
+        socket_path=args.socket,
+        max_image_mb=args.max_image_mb,
+        default_timeouts={'interactive': args.interactive_timeout_ms / 1000, 'bulk': args.bulk_timeout_ms / 1000},
+        draft_decode=args.draft_decode
+    )
+    address = f"unix:{args.socket}" if args.socket else f"http://{args.host}:{args.port}"
+    print(f"\n✓ Serving on {address}")
+    print(f"  - Batches of up to {args.max_batch_size}, interactive wait {args.interactive_wait_ms} ms, "
+          f"bulk wait {args.bulk_wait_ms} ms")
+    print(f"  - Queue limits: {args.interactive_queue} interactive, {args.bulk_queue} bulk")
+    print("  - POST /predict?lane=interactive|bulk  (body: image bytes)")
+    print("  - GET /metrics, GET /health\n")
+    
+    # Shut down cleanly on SIGTERM (docker stop, systemd) as well as Ctrl+C
+    signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down...")
+    finally:
+        server.server_close()
+        batcher.stop()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Serve pollution classification over HTTP with dynamic batching',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Serve on localhost:8500
+  python pollution_server.py --model_path pollution_detector_model.h5
+  
+  # INT8 model on a Unix socket
+  python pollution_server.py --model_path pollution_detector_int8.tflite --socket /run/econova/pollution.sock
+  
+  # Classify a report / submit backfill
+  curl --data-binary @photo.jpg "http://127.0.0.1:8500/predict"
+  curl --data-binary @old.jpg "http://127.0.0.1:8500/predict?lane=bulk&timeout_ms=120000"
+        """
+    )
+    
+    parser.add_argument('--model_path', type=str, default='pollution_detector_model.h5',
+                        help='Trained model, .h5 or INT8 .tflite (default: pollution_detector_model.h5)')
+    parser.add_argument('--img_size', type=int, default=None,
+                        help='Required input size for .tflite models (default: read from the model)')
+    parser.add_argument('--num_threads', type=int, default=None,
+                        help='Interpreter threads for .tflite models (default: one per CPU)')
+    parser.add_argument('--host', type=str, default='127.0.0.1',
+                        help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8500,
+                        help='TCP port (default: 8500)')
+    parser.add_argument('--socket', type=str, default=None,
+                        help='Listen on this Unix socket instead of TCP')
+    parser.add_argument('--max_batch_size', type=int, default=32,
+                        help='Images per forward pass (default: 32)')
+    parser.add_argument('--interactive_wait_ms', type=float, default=5,
+                        help='Longest an interactive request waits for batch mates (default: 5)')
+    parser.add_argument('--bulk_wait_ms', type=float, default=50,
+                        help='Longest a bulk request waits for batch mates (default: 50)')
+    parser.add_argument('--interactive_queue', type=int, default=64,
+                        help='Queued interactive requests before answering 429 (default: 64)')
+    parser.add_argument('--bulk_queue', type=int, default=512,
+                        help='Queued bulk requests before answering 429 (default: 512)')
+    parser.add_argument('--interactive_timeout_ms', type=float, default=2000,
+                        help='Default deadline of interactive requests (default: 2000)')
+    parser.add_argument('--bulk_timeout_ms', type=float, default=60000,
+                        help='Default deadline of bulk requests (default: 60000)')
+    parser.add_argument('--max_image_mb', type=float, default=20,
+                        help='Largest accepted upload (default: 20)')
+    parser.add_argument('--draft_decode', action='store_true', default=True,
+                        help='Decode JPEGs at reduced resolution before resizing (default: True)')
+    parser.add_argument('--full_decode', dest='draft_decode', action='store_false',
+                        help='Always decode images at full resolution')
+    
+    args = parser.parse_args()
+    main(args)
@@ -7,9 +7,17 @@ import os
 import sys
 import argparse
 import json
-from glob import glob
 from datetime import datetime
 from pollution_detector import PollutionDetector
+from tflite_detector import TFLitePollutionDetector
+from prediction_cache import PredictionCache
+from duplicate_index import NearDuplicateIndex, predict_deduplicated
+from image_discovery import discover_images, parse_modified_since
+from prediction_log import PredictionLog
+from sharded_inference import ShardedPredictor
+from cascade_detector import CascadePollutionDetector, load_stage
+from image_manifest import ImageManifest
+from image_pipeline import IMAGE_EXTENSIONS
 
 
 def predict_single_image(detector, image_path, confidence_threshold=0.6):
@@ -32,40 +40,109 @@ def predict_single_image(detector, image_path, confidence_threshold=0.6):
     return result
 
 
-def predict_batch(detector, image_paths, confidence_threshold=0.6, save_results=True):
-    """Predict pollution types for multiple images"""
+def predict_batch(detector, image_paths, confidence_threshold=0.6, save_results=True, batch_size=None,
+                  num_workers=None, prefetch=2, use_processes=False, dedup_index=None,
+                  output_file=None, resume=False, fsync_interval=10.0, progress_every=1000):
+    """
+    Predict pollution types for multiple images
+    
+    image_paths may be a lazy iterable (see discover_images); images are
+    classified while it is still being consumed. Each result is appended to
+    a JSONL file as soon as its batch finishes, so memory stays flat and an
+    interrupted run can continue with resume=True.
+    
+    Returns:
+        dict with counts of analyzed images, errors, skipped (resumed) images
+        and predictions per class
+    """
     print(f"\n{'='*70}")
-    print(f"BATCH PREDICTION - {len(image_paths)} images")
+    print("BATCH PREDICTION")
     print(f"{'='*70}")
     
-    results = detector.predict_batch(image_paths)
+    if save_results and output_file is None:
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output_file = f"pollution_predictions_{timestamp}.jsonl"
+    
+    summary = {'analyzed': 0, 'errors': 0, 'skipped': 0, 'classes': {}}
+    if resume:
+        done = PredictionLog.completed_paths(output_file)
+        print(f"Resuming: {len(done)} image(s) already in {output_file}")
+        
+        def remaining(paths):
+            for path in paths:
+                if os.path.normpath(path) in done:
+                    summary['skipped'] += 1
+                else:
+                    yield path
+        image_paths = remaining(image_paths)
+    
+    predict_kwargs = dict(
+        batch_size=batch_size,
+        confidence_threshold=confidence_threshold,
+        num_workers=num_workers,
+        prefetch=prefetch,
+        use_processes=use_processes
+    )
+    if dedup_index is not None:
+        # One forward pass per near-duplicate group (needs the full path list)
+        results = predict_deduplicated(detector, image_paths, index=dedup_index, **predict_kwargs)
+    else:
+        results = detector.iter_predictions(image_paths, **predict_kwargs)
     
-    # Print summary
+    # Print results as they arrive
     print("\nPrediction Summary:")
     print("-" * 70)
     
-    for i, result in enumerate(results, 1):
-        if 'error' in result:
-            print(f"\n{i}. {os.path.basename(result['image_path'])}")
-            print(f"   ❌ Error: {result['error']}")
-        else:
-            status = "✅" if result['confidence'] >= confidence_threshold else "⚠️"
-            print(f"\n{i}. {os.path.basename(result['image_path'])}")
-            print(f"   {status} {result['predicted_class'].upper()} ({result['confidence']:.2%})")
+    log = PredictionLog(output_file, fsync_interval, append=resume) if save_results else None
+    duplicates = 0
+    groups = set()
+    start_time = datetime.now()
+    try:
+        for i, result in enumerate(results, 1):
+            if log is not None:
+                log.write(result)
+            summary['analyzed'] += 1
     
-    # Save results to JSON
-    if save_results:
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        output_file = f"pollution_predictions_{timestamp}.json"
+            if 'error' in result:
+                summary['errors'] += 1
+                print(f"\n{i}. {os.path.basename(result['image_path'])}")
+                print(f"   ❌ Error: {result['error']}")
+            else:
+                predicted = result['predicted_class']
+                summary['classes'][predicted] = summary['classes'].get(predicted, 0) + 1
+                status = "✅" if result['confidence'] >= confidence_threshold else "⚠️"
+                print(f"\n{i}. {os.path.basename(result['image_path'])}")
+                print(f"   {status} {predicted.upper()} ({result['confidence']:.2%})")
+                if 'duplicate_of' in result:
+                    duplicates += 1
+                    print(f"   ↳ near-duplicate of {os.path.basename(result['duplicate_of'])}")
+                if 'duplicate_group' in result:
+                    groups.add(result['duplicate_group'])
         
-        with open(output_file, 'w') as f:
-            json.dump(results, f, indent=2)
+            if progress_every and i % progress_every == 0:
+                seconds = (datetime.now() - start_time).total_seconds()
+                print(f"\n--- {i} images analyzed ({i / seconds:.1f} images/sec, "
+                      f"{summary['errors']} errors) ---")
+    finally:
+        if log is not None:
+            log.close()
         
+    print(f"\nAnalyzed {summary['analyzed']} image(s)"
+          + (f", skipped {summary['skipped']} already in the output" if resume else ""))
+    for class_name, count in sorted(summary['classes'].items()):
+        print(f"  {class_name:20s}: {count}")
+    if summary['errors']:
+        print(f"  {'errors':20s}: {summary['errors']}")
+    if dedup_index is not None:
+        print(f"\nNear-duplicates: {duplicates} of {summary['analyzed']} images reused a result "
+              f"({len(groups)} groups, {summary['analyzed'] - duplicates} classified)")
+    
+    if log is not None:
         print(f"\n{'='*70}")
-        print(f"Results saved to: {output_file}")
+        print(f"Results saved to: {output_file} ({log.written} new lines)")
         print(f"{'='*70}")
     
-    return results
+    return summary
 
 
 def main(args):
@@ -80,39 +157,82 @@ def main(args):
         print("Please train the model first or provide a valid model path.")
         sys.exit(1)
     
+    if not os.path.exists(args.input):
+        print(f"\nERROR: Invalid input path: {args.input}")
+        sys.exit(1)
+    
+    sharded = args.processes > 1 and os.path.isdir(args.input)
+    if sharded and args.dedup:
+        print("\nERROR: --dedup needs every path in one process; use --processes 1")
+        sys.exit(1)
+    if args.cascade_model:
+        if sharded:
+            print("\nERROR: --cascade_model runs in one process; use --processes 1")
+            sys.exit(1)
+        if not os.path.exists(args.cascade_model):
+            print(f"\nERROR: Cascade model file not found: {args.cascade_model}")
+            sys.exit(1)
+    
     # Initialize detector
-    print(f"\nLoading model from: {args.model_path}")
-    detector = PollutionDetector()
-    detector.load_model(args.model_path)
+    if sharded:
+        detector = ShardedPredictor(
+            args.model_path,
+            num_processes=args.processes,
+            threads_per_process=args.threads_per_process,
+            shard_size=args.shard_size,
+            draft_decode=args.draft_decode,
+            cache_path=args.cache_path if args.use_cache else None,
+            cache_size=args.cache_size
+        )
+        print(f"\nStarting {detector.num_processes} worker processes "
+              f"({detector.threads_per_process} threads each) with model: {args.model_path}")
+        detector.start()
+    else:
+        print(f"\nLoading model from: {args.model_path}")
+        if args.model_path.endswith('.tflite'):
+            detector = TFLitePollutionDetector(num_threads=args.num_threads)
+        else:
+            detector = PollutionDetector()
+        detector.load_model(args.model_path)
+        detector.draft_decode = args.draft_decode
+        if args.cascade_model:
+            print(f"Loading first-stage model from: {args.cascade_model}")
+            cascade_size = (args.cascade_img_size, args.cascade_img_size) if args.cascade_img_size else None
+            small = load_stage(args.cascade_model, cascade_size, args.num_threads)
+            detector = CascadePollutionDetector(small, detector, threshold=args.cascade_threshold)
+            print(f"Cascade: images below {args.cascade_threshold:.0%} first-stage confidence go to the full model")
+        if args.cache_path and args.use_cache:
+            detector.cache = PredictionCache(args.cache_path, max_entries=args.cache_size)
     print("✓ Model loaded successfully!")
     
-    # Get image paths
-    if os.path.isfile(args.input):
-        # Single image
-        image_paths = [args.input]
-    elif os.path.isdir(args.input):
-        # Directory of images
-        image_paths = []
-        for ext in ['*.jpg', '*.jpeg', '*.png', '*.bmp', '*.webp']:
-            image_paths.extend(glob(os.path.join(args.input, ext)))
-            image_paths.extend(glob(os.path.join(args.input, ext.upper())))
-        
-        if not image_paths:
-            print(f"\nERROR: No image files found in: {args.input}")
+    modified_since = None
+    if args.modified_since:
+        try:
+            modified_since = parse_modified_since(args.modified_since)
+        except ValueError as e:
+            print(f"\nERROR: {e}")
             sys.exit(1)
-    else:
-        print(f"\nERROR: Invalid input path: {args.input}")
+    
+    if args.manifest:
+        if not os.path.exists(args.manifest):
+            print(f"\nERROR: Image manifest not found: {args.manifest} (run prepare_data.py --task manifest)")
+            sys.exit(1)
+        if args.include or args.exclude:
+            print("\nERROR: --include/--exclude filter the directory walk; they do not apply with --manifest")
+            sys.exit(1)
+    
+    if args.resume and not (args.output and args.save_results):
+        print("\nERROR: --resume needs the --output file of the interrupted run")
         sys.exit(1)
     
-    print(f"\nFound {len(image_paths)} image(s) to analyze")
     print(f"Confidence threshold: {args.confidence_threshold:.2%}")
     
     # Perform predictions
-    if len(image_paths) == 1:
+    if os.path.isfile(args.input):
         # Single image prediction
         result = predict_single_image(
             detector, 
-            image_paths[0], 
+            args.input,
             args.confidence_threshold
         )
         
@@ -124,13 +244,78 @@ def main(args):
                 json.dump(result, f, indent=2)
             print(f"\nResult saved to: {output_file}")
     else:
+        dedup_index = None
+        if args.dedup:
+            if args.dedup_index and os.path.exists(args.dedup_index):
+                dedup_index = NearDuplicateIndex.load(args.dedup_index)
+                print(f"Loaded near-duplicate index: {dedup_index.size} fingerprints")
+            else:
+                dedup_index = NearDuplicateIndex(max_distance=args.dedup_distance)
+        
+        if args.manifest and os.path.isdir(args.input):
+            # Listed from the index: no directory walk, and known-corrupt files never reach the decoder
+            manifest = ImageManifest(args.manifest)
+            try:
+                image_paths = manifest.image_paths(args.input, recursive=args.recursive, modified_since=modified_since)
+            except ValueError as e:
+                print(f"\nERROR: {e}")
+                sys.exit(1)
+            corrupt = manifest.corrupt(args.input)
+            print(f"\n{len(image_paths)} images from manifest {args.manifest}"
+                  f"{'' if args.recursive else ' (top level only)'}")
+            if corrupt:
+                print(f"⚠️  Skipping {len(corrupt)} images the manifest marks as corrupt")
+        else:
+            # Paths are listed lazily, so inference starts while the walk continues
+            print(f"\nStreaming images from {args.input}{'' if args.recursive else ' (top level only)'}")
+            image_paths = discover_images(
+                args.input,
+                include=args.include,
+                exclude=args.exclude,
+                modified_since=modified_since,
+                recursive=args.recursive,
+                extensions=IMAGE_EXTENSIONS,
+                on_error=lambda e: print(f"⚠️  Skipping unreadable path: {e}")
+            )
+        
         # Batch prediction
-        results = predict_batch(
-            detector, 
-            image_paths, 
-            args.confidence_threshold,
-            save_results=args.save_results
-        )
+        try:
+            summary = predict_batch(
+                detector,
+                image_paths,
+                args.confidence_threshold,
+                save_results=args.save_results,
+                batch_size=args.batch_size,
+                num_workers=args.num_workers,
+                prefetch=args.prefetch,
+                use_processes=args.decode_processes,
+                dedup_index=dedup_index,
+                output_file=args.output,
+                resume=args.resume,
+                fsync_interval=args.fsync_interval,
+                progress_every=args.progress_every
+            )
+        finally:
+            if sharded:
+                detector.close()
+        
+        if dedup_index is not None and args.dedup_index:
+            dedup_index.save(args.dedup_index)
+            print(f"Near-duplicate index saved to: {args.dedup_index}")
+        
+        if summary['analyzed'] + summary['skipped'] == 0:
+            print(f"\nERROR: No matching image files found in: {args.input}")
+            sys.exit(1)
+    
+    if args.cascade_model:
+        stats = detector.summary()
+        print(f"\nCascade: {stats['escalated']} of {stats['images']} images escalated "
+              f"({stats['escalated_fraction']:.1%}), {stats['ms_per_image']:.2f} ms/image in forward passes")
+    
+    if detector.cache is not None:
+        stats = detector.cache.stats()
+        print(f"\nPrediction cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_rate']:.1%} hit rate), {stats['entries']} entries in {args.cache_path}")
     
     print("\n" + "="*70)
     print("PREDICTION COMPLETE!")
@@ -149,6 +334,21 @@ Examples:
   # Predict all images in directory
   python predict_pollution.py --model pollution_detector_model.h5 --input ./images/
   
+  # Nested report archive: only this year's photos from the last week, no thumbnails
+  python predict_pollution.py --model model.h5 --input ./reports/ --include "2024-*/*" --exclude thumbnails --modified_since 7d
+  
+  # Long run with a fixed results file; rerun with --resume after an interruption
+  python predict_pollution.py --model model.h5 --input ./reports/ --output reports.jsonl --resume
+  
+  # Daily run over a growing folder: images seen before come from the prediction cache
+  python predict_pollution.py --model model.h5 --input ./reports/ --cache_path ~/.cache/pollution_predictions.db
+  
+  # Big CPU box: 8 worker processes with 2 threads each, one ordered results file
+  python predict_pollution.py --model model.h5 --input ./reports/ --processes 8 --threads_per_process 2
+  
+  # Cascade: a narrow 96x96 model first, the full model only below 85% confidence
+  python predict_pollution.py --model model.h5 --input ./reports/ --cascade_model small_96.h5 --cascade_threshold 0.85
+  
   # Use custom confidence threshold
   python predict_pollution.py --model model.h5 --input image.jpg --confidence 0.8
         """
@@ -158,7 +358,56 @@ Examples:
         '--model_path',
         type=str,
         default='pollution_detector_model.h5',
-        help='Path to trained model file (default: pollution_detector_model.h5)'
+        help='Path to trained model file, .h5 or INT8 .tflite from export_tflite.py (default: pollution_detector_model.h5)'
+    )
+    
+    parser.add_argument(
+        '--num_threads',
+        type=int,
+        default=None,
+        help='Interpreter threads for .tflite models (default: one per CPU)'
+    )
+    
+    parser.add_argument(
+        '--processes',
+        type=int,
+        default=1,
+        help='Worker processes for directory input, each with its own model copy (default: 1)'
+    )
+    
+    parser.add_argument(
+        '--threads_per_process',
+        type=int,
+        default=None,
+        help='Intra-op threads per worker process (default: CPUs divided among the workers)'
+    )
+    
+    parser.add_argument(
+        '--shard_size',
+        type=int,
+        default=128,
+        help='Images handed to a worker process at a time (default: 128)'
+    )
+    
+    parser.add_argument(
+        '--cascade_model',
+        type=str,
+        default=None,
+        help='Small first-stage model (Keras or .tflite); only uncertain images run through --model_path'
+    )
+    
+    parser.add_argument(
+        '--cascade_threshold',
+        type=float,
+        default=0.8,
+        help='First-stage confidence below which an image goes to the full model (default: 0.8)'
+    )
+    
+    parser.add_argument(
+        '--cascade_img_size',
+        type=int,
+        default=None,
+        help='Required first-stage input size for .tflite cascade models (default: read from the model)'
     )
     
     parser.add_argument(
@@ -168,6 +417,50 @@ Examples:
         help='Path to image file or directory containing images'
     )
     
+    parser.add_argument(
+        '--recursive',
+        action='store_true',
+        default=True,
+        help='Search subdirectories of a directory input (default: True)'
+    )
+    
+    parser.add_argument(
+        '--no_recursive',
+        dest='recursive',
+        action='store_false',
+        help='Only use images directly inside the input directory'
+    )
+    
+    parser.add_argument(
+        '--include',
+        type=str,
+        action='append',
+        default=None,
+        help='Only analyze files whose relative path or name matches this pattern (repeatable, e.g. "2024-*/*")'
+    )
+    
+    parser.add_argument(
+        '--exclude',
+        type=str,
+        action='append',
+        default=None,
+        help='Skip files and directories matching this pattern (repeatable, e.g. "thumbnails")'
+    )
+    
+    parser.add_argument(
+        '--manifest',
+        type=str,
+        default=None,
+        help='Image manifest from prepare_data.py --task manifest; lists the directory from it and skips corrupt files'
+    )
+    
+    parser.add_argument(
+        '--modified_since',
+        type=str,
+        default=None,
+        help='Only analyze files modified since an ISO date/time or an age like 12h or 7d'
+    )
+    
     parser.add_argument(
         '--confidence_threshold',
         type=float,
@@ -175,11 +468,93 @@ Examples:
         help='Minimum confidence threshold for predictions (default: 0.6)'
     )
     
+    parser.add_argument(
+        '--batch_size',
+        type=int,
+        default=None,
+        help='Images per forward pass for directory input (default: from inference_profile.json, else 32)'
+    )
+    
+    parser.add_argument(
+        '--num_workers',
+        type=int,
+        default=None,
+        help='Image decode workers, 0 decodes inline (default: one per CPU; with --processes, one per worker thread)'
+    )
+    
+    parser.add_argument(
+        '--prefetch',
+        type=int,
+        default=2,
+        help='Batches decoded ahead of inference (default: 2)'
+    )
+    
+    parser.add_argument(
+        '--decode_processes',
+        action='store_true',
+        help='Decode images in worker processes instead of threads'
+    )
+    
+    parser.add_argument(
+        '--draft_decode',
+        action='store_true',
+        default=True,
+        help='Decode JPEGs at reduced resolution before resizing (default: True)'
+    )
+    
+    parser.add_argument(
+        '--full_decode',
+        dest='draft_decode',
+        action='store_false',
+        help='Always decode images at full resolution'
+    )
+    
+    parser.add_argument(
+        '--cache_path',
+        type=str,
+        default=None,
+        help='Prediction cache database; reuses predictions for previously seen images (default: no cache)'
+    )
+    
+    parser.add_argument(
+        '--cache_size',
+        type=int,
+        default=100000,
+        help='Cached predictions kept before LRU eviction (default: 100000)'
+    )
+    
+    parser.add_argument(
+        '--no_cache',
+        dest='use_cache',
+        action='store_false',
+        help='Ignore --cache_path and always run the model'
+    )
+    
+    parser.add_argument(
+        '--dedup',
+        action='store_true',
+        help='Classify one image per near-duplicate group and share the result'
+    )
+    
+    parser.add_argument(
+        '--dedup_distance',
+        type=int,
+        default=6,
+        help='Max Hamming distance (of 64 bits) between near-duplicates (default: 6)'
+    )
+    
+    parser.add_argument(
+        '--dedup_index',
+        type=str,
+        default=None,
+        help='Near-duplicate index file (.npz) kept across runs'
+    )
+    
     parser.add_argument(
         '--save_results',
         action='store_true',
         default=True,
-        help='Save prediction results to JSON file (default: True)'
+        help='Save prediction results to a JSON (single image) or JSONL file (default: True)'
     )
     
     parser.add_argument(
@@ -189,5 +564,32 @@ Examples:
         help='Do not save prediction results'
     )
     
+    parser.add_argument(
+        '--output',
+        type=str,
+        default=None,
+        help='JSONL results file for directory input (default: pollution_predictions_<timestamp>.jsonl)'
+    )
+    
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Append to --output and skip images that already have a result in it'
+    )
+    
+    parser.add_argument(
+        '--fsync_interval',
+        type=float,
+        default=10.0,
+        help='Seconds between fsyncs of the results file (default: 10)'
+    )
+    
+    parser.add_argument(
+        '--progress_every',
+        type=int,
+        default=1000,
+        help='Print a throughput line every N images, 0 disables (default: 1000)'
+    )
+    
     args = parser.parse_args()
     main(args)
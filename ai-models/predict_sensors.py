@@ -12,6 +12,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime
 from sensor_predictor import SensorPredictor
+from sensor_backfill import SensorBackfill
 
 
 def plot_predictions(historical_data, predictions_df, sensor_name=None, save_path=None):
@@ -89,6 +90,45 @@ def load_sensor_data(data_path):
     return df
 
 
+def run_backfill(args, predictor, sensor_data):
+    """Forecast from every origin in the history and stream results to CSV"""
+    output_file = args.backfill_output or f"sensor_backfill_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    
+    print(f"\nBackfilling forecasts for every origin...")
+    print(f"  - Output: {output_file}")
+    print(f"  - Batch size: {args.batch_size or predictor.batch_size}")
+    print(f"  - Origin stride: {args.origin_stride}")
+    print(f"  - Workers: {args.workers}")
+    print(f"  - Resume: {args.resume}")
+    
+    backfill = SensorBackfill(
+        model_path=args.model_path,
+        scaler_path=args.scaler_path,
+        config_path=args.config_path,
+        batch_size=args.batch_size,
+        origin_stride=args.origin_stride
+    )
+    
+    start_time = datetime.now()
+    summary = backfill.run(
+        sensor_data,
+        output_file,
+        workers=args.workers,
+        resume=args.resume,
+        predictor=predictor if args.workers <= 1 else None
+    )
+    duration = (datetime.now() - start_time).total_seconds()
+    
+    print("\n✓ Backfill complete!")
+    print(f"  - Origins in history: {summary['origins']}")
+    if summary['skipped']:
+        print(f"  - Origins skipped (window crosses an unfilled gap): {summary['skipped']}")
+    print(f"  - Origins forecast this run: {summary['forecast']}")
+    if duration > 0:
+        print(f"  - Throughput: {summary['forecast'] / duration:.1f} origins/sec")
+    print(f"  - Results saved to: {summary['output']}")
+
+
 def main(args):
     """Main prediction function"""
     print("="*70)
@@ -138,6 +178,23 @@ def main(args):
         print(f"Need at least {predictor.sequence_length} timesteps, but got {len(sensor_data)}")
         sys.exit(1)
     
+    # Backfill mode: forecast from every historical origin instead of the tail
+    if args.backfill:
+        run_backfill(args, predictor, sensor_data)
+        return
+    
+    # Same grid and gap filling as the training data
+    sensor_data, valid_rows = predictor.regularize(sensor_data)
+    if valid_rows is not None:
+        print(f"\nResampled onto the training grid ({predictor.resampling['freq']}): {len(sensor_data)} rows")
+        if len(sensor_data) < predictor.sequence_length:
+            print(f"\nERROR: Need at least {predictor.sequence_length} grid steps, but got {len(sensor_data)}")
+            sys.exit(1)
+        if not valid_rows[-predictor.sequence_length:].all():
+            print(f"\nERROR: The last {predictor.sequence_length} grid steps cross a gap longer than "
+                  f"{predictor.resampling['max_fill_steps']} steps; no forecast from an incomplete window")
+            sys.exit(1)
+    
     # Use last N timesteps for prediction
     recent_data = sensor_data.tail(predictor.sequence_length)
     
@@ -244,6 +301,9 @@ Examples:
   
   # Generate plot
   python predict_sensors.py --data sensor_data.csv --plot
+  
+  # Backfill forecasts for every origin in a long history using 4 processes
+  python predict_sensors.py --data_path history.csv --backfill --workers 4
         """
     )
     
@@ -317,5 +377,54 @@ Examples:
         help='Specific sensor to plot (default: plot all)'
     )
     
+    parser.add_argument(
+        '--backfill',
+        action='store_true',
+        default=False,
+        help='Forecast from every origin timestamp in the data instead of the tail'
+    )
+    
+    parser.add_argument(
+        '--backfill_output',
+        type=str,
+        default=None,
+        help='CSV file for backfilled forecasts (default: sensor_backfill_<timestamp>.csv)'
+    )
+    
+    parser.add_argument(
+        '--batch_size',
+        type=int,
+        default=None,
+        help='Windows per forward pass in backfill mode (default: from inference_profile.json, else 256)'
+    )
+    
+    parser.add_argument(
+        '--origin_stride',
+        type=int,
+        default=1,
+        help='Forecast from every Nth origin in backfill mode (default: 1)'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Worker processes to split backfill origins across (default: 1)'
+    )
+    
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        default=True,
+        help='Resume an interrupted backfill from its last completed origin (default: True)'
+    )
+    
+    parser.add_argument(
+        '--no_resume',
+        dest='resume',
+        action='store_false',
+        help='Start the backfill from scratch'
+    )
+    
     args = parser.parse_args()
     main(args)
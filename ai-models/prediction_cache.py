@@ -0,0 +1,155 @@
+"""
+Persistent Prediction Cache
+Content-addressed, size-bounded store of pollution predictions shared by runs and processes
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+
+
+class PredictionCache:
+    """
+    SQLite-backed cache of class probabilities
+    
+    Entries are keyed by (hash of the image bytes, model identity), so renamed
+    or re-uploaded copies of a photo hit the cache while a retrained model
+    never sees stale results. Least recently used entries are evicted once
+    max_entries is exceeded. The database runs in WAL mode, so several worker
+    processes can read and write it at the same time; each thread and process
+    opens its own connection.
+    """
+    
+    def __init__(self, path='pollution_predictions.db', max_entries=100_000, timeout=30.0):
+        """
+        Args:
+            path: SQLite database file (created if missing)
+            max_entries: Entries kept before LRU eviction
+            timeout: Seconds to wait on a lock held by another process
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._touched = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                "image_hash TEXT NOT NULL, model_id TEXT NOT NULL, "
+                "probabilities TEXT NOT NULL, last_used REAL NOT NULL, "
+                "PRIMARY KEY (image_hash, model_id)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON predictions (last_used)")
+    
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        # A forked child must not reuse its parent's connection
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+    
+    def __getstate__(self):
+        # Connections, locks and counters stay with the owning process
+        return {'path': self.path, 'max_entries': self.max_entries, 'timeout': self.timeout}
+    
+    def __setstate__(self, state):
+        self.__init__(**state)
+    
+    @staticmethod
+    def hash_file(image_path, chunk_size=1 << 20):
+        """SHA-256 of a file's bytes"""
+        digest = hashlib.sha256()
+        with open(image_path, 'rb') as f:
+            for block in iter(lambda: f.read(chunk_size), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def get(self, image_hash, model_id):
+        """
+        Look up cached probabilities
+        
+        Returns:
+            List of class probabilities, or None on a miss
+        """
+        row = self._connect().execute(
+            "SELECT probabilities FROM predictions WHERE image_hash = ? AND model_id = ?",
+            (image_hash, model_id)
+        ).fetchone()
+        
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            # Recency updates are written in bulk by flush()
+            self._touched[(image_hash, model_id)] = time.time()
+        return json.loads(row[0])
+    
+    def put_many(self, items, model_id):
+        """
+        Store predictions in one transaction
+        
+        Args:
+            items: Iterable of (image_hash, probabilities)
+            model_id: Identity of the model that produced them
+        """
+        now = time.time()
+        rows = [
+            (image_hash, model_id, json.dumps([float(p) for p in probabilities]), now)
+            for image_hash, probabilities in items
+        ]
+        if not rows:
+            return
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO predictions (image_hash, model_id, probabilities, last_used) "
+                "VALUES (?, ?, ?, ?)", rows
+            )
+    
+    def flush(self):
+        """Write pending recency updates and evict down to max_entries"""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+        conn = self._connect()
+        with conn:
+            if touched:
+                conn.executemany(
+                    "UPDATE predictions SET last_used = ? WHERE image_hash = ? AND model_id = ?",
+                    [(last_used, image_hash, model_id) for (image_hash, model_id), last_used in touched.items()]
+                )
+            excess = conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM predictions WHERE (image_hash, model_id) IN ("
+                    "SELECT image_hash, model_id FROM predictions ORDER BY last_used LIMIT ?)",
+                    (excess,)
+                )
+    
+    def clear(self):
+        """Remove every entry"""
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM predictions")
+    
+    def stats(self):
+        """Hit/miss counters of this process and the current entry count"""
+        entries = self._connect().execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries
+        }
@@ -0,0 +1,112 @@
+"""
+Incremental Prediction Log
+Line-delimited JSON results written as they are produced, so long runs can resume
+"""
+
+import os
+import json
+import time
+
+
+class PredictionLog:
+    """
+    JSONL file of prediction results, one object per line
+    
+    Lines are written as results arrive and fsynced every fsync_interval
+    seconds (and on close), so a crash loses at most the last few seconds.
+    The file can be followed with `tail -f` or counted with `wc -l` while
+    the run is going. Reopened with append=True (resuming), error results and
+    a line cut short by a crash are removed before new results follow the old
+    ones; the failed images are predicted again, so every image has exactly
+    one line.
+    """
+    
+    def __init__(self, path, fsync_interval=10.0, append=False):
+        """
+        Args:
+            path: Output .jsonl file
+            fsync_interval: Seconds between fsyncs (0 = after every write)
+            append: Continue an existing file (resume) instead of overwriting it
+        """
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.written = 0
+        if append:
+            self._compact()
+        # Line buffered, so every result is visible to readers right away
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8', buffering=1)
+        self._last_sync = time.monotonic()
+    
+    @staticmethod
+    def _parse_result(line):
+        """The result on a log line, or None for an error result or a partial line"""
+        try:
+            result = json.loads(line)
+        except ValueError:
+            # Partial last line of an interrupted run
+            return None
+        if not isinstance(result, dict) or 'error' in result or 'image_path' not in result:
+            return None
+        return result
+    
+    def _compact(self):
+        """Drop error results and a partial last line, so retried images are not listed twice"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8', errors='replace') as f:
+            if all(self._parse_result(line) is not None for line in f):
+                return
+        
+        temp_path = self.path + '.tmp'
+        with open(self.path, encoding='utf-8', errors='replace') as src, \
+                open(temp_path, 'w', encoding='utf-8') as dst:
+            for line in src:
+                if self._parse_result(line) is not None:
+                    dst.write(line.rstrip('\n') + '\n')
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(temp_path, self.path)
+    
+    @staticmethod
+    def completed_paths(path):
+        """
+        Image paths that already have a result in a log file
+        
+        Error results do not count, so images that failed (e.g. a transient
+        read error) are predicted again on resume; opening the log with
+        append=True removes their old error lines.
+        
+        Returns:
+            set of normalized paths (empty if the file does not exist)
+        """
+        done = set()
+        if not os.path.exists(path):
+            return done
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                result = PredictionLog._parse_result(line)
+                if result is not None:
+                    done.add(os.path.normpath(result['image_path']))
+        return done
+    
+    def write(self, result):
+        self._file.write(json.dumps(result) + '\n')
+        self.written += 1
+        if time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+    
+    def sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_sync = time.monotonic()
+    
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
@@ -5,12 +5,102 @@ This script helps prepare data for both pollution detection and sensor predictio
 """
 
 import os
+import sys
 import json
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import shutil
+import csv
+import errno
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from sensor_validator import SensorDataValidator
+from sensor_data_generator import SyntheticSensorGenerator, SENSOR_PROFILES
+from image_shards import ImageShardWriter
+from image_pipeline import IMAGE_EXTENSIONS, read_split_manifest
+from image_manifest import ImageManifest, MANIFEST_PATH, path_labels
+
+
+SPLIT_MODES = ('hardlink', 'symlink', 'copy', 'manifest')
+
+
+def _file_names(directory):
+    """Names of the entries in directory (empty if it does not exist)"""
+    try:
+        return {entry.name for entry in os.scandir(directory)}
+    except FileNotFoundError:
+        return set()
+
+
+def _read_split_assignment(dest_dir):
+    """
+    {class: {file name: split}} of an earlier split into dest_dir
+    
+    Read from its manifests, or from the train/ and validation/ folders of
+    splits made before manifests were written.
+    """
+    assigned = {}
+    for split in ('train', 'validation'):
+        manifest_path = os.path.join(dest_dir, f'{split}.csv')
+        if os.path.exists(manifest_path):
+            paths, labels, class_names = read_split_manifest(manifest_path)
+            for path, label in zip(paths, labels):
+                assigned.setdefault(class_names[label], {})[os.path.basename(path)] = split
+            continue
+        split_dir = os.path.join(dest_dir, split)
+        if os.path.isdir(split_dir):
+            for entry in os.scandir(split_dir):
+                if entry.is_dir():
+                    for name in _file_names(entry.path):
+                        assigned.setdefault(entry.name, {})[name] = split
+    return assigned
+
+
+def _write_split_manifest(path, rows):
+    """Write (source path, class) rows atomically"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['path', 'class'])
+        writer.writerows(rows)
+    os.replace(tmp_path, path)
+
+
+def _place_files(pairs, mode, workers=None):
+    """
+    Hardlink, symlink or copy (source, destination) pairs on a thread pool
+    
+    A link that the filesystem refuses (different device, no link support,
+    permissions) falls back to a copy, and later files go straight to
+    copying.
+    
+    Returns:
+        dict mapping 'hardlinked' / 'symlinked' / 'copied' to file counts
+    """
+    link = {'hardlink': os.link, 'symlink': lambda src, dst: os.symlink(os.path.abspath(src), dst)}.get(mode)
+    state = {'link': link}
+    
+    def place(pair):
+        src, dst = pair
+        if state['link'] is not None:
+            try:
+                state['link'](src, dst)
+                return 'hardlinked' if mode == 'hardlink' else 'symlinked'
+            except OSError as e:
+                if e.errno in (errno.EXDEV, errno.EPERM, errno.EACCES, errno.ENOTSUP, errno.EMLINK):
+                    state['link'] = None
+                else:
+                    raise
+        shutil.copy2(src, dst)
+        return 'copied'
+    
+    counts = {}
+    # Linking and copying are IO-bound; threads overlap the syscalls
+    with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) * 4)) as pool:
+        for how in pool.map(place, pairs):
+            counts[how] = counts.get(how, 0) + 1
+    return counts
 
 
 class DataPreparator:
@@ -62,64 +152,120 @@ class DataPreparator:
         return dirs
     
     @staticmethod
-    def split_images_train_val(source_dir, dest_dir, val_split=0.2, seed=42):
+    def split_images_train_val(source_dir, dest_dir, val_split=0.2, seed=42, mode='hardlink', workers=None,
+                               manifest=None):
         """
         Split images into train and validation sets
         
+        Files are hardlinked (or symlinked) into dest_dir/train and
+        dest_dir/validation where the filesystem allows, so the split takes
+        no extra space; otherwise they are copied on a thread pool. Hardlinked
+        files share their contents with the source, so edit neither in place.
+        With mode='manifest' no files are written at all: dest_dir/train.csv
+        and dest_dir/validation.csv list the source paths, and can be passed
+        as --train_dir / --val_dir.
+        
+        The manifests are written in every mode and record the assignment.
+        Rerunning after images were added to source_dir only places the new
+        ones, choosing their split so the totals stay close to val_split.
+        
         Args:
             source_dir: Directory containing subdirectories for each class
             dest_dir: Destination directory for split dataset
             val_split: Fraction of data for validation (default: 0.2)
             seed: Random seed for reproducibility
+            mode: 'hardlink', 'symlink', 'copy' or 'manifest'
+            workers: Threads for linking/copying (None = IO-bound default)
+            manifest: ImageManifest that has scanned source_dir; files are
+                listed from it and images it found corrupt are left out
+        
+        Returns:
+            dict with per-split class counts, plus 'added' and 'placed'
+            (how many files were hardlinked, symlinked or copied)
         """
-        import random
-        random.seed(seed)
+        if mode not in SPLIT_MODES:
+            raise ValueError(f"Unknown split mode: {mode} (use {', '.join(SPLIT_MODES)})")
+        rng = np.random.default_rng(seed)
         
         print(f"\nSplitting images from: {source_dir}")
-        print(f"Destination: {dest_dir}")
+        print(f"Destination: {dest_dir} ({mode})")
         print(f"Validation split: {val_split:.0%}")
         
-        # Get class directories
-        classes = [d for d in os.listdir(source_dir) 
-                  if os.path.isdir(os.path.join(source_dir, d))]
+        os.makedirs(dest_dir, exist_ok=True)
+        assigned = _read_split_assignment(dest_dir)
+        
+        # Get class directories and their images
+        if manifest is not None:
+            paths, labels, classes = manifest.class_files(source_dir)
+            listing = {class_name: [] for class_name in classes}
+            for path, label in zip(paths, labels):
+                if path.lower().endswith(IMAGE_EXTENSIONS):
+                    listing[classes[label]].append(os.path.basename(path))
+        else:
+            classes = sorted(entry.name for entry in os.scandir(source_dir) if entry.is_dir())
+            listing = {
+                class_name: [
+                    entry.name for entry in os.scandir(os.path.join(source_dir, class_name))
+                    if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS)
+                ]
+                for class_name in classes
+            }
         
-        stats = {'train': {}, 'validation': {}}
+        stats = {'train': {}, 'validation': {}, 'added': 0, 'placed': {}}
+        split_rows = {'train': [], 'validation': []}
+        pending = []
         
         for class_name in classes:
             class_path = os.path.join(source_dir, class_name)
             
-            # Get all image files
-            image_files = [f for f in os.listdir(class_path)
-                          if f.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp', '.webp'))]
+            image_files = sorted(listing[class_name])
             
-            # Shuffle and split
-            random.shuffle(image_files)
-            split_idx = int(len(image_files) * (1 - val_split))
+            known = assigned.get(class_name, {})
+            new_files = [f for f in image_files if f not in known]
+            split_of = {f: known[f] for f in image_files if f in known}
             
-            train_files = image_files[:split_idx]
-            val_files = image_files[split_idx:]
+            # Shuffle the new files; enough go to train to bring it back to 1 - val_split
+            rng.shuffle(new_files)
+            train_target = int(len(image_files) * (1 - val_split))
+            kept_train = sum(1 for split in split_of.values() if split == 'train')
+            new_train = min(len(new_files), max(0, train_target - kept_train))
+            for i, f in enumerate(new_files):
+                split_of[f] = 'train' if i < new_train else 'validation'
             
-            # Create destination directories
-            train_dest = os.path.join(dest_dir, 'train', class_name)
-            val_dest = os.path.join(dest_dir, 'validation', class_name)
-            os.makedirs(train_dest, exist_ok=True)
-            os.makedirs(val_dest, exist_ok=True)
-            
-            # Copy files
-            for f in train_files:
-                shutil.copy2(os.path.join(class_path, f), os.path.join(train_dest, f))
-            
-            for f in val_files:
-                shutil.copy2(os.path.join(class_path, f), os.path.join(val_dest, f))
-            
-            stats['train'][class_name] = len(train_files)
-            stats['validation'][class_name] = len(val_files)
+            for split in ('train', 'validation'):
+                files = [f for f in image_files if split_of[f] == split]
+                split_rows[split].extend((os.path.abspath(os.path.join(class_path, f)), class_name) for f in files)
+                stats[split][class_name] = len(files)
+                if mode != 'manifest':
+                    os.makedirs(os.path.join(dest_dir, split, class_name), exist_ok=True)
+            if mode != 'manifest':
+                # New files, plus earlier ones missing from dest_dir (e.g. after a manifest-only run)
+                present = {
+                    split: _file_names(os.path.join(dest_dir, split, class_name))
+                    for split in ('train', 'validation')
+                }
+                pending.extend(
+                    (os.path.join(class_path, f), os.path.join(dest_dir, split_of[f], class_name, f))
+                    for f in image_files if f not in present[split_of[f]]
+                )
+            stats['added'] += len(new_files)
             
             print(f"\n{class_name}:")
-            print(f"  Train: {len(train_files)} images")
-            print(f"  Validation: {len(val_files)} images")
+            print(f"  Train: {stats['train'][class_name]} images")
+            print(f"  Validation: {stats['validation'][class_name]} images")
+            if len(new_files) < len(image_files):
+                print(f"  New since last split: {len(new_files)}")
+        
+        if pending:
+            stats['placed'] = _place_files(pending, mode, workers)
+            print(f"\nPlaced {len(pending)} files: " + ', '.join(f"{n} {how}" for how, n in stats['placed'].items()))
+        
+        for split, rows in split_rows.items():
+            _write_split_manifest(os.path.join(dest_dir, f'{split}.csv'), rows)
         
         print("\n✓ Split complete!")
+        if mode == 'manifest':
+            print(f"  Manifests: {os.path.join(dest_dir, 'train.csv')}, {os.path.join(dest_dir, 'validation.csv')}")
         return stats
     
     @staticmethod
@@ -200,72 +346,152 @@ class DataPreparator:
         return df
     
     @staticmethod
-    def validate_sensor_data(data_file):
+    def validate_sensor_data(data_file, report_path=None, chunksize=500_000):
         """
         Validate sensor data format and check for issues
         
+        Streams the file in chunks, so multi-GB files validate in bounded memory.
+        
         Args:
             data_file: Path to sensor data CSV file
+            report_path: Optional JSON file for the machine-readable report
+            chunksize: Rows read per chunk
+        
+        Returns:
+            True if no errors were found
         """
         print(f"Validating sensor data: {data_file}")
         
-        # Load data
-        df = pd.read_csv(data_file)
+        validator = SensorDataValidator(chunksize=chunksize)
+        report = validator.validate_file(data_file)
+        validator.print_report(report)
         
-        issues = []
+        if report_path:
+            validator.save_report([report], report_path)
+            print(f"\nReport saved to: {report_path}")
         
-        # Check for timestamp column
-        if 'timestamp' not in df.columns:
-            issues.append("❌ Missing 'timestamp' column")
-        else:
-            # Try parsing timestamps
-            try:
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
+        return report['valid']
                 
-                # Check for gaps
-                time_diffs = df['timestamp'].diff()
-                if time_diffs.std() > timedelta(minutes=1):
-                    issues.append("⚠️  Warning: Irregular time intervals detected")
+    @staticmethod
+    def validate_sensor_files(data_files, report_path=None, workers=None, chunksize=500_000):
+        """
+        Validate several sensor data files in parallel (one process per file)
                 
-                # Check for duplicates
-                if df['timestamp'].duplicated().any():
-                    issues.append("❌ Duplicate timestamps found")
+        Args:
+            data_files: List of CSV paths
+            report_path: Optional JSON file for the combined report
+            workers: Number of processes (None = one per CPU)
+            chunksize: Rows read per chunk
                 
-            except Exception as e:
-                issues.append(f"❌ Cannot parse timestamps: {e}")
-        
-        # Check for numeric columns
-        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-        if len(numeric_cols) == 0:
-            issues.append("❌ No numeric sensor columns found")
-        
-        # Check for missing values
-        missing = df.isnull().sum()
-        if missing.any():
-            issues.append(f"⚠️  Missing values found:\n{missing[missing > 0]}")
-        
-        # Check data range
-        if len(df) < 100:
-            issues.append(f"⚠️  Warning: Only {len(df)} samples (recommend 1000+)")
-        
-        # Print results
-        print("\n" + "="*60)
-        print("VALIDATION RESULTS")
-        print("="*60)
-        
-        if issues:
-            print("\nIssues found:")
-            for issue in issues:
-                print(f"  {issue}")
-        else:
-            print("\n✓ All checks passed!")
+        Returns:
+            List of per-file reports
+        """
+        print(f"Validating {len(data_files)} sensor data file(s)...")
+        
+        validator = SensorDataValidator(chunksize=chunksize)
+        reports = validator.validate_files(data_files, workers=workers)
+        for report in reports:
+            validator.print_report(report)
+        
+        if report_path:
+            validator.save_report(reports, report_path)
+            print(f"\nReport saved to: {report_path}")
+        
+        return reports
+
+    @staticmethod
+    def convert_images_to_shards(pollution_dir, shard_dir='pollution_shards',
+                                 img_size=(224, 224), shard_size=1024, workers=None):
+        """
+        Decode train/ and validation/ images once into memory-mapped shards
+        
+        Training then reads pixels straight from the shards instead of
+        decoding JPEGs every epoch. Reruns only convert images added since
+        the last run, appending new shards.
+        
+        Args:
+            pollution_dir: Dataset with train/ and validation/ class folders
+            shard_dir: Output directory (gets train/ and validation/ shard dirs)
+            img_size: (width, height) the model trains at
+            shard_size: Images per shard
+            workers: Decode threads (None = one per CPU)
+        
+        Returns:
+            dict mapping split -> conversion counts
+        """
+        results = {}
+        for split in ['train', 'validation']:
+            source = os.path.join(pollution_dir, split)
+            if not os.path.isdir(source):
+                print(f"  Skipping {split}: {source} not found")
+                continue
+            
+            writer = ImageShardWriter(os.path.join(shard_dir, split), img_size, shard_size, workers)
+            start_time = datetime.now()
+            stats = writer.convert(source)
+            duration = (datetime.now() - start_time).total_seconds()
+            
+            print(f"  {split}: {stats['added']} added, {stats['skipped']} already converted, "
+                  f"{stats['failed']} unreadable ({duration:.1f}s)")
+            results[split] = stats
+        return results
+
+    @staticmethod
+    def build_image_manifest(pollution_dir, manifest_path=MANIFEST_PATH, workers=None, decode=True,
+                             max_listed=10):
+        """
+        Index a dataset into an ImageManifest and print what is in it
         
-        print(f"\nData info:")
-        print(f"  Total samples: {len(df)}")
-        print(f"  Sensor columns: {', '.join(numeric_cols)}")
-        print(f"  Date range: {df['timestamp'].min()} to {df['timestamp'].max()}")
+        Only files that are new or changed (size/mtime) since the last scan
+        are hashed and decoded.
         
-        return len(issues) == 0
+        Args:
+            pollution_dir: Dataset directory (class folders, or train/ and validation/)
+            manifest_path: SQLite manifest file
+            workers: Hash/decode threads (None = one per CPU)
+            decode: Check that pixel data decodes, not only the header
+            max_listed: Corrupt files and duplicate groups printed
+        
+        Returns:
+            (scan counts, summary) dicts
+        """
+        manifest = ImageManifest(manifest_path)
+        start_time = datetime.now()
+        stats = manifest.scan(
+            pollution_dir, workers=workers, decode=decode,
+            on_error=lambda e: print(f"  ⚠️  Skipping unreadable path: {e}")
+        )
+        duration = (datetime.now() - start_time).total_seconds()
+        print(f"  {stats['seen']} images: {stats['added']} added, {stats['updated']} changed, "
+              f"{stats['unchanged']} unchanged, {stats['removed']} removed ({duration:.1f}s)")
+        
+        summary = manifest.summary(pollution_dir)
+        print(f"\n  {summary['valid']} valid images, {summary['total_bytes'] / 1e6:.1f} MB")
+        for split, classes in summary['classes'].items():
+            print(f"  {split}:")
+            for class_name, count in classes.items():
+                print(f"    {class_name or '(no class folder)'}: {count}")
+        if summary['valid']:
+            print(f"  Width {summary['width_range'][0]}-{summary['width_range'][1]} px, "
+                  f"height {summary['height_range'][0]}-{summary['height_range'][1]} px")
+        
+        if summary['corrupt']:
+            print(f"\n  ⚠️  {summary['corrupt']} corrupt images:")
+            for path, error in manifest.corrupt(pollution_dir)[:max_listed]:
+                print(f"    {path}: {error}")
+        if summary['duplicate_groups']:
+            groups = manifest.duplicates(pollution_dir)
+            print(f"\n  {len(groups)} groups of byte-identical images "
+                  f"({sum(len(g) for g in groups) - len(groups)} redundant copies):")
+            for group in groups[:max_listed]:
+                print(f"    {' = '.join(os.path.relpath(p, pollution_dir) for p in group)}")
+            leaked = [
+                g for g in groups
+                if len({path_labels(os.path.relpath(p, pollution_dir))[0] for p in g} - {None}) > 1
+            ]
+            if leaked:
+                print(f"  ⚠️  {len(leaked)} groups are in both train and validation")
+        return stats, summary
 
 
 def main():
@@ -273,14 +499,56 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='Prepare data for EcoNova AI models')
-    parser.add_argument('--task', choices=['pollution', 'sensors', 'both'], 
+    parser.add_argument('--task', choices=['pollution', 'sensors', 'both', 'validate', 'generate', 'shards', 'split', 'manifest'],
                        default='both', help='Which data to prepare')
     parser.add_argument('--pollution_dir', default='pollution_dataset',
                        help='Directory for pollution dataset')
+    parser.add_argument('--source_dir', default=None,
+                       help='Unsplit class folders to split into --pollution_dir (with --task split)')
+    parser.add_argument('--val_split', type=float, default=0.2,
+                       help='Fraction of images for validation (with --task split)')
+    parser.add_argument('--manifest_path', default=None,
+                       help=f'Image manifest database: written by --task manifest (default: {MANIFEST_PATH}), '
+                            'read by --task split instead of listing --source_dir')
+    parser.add_argument('--no_decode_check', dest='decode_check', action='store_false',
+                       help='With --task manifest, only read image headers instead of decoding pixels')
+    parser.add_argument('--split_mode', choices=['hardlink', 'symlink', 'copy', 'manifest'], default='hardlink',
+                       help='Link, copy, or only write train.csv/validation.csv manifests (default: hardlink)')
     parser.add_argument('--sensor_file', default='synthetic_sensor_data.csv',
                        help='Output file for sensor data')
     parser.add_argument('--samples', type=int, default=2000,
                        help='Number of synthetic sensor samples')
+    parser.add_argument('--validate_files', nargs='+', default=None,
+                       help='Sensor CSV files to validate (with --task validate)')
+    parser.add_argument('--report', default=None,
+                       help='JSON file for the validation report')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Processes for validating or generating files, decode threads for shards, '
+                            'link/copy threads for splits (default: one per CPU)')
+    parser.add_argument('--nodes', type=int, default=10,
+                       help='Number of sensor nodes (with --task generate)')
+    parser.add_argument('--profile', choices=list(SENSOR_PROFILES), default='water',
+                       help='Sensor profile for generated nodes')
+    parser.add_argument('--freq', default='1min',
+                       help='Sampling interval for generated nodes')
+    parser.add_argument('--seed', type=int, default=42,
+                       help='Base random seed (node k is reproducible from seed and k)')
+    parser.add_argument('--anomaly_rate', type=float, default=0.0,
+                       help='Probability of a spike per generated sample')
+    parser.add_argument('--gap_rate', type=float, default=0.0,
+                       help='Probability of an outage starting per generated sample')
+    parser.add_argument('--drift', type=float, default=0.0,
+                       help='Maximum per-node drift over the series, in units of sensor noise')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv',
+                       help='Output format for generated nodes')
+    parser.add_argument('--output_dir', default='synthetic_nodes',
+                       help='Output directory for generated nodes')
+    parser.add_argument('--shard_dir', default='pollution_shards',
+                       help='Output directory for pre-decoded image shards (with --task shards)')
+    parser.add_argument('--img_size', type=int, default=224,
+                       help='Image size the shards are decoded at')
+    parser.add_argument('--shard_size', type=int, default=1024,
+                       help='Images per shard')
     
     args = parser.parse_args()
     
@@ -290,6 +558,84 @@ def main():
     print("ECONOVA AI MODELS - DATA PREPARATION")
     print("="*70)
     
+    if args.task == 'validate':
+        files = args.validate_files or [args.sensor_file]
+        reports = prep.validate_sensor_files(files, report_path=args.report, workers=args.workers)
+        sys.exit(0 if all(r['valid'] for r in reports) else 1)
+    
+    if args.task == 'generate':
+        generator = SyntheticSensorGenerator(
+            profile=args.profile,
+            n_nodes=args.nodes,
+            n_samples=args.samples,
+            freq=args.freq,
+            seed=args.seed,
+            anomaly_rate=args.anomaly_rate,
+            gap_rate=args.gap_rate,
+            drift=args.drift
+        )
+        print(f"\nGenerating {args.nodes} nodes x {args.samples} samples ({args.profile} profile)...")
+        start_time = datetime.now()
+        summary = generator.generate(args.output_dir, fmt=args.format, workers=args.workers)
+        duration = (datetime.now() - start_time).total_seconds()
+        print(f"\n✓ Wrote {summary['rows']} rows to {len(summary['files'])} files in {args.output_dir}/")
+        if duration > 0:
+            print(f"  Throughput: {summary['rows'] / duration:,.0f} rows/sec")
+        return
+    
+    if args.task == 'manifest':
+        manifest_path = args.manifest_path or MANIFEST_PATH
+        print(f"\nIndexing {args.pollution_dir} into {manifest_path}...")
+        prep.build_image_manifest(
+            args.pollution_dir, manifest_path, workers=args.workers, decode=args.decode_check
+        )
+        print(f"\nNext: python train_pollution_detector.py --train_dir {args.pollution_dir}/train "
+              f"--val_dir {args.pollution_dir}/validation --manifest {manifest_path}")
+        return
+    
+    if args.task == 'split':
+        if not args.source_dir or not os.path.isdir(args.source_dir):
+            print("\nERROR: --task split needs --source_dir with one folder per class")
+            sys.exit(1)
+        manifest = None
+        if args.manifest_path:
+            if not os.path.exists(args.manifest_path):
+                print(f"\nERROR: Image manifest not found: {args.manifest_path}")
+                sys.exit(1)
+            manifest = ImageManifest(args.manifest_path)
+        start_time = datetime.now()
+        try:
+            prep.split_images_train_val(
+                args.source_dir,
+                args.pollution_dir,
+                val_split=args.val_split,
+                seed=args.seed,
+                mode=args.split_mode,
+                workers=args.workers,
+                manifest=manifest
+            )
+        except ValueError as e:
+            print(f"\nERROR: {e}")
+            sys.exit(1)
+        print(f"  Took {(datetime.now() - start_time).total_seconds():.1f}s")
+        if args.split_mode == 'manifest':
+            print(f"\nNext: python train_pollution_detector.py --train_dir {args.pollution_dir}/train.csv --val_dir {args.pollution_dir}/validation.csv")
+        else:
+            print(f"\nNext: python train_pollution_detector.py --train_dir {args.pollution_dir}/train --val_dir {args.pollution_dir}/validation")
+        return
+    
+    if args.task == 'shards':
+        print(f"\nConverting {args.pollution_dir} to {args.img_size}x{args.img_size} shards in {args.shard_dir}/...")
+        prep.convert_images_to_shards(
+            args.pollution_dir,
+            shard_dir=args.shard_dir,
+            img_size=(args.img_size, args.img_size),
+            shard_size=args.shard_size,
+            workers=args.workers
+        )
+        print(f"\nNext: python train_pollution_detector.py --train_dir {args.shard_dir}/train --val_dir {args.shard_dir}/validation")
+        return
+    
     if args.task in ['pollution', 'both']:
         print("\n" + "-"*70)
         print("POLLUTION DETECTION DATASET")
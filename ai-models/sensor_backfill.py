@@ -0,0 +1,293 @@
+"""
+Historical Forecast Backfill for Factory Sensor Prediction Model
+Produces forecasts for every origin timestamp of a long sensor history
+"""
+
+import os
+import json
+import multiprocessing as mp
+import numpy as np
+import pandas as pd
+from sensor_predictor import SensorPredictor
+from sensor_preprocessing import GapAwareResampler
+
+
+class BackfillWriter:
+    """
+    Streaming CSV writer for backfilled forecasts
+    
+    Writes one row per (origin, step). After every batch the file is flushed
+    and a small progress file records the byte offset and last completed
+    origin, so an interrupted run can be truncated back and resumed exactly.
+    """
+    
+    def __init__(self, output_path, feature_names, resume=True):
+        self.output_path = output_path
+        self.progress_path = output_path + '.progress'
+        self.feature_names = list(feature_names)
+        self.last_origin = None
+        self.completed = False
+        
+        progress = self._read_progress() if resume else None
+        if progress is not None and os.path.exists(output_path):
+            # Drop anything written after the last recorded batch
+            self._file = open(output_path, 'r+', newline='')
+            self._file.truncate(progress['offset'])
+            self._file.seek(progress['offset'])
+            self.last_origin = pd.Timestamp(progress['last_origin']) if progress['last_origin'] else None
+            self.completed = progress.get('completed', False)
+        else:
+            self._file = open(output_path, 'w', newline='')
+            self._file.write(','.join(['origin', 'timestamp', 'step'] + self.feature_names) + '\n')
+            self._checkpoint()
+    
+    def _read_progress(self):
+        try:
+            with open(self.progress_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+    
+    def _checkpoint(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        progress = {
+            'offset': self._file.tell(),
+            'last_origin': str(self.last_origin) if self.last_origin is not None else None,
+            'completed': self.completed
+        }
+        tmp_path = self.progress_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(progress, f)
+        os.replace(tmp_path, self.progress_path)
+    
+    def write_batch(self, origin_timestamps, predictions, step_delta):
+        """
+        Append forecasts for a batch of origins
+        
+        Args:
+            origin_timestamps: DatetimeIndex of forecast origins
+            predictions: Array (n_origins, horizon, n_features)
+            step_delta: Timedelta between consecutive timesteps
+        """
+        n_origins, horizon, n_features = predictions.shape
+        steps = np.arange(1, horizon + 1)
+        step_offsets = steps * pd.Timedelta(step_delta).to_timedelta64()
+        
+        origins = np.repeat(origin_timestamps.values, horizon)
+        frame = pd.DataFrame(
+            predictions.reshape(n_origins * horizon, n_features),
+            columns=self.feature_names
+        )
+        frame.insert(0, 'step', np.tile(steps, n_origins))
+        frame.insert(0, 'timestamp', origins + np.tile(step_offsets, n_origins))
+        frame.insert(0, 'origin', origins)
+        frame.to_csv(self._file, header=False, index=False)
+        
+        self.last_origin = origin_timestamps[-1]
+        self._checkpoint()
+    
+    def close(self, completed=False):
+        self.completed = completed
+        self._checkpoint()
+        self._file.close()
+
+
+class SensorBackfill:
+    """
+    Batched backfill of historical sensor forecasts
+    
+    Every origin (row with a full history window) is forecast with
+    SensorPredictor.predict_origins, streamed to CSV, and can be split into
+    contiguous shards processed by separate worker processes. If the model
+    was trained on resampled data, the history is put on the same grid first
+    and origins whose window crosses an unfilled gap are skipped.
+    """
+    
+    def __init__(self, model_path='sensor_predictor_model.h5',
+                 scaler_path='sensor_scaler.pkl',
+                 config_path='sensor_config.json',
+                 batch_size=None, origin_stride=1, chunk_origins=4096):
+        """
+        Args:
+            model_path, scaler_path, config_path: Trained predictor artifacts
+            batch_size: Windows per forward pass (None = the predictor's default,
+                from the inference profile if there is one)
+            origin_stride: Forecast from every Nth eligible origin
+            chunk_origins: Origins forecast and written per checkpoint
+        """
+        self.model_path = model_path
+        self.scaler_path = scaler_path
+        self.config_path = config_path
+        self.batch_size = batch_size
+        self.origin_stride = origin_stride
+        self.chunk_origins = chunk_origins
+    
+    def _settings(self):
+        return {
+            'model_path': self.model_path,
+            'scaler_path': self.scaler_path,
+            'config_path': self.config_path,
+            'batch_size': self.batch_size,
+            'origin_stride': self.origin_stride,
+            'chunk_origins': self.chunk_origins
+        }
+    
+    def _load_predictor(self):
+        predictor = SensorPredictor()
+        predictor.load_model(
+            model_path=self.model_path,
+            scaler_path=self.scaler_path,
+            config_path=self.config_path
+        )
+        return predictor
+    
+    def origin_indices(self, n_rows, sequence_length, valid_rows=None):
+        """
+        Row indices of every origin that has a full history window
+        
+        With valid_rows (from GapAwareResampler), origins whose window
+        contains an invalid row are left out.
+        """
+        origins = np.arange(sequence_length - 1, n_rows, self.origin_stride)
+        if valid_rows is not None:
+            mask = GapAwareResampler.window_mask(valid_rows, sequence_length)
+            origins = origins[mask[origins - (sequence_length - 1)]]
+        return origins
+    
+    def run_shard(self, predictor, values, timestamps, origins, output_path, resume=True):
+        """
+        Forecast a contiguous set of origins into one output file
+        
+        Args:
+            predictor: Loaded SensorPredictor
+            values: Feature array (rows=timestamps) covering the shard's windows
+            timestamps: DatetimeIndex aligned with values
+            origins: Row indices (into values) of origins to forecast
+            output_path: CSV file to write or resume
+        
+        Returns:
+            Number of origins forecast in this call
+        """
+        writer = BackfillWriter(output_path, predictor.feature_names, resume=resume)
+        if writer.completed:
+            writer.close(completed=True)
+            return 0
+        
+        if writer.last_origin is not None:
+            origins = origins[timestamps[origins] > writer.last_origin]
+        
+        step_delta = pd.Series(timestamps).diff().median()
+        done = 0
+        try:
+            for start in range(0, len(origins), self.chunk_origins):
+                chunk = origins[start:start + self.chunk_origins]
+                # Hand over only the rows this chunk's windows cover
+                first_row = chunk[0] - (predictor.sequence_length - 1)
+                predictions = predictor.predict_origins(
+                    values[first_row:chunk[-1] + 1],
+                    chunk - first_row,
+                    batch_size=self.batch_size
+                )
+                writer.write_batch(timestamps[chunk], predictions, step_delta)
+                done += len(chunk)
+        except BaseException:
+            writer.close(completed=False)
+            raise
+        writer.close(completed=True)
+        return done
+    
+    def run(self, sensor_data, output_path, workers=1, resume=True, predictor=None):
+        """
+        Backfill forecasts for the whole history
+        
+        Args:
+            sensor_data: DataFrame indexed by timestamp
+            output_path: Final CSV file
+            workers: Number of worker processes (origins split into contiguous shards)
+            resume: Continue from the last completed origin of a previous run
+            predictor: Already loaded SensorPredictor (used when workers == 1)
+        
+        Returns:
+            dict with origin counts (origins forecast or resumed, and skipped
+            because their window crosses a gap) and output path
+        """
+        if predictor is None and workers <= 1:
+            predictor = self._load_predictor()
+        
+        if predictor is not None:
+            feature_names = predictor.feature_names
+            sequence_length = predictor.sequence_length
+            resampling = predictor.resampling
+        else:
+            with open(self.config_path, 'r') as f:
+                config = json.load(f)
+            feature_names = config['feature_names']
+            sequence_length = config['sequence_length']
+            resampling = config.get('resampling')
+        
+        # Same grid and gap handling as the training windows
+        valid_rows = None
+        if resampling is not None and isinstance(sensor_data.index, pd.DatetimeIndex):
+            sensor_data, valid_rows = GapAwareResampler.from_config(resampling).transform(sensor_data[feature_names])
+        
+        timestamps = pd.DatetimeIndex(pd.to_datetime(sensor_data.index))
+        values = sensor_data[feature_names].values.astype(np.float32)
+        eligible = len(self.origin_indices(len(values), sequence_length))
+        origins = self.origin_indices(len(values), sequence_length, valid_rows)
+        skipped = eligible - len(origins)
+        
+        if workers <= 1:
+            done = self.run_shard(predictor, values, timestamps, origins, output_path, resume)
+            os.remove(output_path + '.progress')
+            return {'origins': len(origins), 'skipped': skipped, 'forecast': done, 'output': output_path}
+        
+        # Each shard carries only the rows its windows need
+        shards = [s for s in np.array_split(origins, workers) if len(s)]
+        tasks = []
+        part_paths = []
+        for k, shard in enumerate(shards):
+            first_row = shard[0] - (sequence_length - 1)
+            part_path = f"{output_path}.part{k}of{len(shards)}"
+            part_paths.append(part_path)
+            tasks.append((
+                self._settings(),
+                values[first_row:shard[-1] + 1],
+                timestamps[first_row:shard[-1] + 1],
+                shard - first_row,
+                part_path,
+                resume
+            ))
+        
+        ctx = mp.get_context('spawn')
+        with ctx.Pool(processes=len(tasks)) as pool:
+            done = sum(pool.map(_backfill_worker, tasks))
+        
+        self._merge_parts(part_paths, output_path)
+        return {'origins': len(origins), 'skipped': skipped, 'forecast': done, 'output': output_path}
+    
+    @staticmethod
+    def _merge_parts(part_paths, output_path):
+        """Concatenate shard outputs in origin order, keeping one header"""
+        with open(output_path, 'w', newline='') as out:
+            for k, part_path in enumerate(part_paths):
+                with open(part_path, 'r', newline='') as part:
+                    header = part.readline()
+                    if k == 0:
+                        out.write(header)
+                    while True:
+                        block = part.read(1 << 20)
+                        if not block:
+                            break
+                        out.write(block)
+        for part_path in part_paths:
+            os.remove(part_path)
+            os.remove(part_path + '.progress')
+
+
+def _backfill_worker(task):
+    """Process entry point: load the model once and forecast one shard"""
+    settings, values, timestamps, origins, part_path, resume = task
+    backfill = SensorBackfill(**settings)
+    predictor = backfill._load_predictor()
+    return backfill.run_shard(predictor, values, timestamps, origins, part_path, resume)
@@ -0,0 +1,209 @@
+"""
+Scalable Synthetic Sensor Data Generator
+Produces N nodes x M samples of realistic sensor data for load testing and capacity planning
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+
+# Sensor profiles: name, base value, daily amplitude, noise, clip range
+SENSOR_PROFILES = {
+    # Matches the defaults of DataPreparator.generate_synthetic_sensor_data
+    'factory': [
+        {'name': 'temperature', 'base': 22, 'amplitude': 5, 'noise': 0.5, 'min': -20, 'max': 60},
+        {'name': 'humidity', 'base': 50, 'amplitude': 15, 'noise': 2.0, 'min': 0, 'max': 100},
+        {'name': 'co2', 'base': 400, 'amplitude': 50, 'noise': 10, 'min': 0, 'max': 5000},
+        {'name': 'pm25', 'base': 15, 'amplitude': 10, 'noise': 2.0, 'min': 0, 'max': 500},
+        {'name': 'pressure', 'base': 1013, 'amplitude': 5, 'noise': 1.0, 'min': 900, 'max': 1100}
+    ],
+    # Water-quality node readings shown on the factory dashboard
+    'water': [
+        {'name': 'pH', 'base': 7.0, 'amplitude': 0.3, 'noise': 0.1, 'min': 4, 'max': 10},
+        {'name': 'turbidity', 'base': 75, 'amplitude': 10, 'noise': 5.0, 'min': 0, 'max': 200},
+        {'name': 'flow', 'base': 100, 'amplitude': 15, 'noise': 3.0, 'min': 0, 'max': 200},
+        {'name': 'temperature', 'base': 25, 'amplitude': 3, 'noise': 0.5, 'min': 0, 'max': 50}
+    ]
+}
+
+
+class SyntheticSensorGenerator:
+    """
+    Deterministic multi-node synthetic sensor data generator
+    
+    Every (node, chunk) pair draws from its own seeded random stream, so any
+    chunk can be generated independently, in parallel, and reproduced exactly.
+    Output is one file per node, written chunk by chunk.
+    """
+    
+    def __init__(self, profile='water', n_nodes=10, n_samples=100_000,
+                 start_date='2024-01-01', freq='1min', seed=42,
+                 anomaly_rate=0.0, gap_rate=0.0, max_gap_length=60,
+                 drift=0.0, chunk_size=1_000_000):
+        """
+        Args:
+            profile: Name in SENSOR_PROFILES or a list of sensor dicts
+            n_nodes: Number of sensor nodes
+            n_samples: Samples per node (before gaps are removed)
+            start_date: First timestamp
+            freq: Sampling interval (pandas offset alias)
+            seed: Base seed; node k uses the stream (seed, k, chunk)
+            anomaly_rate: Probability of a spike per sample (0 = none)
+            gap_rate: Probability of a gap starting per sample (0 = none)
+            max_gap_length: Longest gap in samples
+            drift: Maximum sensor drift per node over the full series, in units of noise
+            chunk_size: Samples generated and written per chunk
+        """
+        self.sensors = SENSOR_PROFILES[profile] if isinstance(profile, str) else profile
+        self.n_nodes = n_nodes
+        self.n_samples = n_samples
+        self.start = pd.Timestamp(start_date)
+        self.step = pd.Timedelta(pd.tseries.frequencies.to_offset(freq))
+        self.seed = seed
+        self.anomaly_rate = anomaly_rate
+        self.gap_rate = gap_rate
+        self.max_gap_length = max_gap_length
+        self.drift = drift
+        self.chunk_size = chunk_size
+        
+        # Samples per day, for daily seasonality
+        self.period = max(1, int(pd.Timedelta(days=1) / self.step))
+    
+    def node_id(self, node):
+        return f"node_{node:05d}"
+    
+    def _node_params(self, node):
+        """Per-node constants (phase offsets, base shifts, drift rates)"""
+        rng = np.random.default_rng([self.seed, node])
+        n_sensors = len(self.sensors)
+        return {
+            'phase': rng.uniform(0, 2 * np.pi, n_sensors),
+            'offset': rng.normal(0, 1, n_sensors),
+            'drift': rng.uniform(-1, 1, n_sensors) * self.drift
+        }
+    
+    def generate_chunk(self, node, chunk_idx, params=None):
+        """
+        Generate one chunk of one node
+        
+        Returns:
+            DataFrame with timestamp, node_id and one column per sensor
+        """
+        if params is None:
+            params = self._node_params(node)
+        rng = np.random.default_rng([self.seed, node, chunk_idx])
+        
+        start = chunk_idx * self.chunk_size
+        n = min(self.chunk_size, self.n_samples - start)
+        t = np.arange(start, start + n)
+        
+        data = {
+            'timestamp': self.start + self.step * t,
+            'node_id': np.full(n, self.node_id(node))
+        }
+        
+        for j, sensor in enumerate(self.sensors):
+            seasonality = sensor['amplitude'] * np.sin(2 * np.pi * t / self.period + params['phase'][j])
+            drift = params['drift'][j] * sensor['noise'] * t / max(1, self.n_samples - 1)
+            base = sensor['base'] + params['offset'][j] * sensor['noise']
+            values = base + seasonality + drift + sensor['noise'] * rng.standard_normal(n)
+            
+            if self.anomaly_rate > 0:
+                spikes = rng.random(n) < self.anomaly_rate
+                values[spikes] += rng.choice([-1, 1], spikes.sum()) * 4 * max(sensor['amplitude'], sensor['noise'])
+            
+            data[sensor['name']] = np.clip(values, sensor['min'], sensor['max']).astype(np.float32)
+        
+        df = pd.DataFrame(data)
+        
+        if self.gap_rate > 0:
+            df = df[self._keep_mask(rng, n)]
+        
+        return df
+    
+    def _keep_mask(self, rng, n):
+        """Drop random runs of samples to simulate outages"""
+        gap_starts = np.flatnonzero(rng.random(n) < self.gap_rate)
+        lengths = rng.integers(1, self.max_gap_length + 1, len(gap_starts))
+        delta = np.zeros(n + 1, dtype=np.int64)
+        np.add.at(delta, gap_starts, 1)
+        np.add.at(delta, np.minimum(gap_starts + lengths, n), -1)
+        return np.cumsum(delta)[:-1] == 0
+    
+    def write_node(self, node, output_dir, fmt='csv'):
+        """
+        Generate and write one node's full series chunk by chunk
+        
+        Returns:
+            (path, rows written)
+        """
+        params = self._node_params(node)
+        n_chunks = -(-self.n_samples // self.chunk_size)
+        rows = 0
+        
+        if fmt == 'csv':
+            path = os.path.join(output_dir, f"{self.node_id(node)}.csv")
+            with open(path, 'w', newline='') as f:
+                for chunk_idx in range(n_chunks):
+                    chunk = self.generate_chunk(node, chunk_idx, params)
+                    chunk.to_csv(f, header=(chunk_idx == 0), index=False,
+                                 date_format='%Y-%m-%d %H:%M:%S', float_format='%.4f')
+                    rows += len(chunk)
+        elif fmt == 'parquet':
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError("Parquet output requires pyarrow (pip install pyarrow)")
+            
+            path = os.path.join(output_dir, f"{self.node_id(node)}.parquet")
+            writer = None
+            try:
+                for chunk_idx in range(n_chunks):
+                    table = pa.Table.from_pandas(
+                        self.generate_chunk(node, chunk_idx, params), preserve_index=False
+                    )
+                    if writer is None:
+                        writer = pq.ParquetWriter(path, table.schema)
+                    writer.write_table(table)
+                    rows += table.num_rows
+            finally:
+                if writer is not None:
+                    writer.close()
+        else:
+            raise ValueError("fmt must be 'csv' or 'parquet'")
+        
+        return path, rows
+    
+    def generate(self, output_dir, fmt='csv', workers=None):
+        """
+        Write every node to output_dir, one process per node at a time
+        
+        Args:
+            output_dir: Destination directory (created if missing)
+            fmt: 'csv' or 'parquet'
+            workers: Number of processes (None = one per CPU)
+        
+        Returns:
+            dict with total rows and written files
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, self.n_nodes))
+        
+        nodes = range(self.n_nodes)
+        if workers == 1:
+            results = [self.write_node(node, output_dir, fmt) for node in nodes]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(
+                    self.write_node, nodes, [output_dir] * self.n_nodes, [fmt] * self.n_nodes
+                ))
+        
+        return {
+            'files': [path for path, _ in results],
+            'rows': sum(rows for _, rows in results)
+        }
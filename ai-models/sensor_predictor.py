@@ -13,6 +13,8 @@ from sklearn.model_selection import train_test_split
 import pickle
 import json
 from datetime import datetime, timedelta
+from sensor_preprocessing import GapAwareResampler
+from inference_profile import PROFILE_PATH, load_inference_profile
 
 
 class SensorPredictor:
@@ -21,12 +23,16 @@ class SensorPredictor:
     Supports multiple sensor types: temperature, humidity, CO2, particulate matter, etc.
     """
     
-    def __init__(self, sequence_length=24, prediction_horizon=12, num_features=None):
+    def __init__(self, sequence_length=24, prediction_horizon=12, num_features=None,
+                 inference_profile=PROFILE_PATH):
         """
         Args:
             sequence_length: Number of historical timesteps to use (e.g., 24 hours)
             prediction_horizon: Number of future timesteps to predict (e.g., 12 hours)
             num_features: Number of sensor features (auto-detected from data if None)
+            inference_profile: Profile from tune_inference.py; if it exists and
+                matches this machine, its thread settings are applied and its
+                batch size becomes the default of predict_origins (None = ignore)
         """
         self.sequence_length = sequence_length
         self.prediction_horizon = prediction_horizon
@@ -34,6 +40,13 @@ class SensorPredictor:
         self.model = None
         self.scaler = None
         self.feature_names = []
+        # GapAwareResampler settings the training data was regularized with (None = raw rows)
+        self.resampling = None
+        # Default windows per forward pass of predict_origins
+        self.batch_size = 256
+        profile = load_inference_profile('sensor_predictor', inference_profile) if inference_profile else None
+        if profile is not None:
+            self.batch_size = profile['batch_size']
         
     def build_model(self, lstm_units=[128, 64], dropout_rate=0.2, attention=True):
         """
@@ -87,7 +100,7 @@ class SensorPredictor:
             metrics=['mae', 'mse']
         )
     
-    def prepare_data(self, data, feature_columns=None, scale=True):
+    def prepare_data(self, data, feature_columns=None, scale=True, valid_rows=None):
         """
         Prepare sensor data for training
         
@@ -95,6 +108,8 @@ class SensorPredictor:
             data: DataFrame with sensor readings (rows=timestamps, cols=sensors)
             feature_columns: List of column names to use (None = use all numeric)
             scale: Whether to scale the data
+            valid_rows: Optional boolean array per row (see GapAwareResampler);
+                        windows touching an invalid row are skipped
             
         Returns:
             X, y arrays ready for training
@@ -121,13 +136,24 @@ class SensorPredictor:
         else:
             data_scaled = data_array
         
-        # Create sequences
-        X, y = [], []
-        for i in range(len(data_scaled) - self.sequence_length - self.prediction_horizon + 1):
-            X.append(data_scaled[i:i + self.sequence_length])
-            y.append(data_scaled[i + self.sequence_length:i + self.sequence_length + self.prediction_horizon])
+        # Create sequences (history + horizon) as strided views of the data
+        window_length = self.sequence_length + self.prediction_horizon
+        data_scaled = np.asarray(data_scaled)
+        if len(data_scaled) < window_length:
+            n_features = data_scaled.shape[1]
+            return (np.empty((0, self.sequence_length, n_features)),
+                    np.empty((0, self.prediction_horizon, n_features)))
         
-        return np.array(X), np.array(y)
+        windows = np.lib.stride_tricks.sliding_window_view(
+            data_scaled, window_length, axis=0
+        ).transpose(0, 2, 1)
+        
+        if valid_rows is not None:
+            windows = windows[GapAwareResampler.window_mask(valid_rows, window_length)]
+        
+        X = np.ascontiguousarray(windows[:, :self.sequence_length])
+        y = np.ascontiguousarray(windows[:, self.sequence_length:])
+        return X, y
     
     def train(self, X_train, y_train, X_val, y_val, epochs=100, batch_size=32, callbacks=None):
         """Train the model"""
@@ -214,6 +240,78 @@ class SensorPredictor:
         # Return only requested steps
         return predictions[:steps_ahead]
     
+    def regularize(self, data):
+        """
+        Put inference data on the training grid
+        
+        Applies the GapAwareResampler settings saved with the model, so
+        windows are built the way the training windows were.
+        
+        Args:
+            data: DataFrame indexed by timestamp
+        
+        Returns:
+            (data, valid_rows); data is unchanged and valid_rows None if the
+            model was trained on raw rows or data has no timestamp index
+        """
+        if self.resampling is None or not isinstance(data.index, pd.DatetimeIndex):
+            return data, None
+        return GapAwareResampler.from_config(self.resampling).transform(data[self.feature_names])
+    
+    def predict_origins(self, data, origins=None, batch_size=None):
+        """
+        Predict from many forecast origins in batched forward passes
+        
+        Args:
+            data: Sensor data (DataFrame or array, rows=timestamps)
+            origins: Row indices of the last observed timestep of each forecast
+                     (None = every row preceded by a full sequence_length window)
+            batch_size: Number of windows per forward pass (None = self.batch_size)
+        
+        Returns:
+            Array of shape (len(origins), prediction_horizon, num_features)
+        """
+        if self.model is None:
+            raise ValueError("Model must be loaded before prediction")
+        
+        if isinstance(data, pd.DataFrame):
+            data = data[self.feature_names].values
+        data = np.asarray(data, dtype=np.float32)
+        
+        if len(data) < self.sequence_length:
+            raise ValueError(f"Need at least {self.sequence_length} timesteps of data")
+        
+        # Scale the whole history once instead of once per window
+        if self.scaler is not None:
+            data = self.scaler.transform(data).astype(np.float32)
+        
+        # Zero-copy view of every window: (n_windows, sequence_length, num_features)
+        windows = np.lib.stride_tricks.sliding_window_view(
+            data, self.sequence_length, axis=0
+        ).transpose(0, 2, 1)
+        
+        batch_size = batch_size or self.batch_size
+        if origins is None:
+            origins = np.arange(self.sequence_length - 1, len(data))
+        origins = np.asarray(origins, dtype=np.int64)
+        if len(origins) and (origins.min() < self.sequence_length - 1 or origins.max() >= len(data)):
+            raise ValueError(f"Origins must lie in [{self.sequence_length - 1}, {len(data) - 1}]")
+        
+        predictions = np.empty(
+            (len(origins), self.prediction_horizon, data.shape[1]), dtype=np.float32
+        )
+        for start in range(0, len(origins), batch_size):
+            window_idx = origins[start:start + batch_size] - (self.sequence_length - 1)
+            batch = np.ascontiguousarray(windows[window_idx])
+            predictions[start:start + len(window_idx)] = self.model.predict_on_batch(batch)
+        
+        # Inverse transform all horizons of all origins in one call
+        if self.scaler is not None:
+            flat = self.scaler.inverse_transform(predictions.reshape(-1, data.shape[1]))
+            predictions = flat.reshape(predictions.shape)
+        
+        return predictions
+    
     def predict_with_timestamps(self, recent_data, timestamps, future_steps=None):
         """
         Predict with timestamp information
@@ -283,7 +381,8 @@ class SensorPredictor:
             'sequence_length': self.sequence_length,
             'prediction_horizon': self.prediction_horizon,
             'num_features': self.num_features,
-            'feature_names': self.feature_names
+            'feature_names': self.feature_names,
+            'resampling': self.resampling
         }
         with open(config_path, 'w') as f:
             json.dump(config, f, indent=2)
@@ -304,6 +403,8 @@ class SensorPredictor:
         self.prediction_horizon = config['prediction_horizon']
         self.num_features = config['num_features']
         self.feature_names = config['feature_names']
+        # Configs from before resampling was saved describe raw-row models
+        self.resampling = config.get('resampling')
         
         # Load model
         self.model = keras.models.load_model(model_path)
@@ -0,0 +1,135 @@
+"""
+Gap-Aware Sensor Preprocessing
+Regularizes irregular sensor histories onto a fixed time grid before windowing
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class GapAwareResampler:
+    """
+    Vectorized resampling and imputation stage for sensor time series
+    
+    - Readings are aggregated onto a fixed grid (mean per grid interval)
+    - Gaps of up to max_fill_steps grid steps are interpolated
+    - Longer gaps stay NaN and their rows are marked invalid, so windows that
+      cross them can be skipped by SensorPredictor.prepare_data
+    """
+    
+    FILL_METHODS = ('linear', 'time', 'nearest', 'ffill', 'zero')
+    
+    def __init__(self, freq=None, interpolation='linear', max_fill_steps=3):
+        """
+        Args:
+            freq: Grid frequency (e.g. '1min', 'H'); None = median sampling interval
+            interpolation: Fill method for short gaps (linear, time, nearest, ffill, zero)
+            max_fill_steps: Longest gap (in grid steps) that is filled
+        """
+        if interpolation not in self.FILL_METHODS:
+            raise ValueError(f"interpolation must be one of {', '.join(self.FILL_METHODS)}")
+        self.freq = freq
+        self.interpolation = interpolation
+        self.max_fill_steps = max_fill_steps
+        # Grid step used by the last transform (freq, or the inferred interval)
+        self.grid_freq = pd.Timedelta(freq) if freq is not None else None
+    
+    def to_config(self):
+        """JSON-serializable settings, with the grid step the last transform used"""
+        return {
+            'freq': str(self.grid_freq) if self.grid_freq is not None else None,
+            'interpolation': self.interpolation,
+            'max_fill_steps': self.max_fill_steps
+        }
+    
+    @classmethod
+    def from_config(cls, config):
+        """Resampler with the settings of to_config, e.g. those saved with a trained model"""
+        return cls(config['freq'], config['interpolation'], config['max_fill_steps'])
+    
+    def infer_freq(self, index):
+        """Median interval between consecutive timestamps"""
+        diffs = np.diff(index.values.astype('datetime64[ns]').astype(np.int64))
+        diffs = diffs[diffs > 0]
+        if len(diffs) == 0:
+            raise ValueError("Need at least two distinct timestamps to infer a frequency")
+        return pd.Timedelta(int(np.median(diffs)), unit='ns')
+    
+    def transform(self, data):
+        """
+        Regularize and impute sensor data
+        
+        Args:
+            data: DataFrame indexed by timestamp (numeric sensor columns)
+        
+        Returns:
+            (regular_data, valid_rows) where regular_data is on the fixed grid
+            and valid_rows is a boolean array (False inside unfilled long gaps)
+        """
+        if not isinstance(data.index, pd.DatetimeIndex):
+            raise ValueError("Data must be indexed by timestamp")
+        
+        data = data.select_dtypes(include=[np.number])
+        data = data[~data.index.isna()].sort_index()
+        freq = pd.Timedelta(self.freq) if self.freq is not None else self.infer_freq(data.index)
+        self.grid_freq = freq
+        
+        # Aggregate onto the grid; empty grid slots become NaN
+        regular = data.resample(freq, origin='start').mean()
+        
+        missing = regular.isna().values
+        if missing.any():
+            filled = self._fill(regular)
+            short_gap = self._short_gap_mask(missing)
+            values = np.where(short_gap, filled.values, regular.values)
+            regular = pd.DataFrame(values, index=regular.index, columns=regular.columns)
+        
+        valid_rows = ~regular.isna().values.any(axis=1)
+        return regular, valid_rows
+    
+    def _fill(self, regular):
+        if self.interpolation == 'ffill':
+            return regular.ffill()
+        if self.interpolation == 'zero':
+            return regular.fillna(0.0)
+        return regular.interpolate(method=self.interpolation, limit_area='inside')
+    
+    def _short_gap_mask(self, missing):
+        """True for missing cells that belong to a gap of at most max_fill_steps"""
+        n_rows, n_cols = missing.shape
+        # Pad with observed rows so every gap has a start and an end
+        padded = np.zeros((n_rows + 2, n_cols), dtype=np.int8)
+        padded[1:-1] = missing
+        edges = np.diff(padded, axis=0)
+        starts_r, starts_c = np.nonzero(edges == 1)
+        ends_r, ends_c = np.nonzero(edges == -1)
+        
+        # nonzero returns row-major order; sort both by column so gaps pair up
+        start_order = np.lexsort((starts_r, starts_c))
+        end_order = np.lexsort((ends_r, ends_c))
+        starts_r, cols = starts_r[start_order], starts_c[start_order]
+        ends_r = ends_r[end_order]
+        lengths = ends_r - starts_r
+        
+        # Spread each gap's length over its cells with a cumulative-sum trick
+        gap_length = np.zeros((n_rows + 1, n_cols), dtype=np.int64)
+        np.add.at(gap_length, (starts_r, cols), lengths)
+        np.add.at(gap_length, (ends_r, cols), -lengths)
+        gap_length = np.cumsum(gap_length, axis=0)[:-1]
+        
+        return missing & (gap_length <= self.max_fill_steps)
+    
+    @staticmethod
+    def window_mask(valid_rows, window_length):
+        """
+        Mark windows that contain only valid rows
+        
+        Args:
+            valid_rows: Boolean array per row
+            window_length: Rows per window (history + horizon)
+        
+        Returns:
+            Boolean array of length len(valid_rows) - window_length + 1
+        """
+        invalid = np.concatenate(([0], np.cumsum(~np.asarray(valid_rows, dtype=bool))))
+        return (invalid[window_length:] - invalid[:-window_length]) == 0
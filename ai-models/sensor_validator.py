@@ -0,0 +1,349 @@
+"""
+Streaming Sensor Data Validator
+Single-pass, chunked validation of sensor CSV files with a machine-readable report
+"""
+
+import os
+import json
+import math
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+
+class _ColumnStats:
+    """Running statistics for one sensor column, mergeable across chunks"""
+    
+    def __init__(self):
+        self.count = 0
+        self.nan_count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.mean = 0.0
+        self.m2 = 0.0
+        # Stuck-value tracking (carried across chunk boundaries)
+        self.last_value = None
+        self.current_run = 0
+        self.longest_run = 0
+        self.stuck_runs = 0
+    
+    def update(self, values, stuck_run_length):
+        nan_mask = np.isnan(values)
+        self.nan_count += int(nan_mask.sum())
+        valid = values[~nan_mask]
+        if len(valid) == 0:
+            return
+        
+        # Chan et al. parallel update of mean / variance
+        n = len(valid)
+        chunk_mean = float(valid.mean())
+        chunk_m2 = float(((valid - chunk_mean) ** 2).sum())
+        delta = chunk_mean - self.mean
+        total = self.count + n
+        self.mean += delta * n / total
+        self.m2 += chunk_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        self.min = min(self.min, float(valid.min()))
+        self.max = max(self.max, float(valid.max()))
+        
+        # Run lengths of identical consecutive values (NaNs are skipped)
+        starts = np.flatnonzero(np.diff(valid) != 0) + 1
+        bounds = np.concatenate(([0], starts, [n]))
+        runs = np.diff(bounds)
+        if self.last_value is not None and valid[0] == self.last_value:
+            runs[0] += self.current_run
+        elif self.current_run >= stuck_run_length:
+            # Run that ended exactly at the previous chunk boundary
+            self.stuck_runs += 1
+        # The final run may continue in the next chunk, so count it later
+        self.stuck_runs += int((runs[:-1] >= stuck_run_length).sum())
+        self.longest_run = max(self.longest_run, int(runs.max()))
+        self.current_run = int(runs[-1])
+        self.last_value = valid[-1]
+    
+    def finish(self, stuck_run_length):
+        if self.current_run >= stuck_run_length:
+            self.stuck_runs += 1
+            self.current_run = 0
+    
+    def to_dict(self, total_rows):
+        return {
+            'count': self.count,
+            'nan_count': self.nan_count,
+            'nan_rate': self.nan_count / total_rows if total_rows else 0.0,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            'mean': self.mean if self.count else None,
+            'std': math.sqrt(self.m2 / self.count) if self.count else None,
+            'longest_constant_run': self.longest_run,
+            'stuck_runs': self.stuck_runs
+        }
+
+
+class SensorDataValidator:
+    """
+    Validates sensor CSV files in one streaming pass with bounded memory
+    
+    Report contents per file:
+    - Per-column counts, NaN rates, min/max/mean/std and stuck-value runs
+    - Histogram of timestamp gaps (log2-spaced buckets in seconds)
+    - Median sampling interval and the number of gaps longer than gap_factor x it
+    - Adjacent duplicate and out-of-order timestamps
+    - A list of issues with severity codes
+    """
+    
+    # Resolution of the interval histogram the cadence and gaps are read from
+    # (64 bins per doubling, about 1% wide), so its size stays bounded however
+    # jittered the timestamps are
+    INTERVAL_BINS_PER_OCTAVE = 64
+    # Intervals within this factor of the cadence count as regular
+    REGULAR_TOLERANCE = 1.1
+    
+    def __init__(self, chunksize=500_000, timestamp_column='timestamp',
+                 stuck_run_length=60, gap_factor=2.0, min_samples=100):
+        """
+        Args:
+            chunksize: Rows read per chunk (bounds memory use)
+            timestamp_column: Name of the timestamp column
+            stuck_run_length: Identical consecutive readings that count as a stuck sensor
+            gap_factor: Intervals larger than gap_factor x the median interval count as gaps
+            min_samples: Minimum recommended number of rows
+        """
+        self.chunksize = chunksize
+        self.timestamp_column = timestamp_column
+        self.stuck_run_length = stuck_run_length
+        self.gap_factor = gap_factor
+        self.min_samples = min_samples
+    
+    def validate_file(self, data_file):
+        """
+        Validate a single CSV file
+        
+        Args:
+            data_file: Path to sensor data CSV file
+        
+        Returns:
+            dict report (JSON serializable)
+        """
+        total_rows = 0
+        columns = {}
+        non_numeric = set()
+        ts = {
+            'present': None,
+            'unparseable': 0,
+            'duplicates': 0,
+            'out_of_order': 0,
+            'first': None,
+            'last': None,
+            'max_gap_seconds': 0.0,
+            'max_gap_after': None
+        }
+        histogram = Counter()
+        intervals = Counter()
+        interval_sums = Counter()
+        prev_ts = None
+        
+        for chunk in pd.read_csv(data_file, chunksize=self.chunksize):
+            if ts['present'] is None:
+                ts['present'] = self.timestamp_column in chunk.columns
+            total_rows += len(chunk)
+            
+            # Timestamps: parse once per chunk, diff across the chunk boundary
+            if ts['present']:
+                parsed = pd.to_datetime(chunk[self.timestamp_column], errors='coerce')
+                ts['unparseable'] += int(parsed.isna().sum())
+                parsed = parsed.dropna()
+                if len(parsed):
+                    values = parsed.values.astype('datetime64[ns]').astype(np.int64)
+                    if prev_ts is not None:
+                        values = np.concatenate(([prev_ts], values))
+                    diffs = np.diff(values) / 1e9
+                    prev_ts = values[-1]
+                    
+                    if ts['first'] is None:
+                        ts['first'] = str(parsed.iloc[0])
+                    ts['last'] = str(parsed.iloc[-1])
+                    ts['duplicates'] += int((diffs == 0).sum())
+                    ts['out_of_order'] += int((diffs < 0).sum())
+                    
+                    positive = diffs[diffs > 0]
+                    if len(positive):
+                        buckets = np.floor(np.log2(positive)).astype(np.int64)
+                        keys, counts = np.unique(buckets, return_counts=True)
+                        histogram.update(dict(zip(keys.tolist(), counts.tolist())))
+                        
+                        bins = np.floor(np.log2(positive) * self.INTERVAL_BINS_PER_OCTAVE).astype(np.int64)
+                        keys, inverse, counts = np.unique(bins, return_inverse=True, return_counts=True)
+                        intervals.update(dict(zip(keys.tolist(), counts.tolist())))
+                        sums = np.bincount(inverse, weights=positive)
+                        interval_sums.update(dict(zip(keys.tolist(), sums.tolist())))
+                        
+                        gap_idx = int(np.argmax(diffs))
+                        if diffs[gap_idx] > ts['max_gap_seconds']:
+                            ts['max_gap_seconds'] = float(diffs[gap_idx])
+                            ts['max_gap_after'] = str(pd.Timestamp(values[gap_idx]))
+            
+            # Sensor columns
+            for name in chunk.columns:
+                if name == self.timestamp_column or name in non_numeric:
+                    continue
+                series = chunk[name]
+                if not pd.api.types.is_numeric_dtype(series):
+                    coerced = pd.to_numeric(series, errors='coerce')
+                    if coerced.notna().sum() < series.notna().sum():
+                        non_numeric.add(name)
+                        columns.pop(name, None)
+                        continue
+                    series = coerced
+                if name not in columns:
+                    columns[name] = _ColumnStats()
+                columns[name].update(series.to_numpy(dtype=np.float64), self.stuck_run_length)
+        
+        for stats in columns.values():
+            stats.finish(self.stuck_run_length)
+        
+        report = {
+            'file': data_file,
+            'rows': total_rows,
+            'columns': {name: stats.to_dict(total_rows) for name, stats in columns.items()},
+            'non_numeric_columns': sorted(non_numeric),
+            'timestamps': ts,
+            'gap_histogram': {
+                self._bucket_label(k): histogram[k] for k in sorted(histogram)
+            }
+        }
+        
+        ts.update(self._interval_summary(intervals, interval_sums))
+        
+        report['issues'] = self._collect_issues(report)
+        report['valid'] = not any(i['severity'] == 'error' for i in report['issues'])
+        return report
+    
+    def _interval_summary(self, intervals, interval_sums):
+        """
+        Cadence and gap count from the fine interval histogram
+        
+        The cadence is the median positive interval (the mean of the bin it
+        falls in), which jitter and a few long gaps do not move. Gaps are
+        intervals whose whole bin lies above gap_factor x cadence.
+        """
+        if not intervals:
+            return {'median_interval_seconds': None, 'gaps': None, 'regular_fraction': None}
+        
+        per_octave = self.INTERVAL_BINS_PER_OCTAVE
+        keys = sorted(intervals)
+        total = sum(intervals.values())
+        seen = 0
+        for k in keys:
+            seen += intervals[k]
+            if 2 * seen >= total:
+                break
+        cadence = interval_sums[k] / intervals[k]
+        
+        gap_threshold = np.log2(self.gap_factor * cadence) * per_octave
+        tolerance = np.log2(self.REGULAR_TOLERANCE) * per_octave
+        return {
+            'median_interval_seconds': round(cadence, 6),
+            'gaps': int(sum(intervals[k] for k in keys if k >= gap_threshold)),
+            'regular_fraction': round(sum(intervals[j] for j in keys if abs(j - k) <= tolerance) / total, 4)
+        }
+    
+    @staticmethod
+    def _bucket_label(k):
+        return f"[{2.0 ** k:g}s, {2.0 ** (k + 1):g}s)"
+    
+    def _collect_issues(self, report):
+        issues = []
+        ts = report['timestamps']
+        
+        def add(severity, code, message):
+            issues.append({'severity': severity, 'code': code, 'message': message})
+        
+        if not ts['present']:
+            add('error', 'missing_timestamp', f"Missing '{self.timestamp_column}' column")
+        else:
+            if ts['unparseable']:
+                add('error', 'unparseable_timestamps', f"{ts['unparseable']} timestamps cannot be parsed")
+            if ts['duplicates']:
+                add('error', 'duplicate_timestamps', f"{ts['duplicates']} duplicate timestamps")
+            if ts['out_of_order']:
+                add('error', 'out_of_order_timestamps', f"{ts['out_of_order']} out-of-order timestamps")
+            if ts['gaps']:
+                add('warning', 'timestamp_gaps',
+                    f"{ts['gaps']} gaps longer than {self.gap_factor:g}x the median interval "
+                    f"(max {ts['max_gap_seconds']:g}s after {ts['max_gap_after']})")
+            if ts['regular_fraction'] is not None and ts['regular_fraction'] < 0.5:
+                add('warning', 'irregular_intervals',
+                    f"Irregular time intervals: only {ts['regular_fraction']:.0%} within "
+                    f"{self.REGULAR_TOLERANCE - 1:.0%} of the median {ts['median_interval_seconds']:g}s")
+        
+        if not report['rows']:
+            add('error', 'no_rows', "File has a header but no data rows")
+        elif not report['columns']:
+            add('error', 'no_numeric_columns', "No numeric sensor columns found")
+        for name in report['non_numeric_columns']:
+            add('warning', 'non_numeric_column', f"Column '{name}' is not numeric")
+        for name, stats in report['columns'].items():
+            if stats['nan_count']:
+                add('warning', 'missing_values',
+                    f"Column '{name}' has {stats['nan_count']} missing values ({stats['nan_rate']:.2%})")
+            if stats['stuck_runs']:
+                add('warning', 'stuck_values',
+                    f"Column '{name}' has {stats['stuck_runs']} runs of >= {self.stuck_run_length} "
+                    f"identical readings (longest {stats['longest_constant_run']})")
+        
+        if report['rows'] < self.min_samples:
+            add('warning', 'few_samples', f"Only {report['rows']} samples (recommend 1000+)")
+        
+        return issues
+    
+    def validate_files(self, data_files, workers=None):
+        """
+        Validate several files, one process per file
+        
+        Args:
+            data_files: List of CSV paths
+            workers: Number of processes (None = one per CPU, capped at file count)
+        
+        Returns:
+            List of reports in input order
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, len(data_files)))
+        
+        if workers == 1:
+            return [self.validate_file(f) for f in data_files]
+        
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(self.validate_file, data_files))
+    
+    @staticmethod
+    def save_report(reports, report_path):
+        """Write reports to a JSON file"""
+        with open(report_path, 'w') as f:
+            json.dump(reports, f, indent=2)
+    
+    @staticmethod
+    def print_report(report):
+        """Print a human-readable summary of one report"""
+        print("\n" + "="*60)
+        print(f"VALIDATION RESULTS - {report['file']}")
+        print("="*60)
+        
+        if report['issues']:
+            print("\nIssues found:")
+            for issue in report['issues']:
+                marker = "❌" if issue['severity'] == 'error' else "⚠️ "
+                print(f"  {marker} {issue['message']}")
+        else:
+            print("\n✓ All checks passed!")
+        
+        ts = report['timestamps']
+        print(f"\nData info:")
+        print(f"  Total samples: {report['rows']}")
+        print(f"  Sensor columns: {', '.join(report['columns'])}")
+        print(f"  Date range: {ts['first']} to {ts['last']}")
+        if ts.get('median_interval_seconds'):
+            print(f"  Median interval: {ts['median_interval_seconds']:g}s")
@@ -0,0 +1,250 @@
+"""
+Multi-Process Sharded Inference for Pollution Detection
+Classifies large image directories with several worker processes, each holding its own model
+"""
+
+import os
+import queue
+import traceback
+import multiprocessing as mp
+from itertools import islice
+from collections import deque
+from image_pipeline import ImageBatchPipeline
+from prediction_cache import PredictionCache
+
+
+class ShardedPredictor:
+    """
+    Pool of worker processes running PollutionDetector.iter_predictions
+    
+    A single process cannot keep a many-core machine busy: decoding, hashing
+    and result formatting hold the GIL, and TensorFlow's default thread pools
+    scale poorly past a few cores for batch-32 MobileNetV2. Here each worker
+    process loads the model once, with its intra-op threads limited to its
+    share of the cores, and pulls shards of consecutive paths from a shared
+    queue, so faster workers simply take more shards. Each worker keeps one
+    decode pipeline running across shards, so there is no stall between them.
+    
+    The parent slices the (possibly lazy) path iterable into shards, keeps a
+    bounded number in flight and yields results in input order. It offers the
+    same iter_predictions()/predict_batch() as PollutionDetector, so
+    predict_pollution.predict_batch works with either.
+    """
+    
+    def __init__(self, model_path, num_processes=None, threads_per_process=None,
+                 img_size=None, shard_size=128, max_inflight=None, draft_decode=True,
+                 cache_path=None, cache_size=100_000):
+        """
+        Args:
+            model_path: Trained .h5/SavedModel or INT8 .tflite file
+            num_processes: Worker processes (None = one per CPU)
+            threads_per_process: Intra-op (or TFLite interpreter) threads per
+                worker (None = CPUs divided evenly among the workers)
+            img_size: Input (width, height) a .tflite model must have (None = its
+                own); replaced by the loaded model's size once started
+            shard_size: Paths per unit of work
+            max_inflight: Shards queued or running at once (None = 2 per worker)
+            draft_decode: Reduced-resolution JPEG decode in the workers
+            cache_path: PredictionCache database shared by the workers (None = no cache)
+            cache_size: Cached predictions kept before LRU eviction
+        """
+        cpus = os.cpu_count() or 1
+        self.model_path = model_path
+        self.num_processes = num_processes or cpus
+        self.threads_per_process = threads_per_process or max(1, cpus // self.num_processes)
+        self.img_size = tuple(img_size) if img_size else None
+        self.shard_size = shard_size
+        self.max_inflight = max_inflight or 2 * self.num_processes
+        self.draft_decode = draft_decode
+        self.cache_size = cache_size
+        # Parent-side handle; hit/miss counters are summed from the workers
+        self.cache = PredictionCache(cache_path, max_entries=cache_size) if cache_path else None
+        self.model_id = None
+        self._workers = []
+        self._cache_counts = {}
+    
+    def start(self):
+        """Spawn the workers and wait until each has loaded the model"""
+        if self._workers:
+            return
+        ctx = mp.get_context('spawn')
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        settings = {
+            'model_path': self.model_path,
+            'img_size': self.img_size,
+            'threads': self.threads_per_process,
+            'draft_decode': self.draft_decode,
+            'cache_path': self.cache.path if self.cache is not None else None,
+            'cache_size': self.cache_size
+        }
+        for worker_id in range(self.num_processes):
+            process = ctx.Process(
+                target=_inference_worker, args=(worker_id, settings, self._tasks, self._results), daemon=True
+            )
+            process.start()
+            self._workers.append(process)
+        
+        try:
+            ready = 0
+            while ready < self.num_processes:
+                kind, _, payload = self._next_message()
+                if kind == 'ready':
+                    ready += 1
+                    self.model_id, self.img_size = payload
+        except BaseException:
+            self.close()
+            raise
+    
+    def close(self):
+        """Stop the workers"""
+        if not self._workers:
+            return
+        for _ in self._workers:
+            self._tasks.put(None)
+        for process in self._workers:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self._workers = []
+    
+    def __enter__(self):
+        self.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def _next_message(self):
+        """Next worker message, raising if a worker died or failed"""
+        while True:
+            try:
+                kind, worker_id, payload = self._results.get(timeout=1.0)
+            except queue.Empty:
+                for process in self._workers:
+                    if not process.is_alive():
+                        raise RuntimeError(f"Worker process {process.pid} exited with code {process.exitcode}")
+                continue
+            if kind == 'error':
+                raise RuntimeError(f"Worker {worker_id} failed:\n{payload}")
+            return kind, worker_id, payload
+    
+    def predict_batch(self, image_paths, batch_size=None, confidence_threshold=0.6,
+                      num_workers=None, prefetch=2, use_processes=False):
+        """List of iter_predictions(); see there"""
+        return list(self.iter_predictions(
+            image_paths, batch_size, confidence_threshold, num_workers, prefetch, use_processes
+        ))
+    
+    def iter_predictions(self, image_paths, batch_size=None, confidence_threshold=0.6,
+                         num_workers=None, prefetch=2, use_processes=False):
+        """
+        Predict pollution types across the worker processes
+        
+        Args:
+            image_paths: Iterable of image file paths (consumed lazily)
+            batch_size: Images per forward pass in each worker (None = 32)
+            confidence_threshold: Minimum confidence for prediction
+            num_workers: Decode threads per worker (None = threads_per_process)
+            prefetch: Batches decoded ahead of inference in each worker
+            use_processes: Ignored; the workers are already processes
+        
+        Yields:
+            Result dicts in input order
+        """
+        self.start()
+        if num_workers is None:
+            num_workers = self.threads_per_process
+        options = (batch_size, confidence_threshold, num_workers, prefetch)
+        
+        paths = iter(image_paths)
+        finished = {}
+        submitted = 0
+        next_shard = 0
+        exhausted = False
+        try:
+            while True:
+                # Results are yielded in order, so bound the shards ahead of the oldest unfinished one
+                while not exhausted and submitted - next_shard < self.max_inflight:
+                    shard = list(islice(paths, self.shard_size))
+                    if not shard:
+                        exhausted = True
+                        break
+                    self._tasks.put((submitted, shard, options))
+                    submitted += 1
+                if exhausted and next_shard == submitted:
+                    break
+                
+                _, worker_id, (index, results, cache_counts) = self._next_message()
+                finished[index] = results
+                if cache_counts is not None:
+                    self._cache_counts[worker_id] = cache_counts
+                while next_shard in finished:
+                    yield from finished.pop(next_shard)
+                    next_shard += 1
+        except BaseException:
+            # Queued shards and half-finished pipelines cannot be recalled
+            self.close()
+            raise
+        finally:
+            if self.cache is not None:
+                self.cache.hits = sum(hits for hits, _ in self._cache_counts.values())
+                self.cache.misses = sum(misses for _, misses in self._cache_counts.values())
+
+
+def _configure_threads(threads):
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    # Single-branch CNNs gain nothing from running ops side by side
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def _inference_worker(worker_id, settings, tasks, results):
+    """Process entry point: load the model once, then classify shards until told to stop"""
+    try:
+        _configure_threads(settings['threads'])
+        from pollution_detector import PollutionDetector
+        from tflite_detector import TFLitePollutionDetector
+        
+        if settings['model_path'].endswith('.tflite'):
+            detector = TFLitePollutionDetector(img_size=settings['img_size'], num_threads=settings['threads'])
+        else:
+            # Threads were set for this worker above; a profile tuned for one process would override them
+            detector = PollutionDetector(inference_profile=None)
+        detector.load_model(settings['model_path'])
+        detector.draft_decode = settings['draft_decode']
+        if settings['cache_path']:
+            detector.cache = PredictionCache(settings['cache_path'], max_entries=settings['cache_size'])
+        results.put(('ready', worker_id, (detector.model_id, tuple(detector.img_size))))
+        
+        task = tasks.get()
+        while task is not None:
+            options = task[2]
+            # [shard index, paths in shard, results so far] in the order the paths were fed
+            open_shards = deque()
+            
+            def shard_paths():
+                nonlocal task
+                while task is not None and task[2] == options:
+                    index, shard, _ = task
+                    open_shards.append((index, len(shard), []))
+                    yield from shard
+                    try:
+                        task = tasks.get_nowait()
+                    except queue.Empty:
+                        # Finish the partial batch instead of holding it while idle
+                        yield ImageBatchPipeline.FLUSH
+                        task = tasks.get()
+            
+            batch_size, confidence_threshold, num_workers, prefetch = options
+            for result in detector.iter_predictions(
+                shard_paths(), batch_size, confidence_threshold, num_workers, prefetch
+            ):
+                index, size, shard_results = open_shards[0]
+                shard_results.append(result)
+                if len(shard_results) == size:
+                    open_shards.popleft()
+                    cache_counts = (detector.cache.hits, detector.cache.misses) if detector.cache else None
+                    results.put(('shard', worker_id, (index, shard_results, cache_counts)))
+    except BaseException:
+        results.put(('error', worker_id, traceback.format_exc()))
@@ -0,0 +1,233 @@
+"""
+Resolution / Width Sweep for the Pollution Detection Model
+Trains one model per (input size, width multiplier) and charts images/sec against validation accuracy
+"""
+
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+import numpy as np
+import matplotlib.pyplot as plt
+from tensorflow import keras
+from pollution_detector import PollutionDetector
+from image_pipeline import list_class_files
+from export_tflite import evaluate, forward_throughput
+
+
+def variant_name(img_size, width, pretrained=True):
+    """File-friendly name of one variant, e.g. mobilenetv2_128px_w0.5"""
+    base = 'mobilenetv2' if pretrained else 'cnn'
+    return f"{base}_{img_size}px_w{width:g}"
+
+
+def train_variant(detector, args, name):
+    """Train one variant in place, returning its history"""
+    if args.cached_features:
+        feature_dir = os.path.join(args.output_dir, 'features', name)
+        train_store = detector.extract_features(
+            args.train_dir, os.path.join(feature_dir, 'train'),
+            augment_copies=args.augment_copies, batch_size=args.batch_size
+        )
+        val_store = detector.extract_features(
+            args.val_dir, os.path.join(feature_dir, 'val'), batch_size=args.batch_size
+        )
+        return detector.train_head(
+            train_store, val_store, epochs=args.epochs,
+            batch_size=args.head_batch_size, learning_rate=args.learning_rate
+        )
+    
+    train_data, val_data = detector.get_datasets(args.train_dir, args.val_dir, batch_size=args.batch_size)
+    # The default callbacks checkpoint every variant to the same file
+    callbacks = [
+        keras.callbacks.EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True),
+        keras.callbacks.ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=5, min_lr=1e-7)
+    ]
+    return detector.train(train_data, val_data, epochs=args.epochs, callbacks=callbacks)
+
+
+def measure_variant(detector, paths, labels, batch_size):
+    """Validation accuracy plus forward and end-to-end images/sec"""
+    report, _ = evaluate(detector, paths, labels, batch_size)
+    sample = np.stack([detector.load_image(p) for p in paths[:batch_size]])
+    report['forward_images_per_sec'] = forward_throughput(detector, sample)
+    report['params'] = int(detector.model.count_params())
+    return report
+
+
+def pick(rows, min_accuracy):
+    """Fastest variant (forward images/sec) whose accuracy meets the bar, or None"""
+    candidates = [r for r in rows if r['accuracy'] >= min_accuracy]
+    return max(candidates, key=lambda r: r['forward_images_per_sec']) if candidates else None
+
+
+def plot_sweep(rows, choice, min_accuracy, save_path):
+    """Scatter of forward images/sec vs validation accuracy, one point per variant"""
+    fig, ax = plt.subplots(figsize=(10, 7))
+    widths = sorted({r['width'] for r in rows})
+    for width in widths:
+        points = sorted((r for r in rows if r['width'] == width), key=lambda r: r['img_size'])
+        ax.plot([r['forward_images_per_sec'] for r in points], [r['accuracy'] for r in points],
+                marker='o', label=f"width {width:g}")
+        for r in points:
+            ax.annotate(f"{r['img_size']}px", (r['forward_images_per_sec'], r['accuracy']),
+                        textcoords='offset points', xytext=(5, 5), fontsize=8)
+    ax.axhline(min_accuracy, color='gray', linestyle='--', label=f"accuracy bar {min_accuracy:.0%}")
+    if choice is not None:
+        ax.scatter([choice['forward_images_per_sec']], [choice['accuracy']], s=250,
+                   facecolors='none', edgecolors='red', linewidths=2, label=f"chosen: {choice['name']}")
+    ax.set_xscale('log')
+    ax.set_xlabel('Images/sec (forward pass, log scale)')
+    ax.set_ylabel('Validation accuracy')
+    ax.set_title('Pollution Detector: Resolution / Width Sweep')
+    ax.grid(True, which='both', alpha=0.3)
+    ax.legend()
+    plt.tight_layout()
+    plt.savefig(save_path, dpi=150, bbox_inches='tight')
+    plt.close()
+    print(f"Sweep chart saved to {save_path}")
+
+
+def main(args):
+    """Main sweep function"""
+    print("="*70)
+    print("POLLUTION DETECTION - RESOLUTION / WIDTH SWEEP")
+    print("="*70)
+    
+    for path in (args.train_dir, args.val_dir):
+        if not os.path.exists(path):
+            print(f"\nERROR: Not found: {path}")
+            sys.exit(1)
+    if args.cached_features and not args.pretrained:
+        print("\nERROR: --cached_features requires the pretrained MobileNetV2 backbone")
+        sys.exit(1)
+    
+    img_sizes = [int(s) for s in args.img_sizes.split(',')]
+    widths = [float(w) for w in args.widths.split(',')]
+    variants = [(size, width) for width in widths for size in img_sizes]
+    os.makedirs(args.output_dir, exist_ok=True)
+    
+    paths, labels, class_names = list_class_files(args.val_dir)
+    print(f"\nVariants: {len(variants)} ({', '.join(map(str, img_sizes))} px x width {', '.join(f'{w:g}' for w in widths)})")
+    print(f"Validation images: {len(paths)}, accuracy bar: {args.min_accuracy:.0%}")
+    
+    rows = []
+    for i, (img_size, width) in enumerate(variants, 1):
+        name = variant_name(img_size, width, args.pretrained)
+        model_path = os.path.join(args.output_dir, f"{name}.h5")
+        print(f"\n{'-'*70}\n[{i}/{len(variants)}] {name}")
+        
+        keras.backend.clear_session()
+        detector = PollutionDetector(img_size=(img_size, img_size), num_classes=len(class_names),
+                                     inference_profile=None)
+        detector.class_names = class_names
+        if os.path.exists(model_path) and not args.retrain:
+            detector.load_model(model_path)
+            epochs = None
+        else:
+            detector.build_model(pretrained=args.pretrained, width=width)
+            detector.compile_model(learning_rate=args.learning_rate)
+            start = datetime.now()
+            history = train_variant(detector, args, name)
+            epochs = len(history.history['loss'])
+            print(f"Trained {epochs} epochs in {datetime.now() - start}")
+            detector.save_model(model_path)
+        
+        report = measure_variant(detector, paths, labels, args.batch_size)
+        report.update(name=name, img_size=img_size, width=width, model_path=model_path, epochs=epochs)
+        rows.append(report)
+        print(f"Accuracy {report['accuracy']:.2%}, {report['forward_images_per_sec']:.1f} images/sec forward, "
+              f"{report['images_per_sec']:.1f} end-to-end, {report['params']:,} params")
+    
+    choice = pick(rows, args.min_accuracy)
+    
+    print("\n" + "-"*70)
+    print(f"{'variant':26s}{'params':>12s}{'accuracy':>11s}{'fwd img/s':>11s}{'e2e img/s':>11s}")
+    print("-"*70)
+    for r in sorted(rows, key=lambda r: -r['forward_images_per_sec']):
+        mark = '  <- chosen' if choice is not None and r['name'] == choice['name'] else ''
+        print(f"{r['name']:26s}{r['params']:>12,}{r['accuracy']:>11.2%}"
+              f"{r['forward_images_per_sec']:>11.1f}{r['images_per_sec']:>11.1f}{mark}")
+    
+    if choice is None:
+        print(f"\n⚠️  No variant reached {args.min_accuracy:.0%} validation accuracy")
+    else:
+        print(f"\nCheapest variant meeting {args.min_accuracy:.0%}: {choice['name']} ({choice['model_path']})")
+    
+    plot_sweep(rows, choice, args.min_accuracy, args.plot)
+    
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({
+                'created': datetime.now().isoformat(),
+                'pretrained': args.pretrained,
+                'min_accuracy': args.min_accuracy,
+                'num_images': len(paths),
+                'chosen': choice['name'] if choice is not None else None,
+                'variants': rows
+            }, f, indent=2)
+        print(f"Report saved to: {args.report}")
+    
+    print("\n" + "="*70)
+    print("SWEEP COMPLETE!")
+    print("="*70)
+    if choice is not None:
+        print(f"\nUse it with: python predict_pollution.py --model_path {choice['model_path']} --input ./images/\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Train and compare pollution detector input sizes and width multipliers',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Full grid: 5 input sizes x 4 MobileNetV2 widths, head trained on cached features
+  python sweep_pollution_variants.py --train_dir data/train --val_dir data/validation --cached_features
+  
+  # Smaller grid, 90% accuracy bar
+  python sweep_pollution_variants.py --train_dir data/train --val_dir data/validation \\
+      --img_sizes 128,160,224 --widths 0.5,1.0 --min_accuracy 0.9
+  
+  # Re-measure already trained variants (e.g. on the deployment machine)
+  python sweep_pollution_variants.py --train_dir data/train --val_dir data/validation --output_dir sweep_models
+        """
+    )
+    
+    parser.add_argument('--train_dir', type=str, required=True,
+                        help='Training directory with one subfolder per class')
+    parser.add_argument('--val_dir', type=str, required=True,
+                        help='Validation directory with one subfolder per class')
+    parser.add_argument('--img_sizes', type=str, default='96,128,160,192,224',
+                        help='Comma-separated input sizes (default: 96,128,160,192,224)')
+    parser.add_argument('--widths', type=str, default='0.35,0.5,0.75,1.0',
+                        help='Comma-separated width multipliers (default: 0.35,0.5,0.75,1.0)')
+    parser.add_argument('--pretrained', action='store_true', default=True,
+                        help='MobileNetV2 with ImageNet weights (default: True)')
+    parser.add_argument('--no_pretrained', dest='pretrained', action='store_false',
+                        help='Sweep the from-scratch CNN instead')
+    parser.add_argument('--epochs', type=int, default=20,
+                        help='Training epochs per variant (default: 20)')
+    parser.add_argument('--batch_size', type=int, default=32,
+                        help='Batch size for training and measurement (default: 32)')
+    parser.add_argument('--learning_rate', type=float, default=0.001,
+                        help='Learning rate (default: 0.001)')
+    parser.add_argument('--cached_features', action='store_true',
+                        help='Train only the head on backbone features computed once per variant')
+    parser.add_argument('--augment_copies', type=int, default=5,
+                        help='Augmented variants per training image for --cached_features (default: 5)')
+    parser.add_argument('--head_batch_size', type=int, default=128,
+                        help='Feature vectors per step for --cached_features (default: 128)')
+    parser.add_argument('--min_accuracy', type=float, default=0.9,
+                        help='Validation accuracy the chosen variant must reach (default: 0.9)')
+    parser.add_argument('--output_dir', type=str, default='sweep_models',
+                        help='Trained variants; existing ones are measured, not retrained (default: sweep_models)')
+    parser.add_argument('--retrain', action='store_true',
+                        help='Retrain variants that already exist in --output_dir')
+    parser.add_argument('--plot', type=str, default='pollution_variant_sweep.png',
+                        help='Chart of images/sec vs accuracy (default: pollution_variant_sweep.png)')
+    parser.add_argument('--report', type=str, default='pollution_variant_sweep.json',
+                        help='JSON results (default: pollution_variant_sweep.json)')
+    
+    args = parser.parse_args()
+    main(args)
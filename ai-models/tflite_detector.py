@@ -0,0 +1,184 @@
+"""
+INT8 TFLite Runtime for Pollution Detection
+Full-integer quantized export of PollutionDetector and a drop-in predictor for it
+"""
+
+import os
+import numpy as np
+import tensorflow as tf
+from pollution_detector import PollutionDetector, PIXEL_SCALE
+from image_pipeline import ImageBatchPipeline, list_class_files
+
+
+def representative_images(image_dir, img_size=(224, 224), num_images=200, seed=42):
+    """
+    Sample images evenly across the classes of a class-folder directory
+    
+    Returns:
+        uint8 array (n, height, width, 3) of decoded images
+    """
+    paths, labels, _ = list_class_files(image_dir)
+    if not paths:
+        raise ValueError(f"No images found in {image_dir}")
+    
+    rng = np.random.default_rng(seed)
+    labels = np.asarray(labels)
+    # Round-robin over shuffled classes, so small classes are still represented
+    per_class = [list(rng.permutation(np.flatnonzero(labels == c))) for c in np.unique(labels)]
+    chosen = []
+    while len(chosen) < num_images and any(per_class):
+        for indices in per_class:
+            if indices and len(chosen) < num_images:
+                chosen.append(indices.pop())
+    
+    pipeline = ImageBatchPipeline(img_size=img_size, batch_size=32)
+    images = [batch.images for batch in pipeline.batches(paths[i] for i in chosen)]
+    return np.concatenate(images)
+
+
+def export_tflite(detector, calibration_dir, output_path='pollution_detector_int8.tflite',
+                  num_calibration=200):
+    """
+    Convert a Keras PollutionDetector to a full-integer (INT8) TFLite model
+    
+    Weights and activations are int8; the input is the uint8 image itself and
+    the output is the quantized softmax. Activation ranges are calibrated on a
+    class-balanced sample of calibration_dir (usually the validation set).
+    
+    Args:
+        detector: PollutionDetector with a built or loaded model
+        calibration_dir: Class-folder directory to draw calibration images from
+        output_path: Destination .tflite file
+        num_calibration: Calibration images
+    
+    Returns:
+        Size of the written model in bytes
+    """
+    if detector.model is None:
+        raise ValueError("Model must be loaded before export")
+    
+    calibration = representative_images(calibration_dir, detector.img_size, num_calibration)
+    
+    def representative_dataset():
+        for image in calibration:
+            # Same inputs as PollutionDetector.predict_arrays
+            if detector.uint8_inputs:
+                yield [image[np.newaxis]]
+            else:
+                yield [image[np.newaxis].astype(np.float32) * PIXEL_SCALE]
+    
+    converter = tf.lite.TFLiteConverter.from_keras_model(detector.model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.uint8
+    converter.inference_output_type = tf.uint8
+    tflite_model = converter.convert()
+    
+    with open(output_path, 'wb') as f:
+        f.write(tflite_model)
+    print(f"INT8 model saved to {output_path} ({len(tflite_model) / 1e6:.1f} MB, "
+          f"calibrated on {len(calibration)} images)")
+    return len(tflite_model)
+
+
+class TFLitePollutionDetector(PollutionDetector):
+    """
+    PollutionDetector running a quantized .tflite model
+    
+    predict_image, predict_batch (decode pipeline, prediction cache) and the
+    result format are inherited unchanged; only the forward pass differs.
+    The interpreter is not thread-safe, so use one instance per thread.
+    """
+    
+    def __init__(self, img_size=None, num_classes=3, num_threads=None):
+        """
+        Args:
+            img_size: (width, height) the model must have been exported at
+                (None = whatever the loaded model's input is)
+            num_classes: Number of output classes
+            num_threads: Interpreter threads (None = one per CPU)
+        """
+        # Tuned profiles describe the Keras model, not the interpreter
+        super().__init__(img_size or (224, 224), num_classes, inference_profile=None)
+        self.expected_size = tuple(img_size) if img_size else None
+        self.num_threads = num_threads or os.cpu_count() or 1
+        self._batch_size = None
+    
+    def load_model(self, filepath='pollution_detector_int8.tflite'):
+        """Load an exported .tflite model; img_size follows its input tensor"""
+        interpreter = tf.lite.Interpreter(model_path=filepath, num_threads=self.num_threads)
+        input_details = interpreter.get_input_details()[0]
+        height, width = (int(n) for n in input_details['shape'][1:3])
+        if self.expected_size is not None and (width, height) != self.expected_size:
+            raise ValueError(f"Model input is {width}x{height}, detector expects "
+                             f"{self.expected_size[0]}x{self.expected_size[1]}")
+        
+        self.model = interpreter
+        self.img_size = (width, height)
+        self._batch_size = None
+        self.model_id = self._file_identity(filepath)
+        print(f"Model loaded from {filepath}")
+    
+    def save_model(self, filepath=None):
+        raise ValueError("TFLite models are written by export_tflite()")
+    
+    def _resize(self, batch_size):
+        if batch_size != self._batch_size:
+            index = self.model.get_input_details()[0]['index']
+            self.model.resize_tensor_input(index, [batch_size, self.img_size[1], self.img_size[0], 3])
+            self.model.allocate_tensors()
+            self._batch_size = batch_size
+    
+    @staticmethod
+    def _quantize(values, details):
+        scale, zero_point = details['quantization']
+        if not scale:
+            return values.astype(details['dtype'])
+        info = np.iinfo(details['dtype'])
+        return np.clip(np.round(values / scale + zero_point), info.min, info.max).astype(details['dtype'])
+    
+    @staticmethod
+    def _dequantize(values, details):
+        scale, zero_point = details['quantization']
+        if not scale:
+            return values.astype(np.float32)
+        return (values.astype(np.float32) - zero_point) * scale
+    
+    def predict_arrays(self, images):
+        """
+        Run one forward pass over a batch of decoded images
+        
+        Args:
+            images: uint8 array of shape (batch, *img_size, 3)
+        
+        Returns:
+            Array of class probabilities, shape (batch, num_classes)
+        """
+        if self.model is None:
+            raise ValueError("Model must be loaded before prediction")
+        self._resize(len(images))
+        input_details = self.model.get_input_details()[0]
+        output_details = self.model.get_output_details()[0]
+        
+        scale, zero_point = input_details['quantization']
+        if input_details['dtype'] == np.uint8 and (not scale or np.isclose(scale * 255, 1) and zero_point == 0):
+            # Raw pixels: the model rescales in-graph (unquantized uint8 input),
+            # or its calibrated input range is [0, 1] so quantized input == pixels
+            batch = np.ascontiguousarray(images, dtype=np.uint8)
+        else:
+            batch = self._quantize(images.astype(np.float32) * PIXEL_SCALE, input_details)
+        
+        self.model.set_tensor(input_details['index'], batch)
+        self.model.invoke()
+        return self._dequantize(self.model.get_tensor(output_details['index']), output_details)
+    
+    def get_model_summary(self):
+        """Print input/output tensors and their quantization"""
+        if self.model is None:
+            raise ValueError("Model must be loaded first")
+        for kind, details in [('Input', self.model.get_input_details()[0]),
+                              ('Output', self.model.get_output_details()[0])]:
+            scale, zero_point = details['quantization']
+            print(f"{kind}: {details['shape'].tolist()} {np.dtype(details['dtype']).name} "
+                  f"(scale {scale:.6g}, zero point {zero_point})")
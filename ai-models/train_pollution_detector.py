@@ -8,6 +8,8 @@ import argparse
 from datetime import datetime
 import matplotlib.pyplot as plt
 from pollution_detector import PollutionDetector
+from image_shards import ImageShardDataset
+from image_manifest import ImageManifest
 
 
 def plot_training_history(history, save_path='training_history.png'):
@@ -71,6 +73,11 @@ def main(args):
     print(f"  - Learning Rate: {args.learning_rate}")
     print(f"  - Image Size: {args.img_size}x{args.img_size}")
     print(f"  - Pretrained: {args.pretrained}")
+    print(f"  - Width: {args.width}")
+    if args.cached_features:
+        print(f"  - Cached Features: {args.feature_dir} ({args.augment_copies} augmented copies)")
+    if args.manifest:
+        print(f"  - Image Manifest: {args.manifest}")
     print()
     
     # Validate directories
@@ -80,44 +87,102 @@ def main(args):
     if not os.path.exists(args.val_dir):
         print(f"ERROR: Validation directory not found: {args.val_dir}")
         sys.exit(1)
+    uses_shards = any(ImageShardDataset.is_shard_dir(d) for d in (args.train_dir, args.val_dir))
+    if uses_shards and (args.cached_features or args.input_pipeline != 'tfdata'):
+        print("ERROR: Shard directories (prepare_data.py --task shards) require --input_pipeline tfdata")
+        sys.exit(1)
+    uses_manifest = any(os.path.isfile(d) for d in (args.train_dir, args.val_dir))
+    generators = args.input_pipeline != 'tfdata' and not args.cached_features
+    if uses_manifest and generators:
+        print("ERROR: Split manifests (prepare_data.py --split_mode manifest) require --input_pipeline tfdata "
+              "or --cached_features")
+        sys.exit(1)
+    if args.manifest and generators:
+        print("ERROR: --manifest requires --input_pipeline tfdata or --cached_features")
+        sys.exit(1)
+    if args.manifest and not os.path.exists(args.manifest):
+        print(f"ERROR: Image manifest not found: {args.manifest} (run prepare_data.py --task manifest)")
+        sys.exit(1)
     
     # Initialize detector
     print("Initializing Pollution Detector...")
-    detector = PollutionDetector(img_size=(args.img_size, args.img_size), num_classes=3)
+    # Inference thread tuning does not apply to training
+    detector = PollutionDetector(img_size=(args.img_size, args.img_size), num_classes=3, inference_profile=None)
+    if args.manifest:
+        # Listing comes from the index, and known-corrupt images are skipped
+        detector.manifest = ImageManifest(args.manifest)
     
     # Build model
     print("Building model architecture...")
-    detector.build_model(pretrained=args.pretrained)
+    detector.build_model(pretrained=args.pretrained, width=args.width)
     detector.compile_model(learning_rate=args.learning_rate)
     
     # Print model summary
     print("\nModel Architecture:")
     detector.get_model_summary()
     
-    # Prepare data generators
-    print(f"\nPreparing data generators...")
-    train_generator, val_generator = detector.get_data_generators(
-        args.train_dir,
-        args.val_dir,
-        batch_size=args.batch_size
-    )
-    
-    print(f"\nTraining samples: {train_generator.samples}")
-    print(f"Validation samples: {val_generator.samples}")
-    print(f"Classes found: {list(train_generator.class_indices.keys())}")
-    
-    # Start training
-    print("\n" + "="*70)
-    print("STARTING TRAINING...")
-    print("="*70 + "\n")
-    
     start_time = datetime.now()
     
-    history = detector.train(
-        train_generator,
-        val_generator,
-        epochs=args.epochs
-    )
+    if args.cached_features:
+        # Backbone runs once per image (and augmented copy); epochs only touch the head
+        print(f"\nExtracting backbone features...")
+        train_store = detector.extract_features(
+            args.train_dir,
+            os.path.join(args.feature_dir, 'train'),
+            augment_copies=args.augment_copies,
+            batch_size=args.batch_size
+        )
+        val_store = detector.extract_features(
+            args.val_dir,
+            os.path.join(args.feature_dir, 'val'),
+            batch_size=args.batch_size
+        )
+        print(f"Feature extraction took {datetime.now() - start_time}")
+        
+        print("\n" + "="*70)
+        print("TRAINING HEAD ON CACHED FEATURES...")
+        print("="*70 + "\n")
+        
+        history = detector.train_head(
+            train_store,
+            val_store,
+            epochs=args.epochs,
+            batch_size=args.head_batch_size,
+            learning_rate=args.learning_rate
+        )
+    elif args.input_pipeline == 'tfdata':
+        print(f"\nPreparing tf.data pipelines...")
+        train_data, val_data = detector.get_datasets(
+            args.train_dir,
+            args.val_dir,
+            batch_size=args.batch_size,
+            cache_val=args.cache_val,
+            cache_train=args.cache_train
+        )
+    else:
+        # Prepare data generators
+        print(f"\nPreparing data generators...")
+        train_data, val_data = detector.get_data_generators(
+            args.train_dir,
+            args.val_dir,
+            batch_size=args.batch_size
+        )
+        
+        print(f"\nTraining samples: {train_data.samples}")
+        print(f"Validation samples: {val_data.samples}")
+        print(f"Classes found: {list(train_data.class_indices.keys())}")
+        
+    if not args.cached_features:
+        # Start training
+        print("\n" + "="*70)
+        print("STARTING TRAINING...")
+        print("="*70 + "\n")
+        
+        history = detector.train(
+            train_data,
+            val_data,
+            epochs=args.epochs
+        )
     
     end_time = datetime.now()
     training_duration = end_time - start_time
@@ -152,7 +217,8 @@ def main(args):
     print("ALL DONE!")
     print("="*70)
     print(f"\nModel saved: {model_filename}")
-    print("Best model saved: pollution_detector_best.h5")
+    if not args.cached_features:
+        print("Best model saved: pollution_detector_best.h5")
     print("Training plot saved: pollution_detector_training_history.png")
     print()
 
@@ -164,14 +230,14 @@ if __name__ == "__main__":
         '--train_dir',
         type=str,
         required=True,
-        help='Path to training data directory'
+        help='Path to training data directory (class folders, shards or a split manifest .csv)'
     )
     
     parser.add_argument(
         '--val_dir',
         type=str,
         required=True,
-        help='Path to validation data directory'
+        help='Path to validation data directory (class folders, shards or a split manifest .csv)'
     )
     
     parser.add_argument(
@@ -199,7 +265,7 @@ if __name__ == "__main__":
         '--img_size',
         type=int,
         default=224,
-        help='Image size (default: 224)'
+        help='Image size; 96, 128, 160, 192 or 224 for ImageNet weights (default: 224)'
     )
     
     parser.add_argument(
@@ -216,5 +282,74 @@ if __name__ == "__main__":
         help='Train from scratch without pretrained weights'
     )
     
+    parser.add_argument(
+        '--width',
+        type=float,
+        default=1.0,
+        help='Width multiplier: MobileNetV2 alpha (0.35, 0.5, 0.75, 1.0, 1.3, 1.4), or the filter multiplier of the --no_pretrained CNN (default: 1.0)'
+    )
+    
+    parser.add_argument(
+        '--input_pipeline',
+        type=str,
+        default='tfdata',
+        choices=['tfdata', 'generator'],
+        help='tf.data (parallel decode/augment) or legacy ImageDataGenerator (default: tfdata)'
+    )
+    
+    parser.add_argument(
+        '--cache_val',
+        action='store_true',
+        default=True,
+        help='Cache decoded validation images in memory with --input_pipeline tfdata (default: True)'
+    )
+    
+    parser.add_argument(
+        '--no_cache_val',
+        dest='cache_val',
+        action='store_false',
+        help='Decode validation images every epoch'
+    )
+    
+    parser.add_argument(
+        '--cache_train',
+        action='store_true',
+        help='Also cache decoded (pre-augmentation) training images in memory'
+    )
+    
+    parser.add_argument(
+        '--manifest',
+        type=str,
+        default=None,
+        help='Image manifest from prepare_data.py --task manifest; lists images without walking the directories and skips corrupt ones'
+    )
+    
+    parser.add_argument(
+        '--cached_features',
+        action='store_true',
+        help='Train only the head on backbone features computed once (requires --pretrained)'
+    )
+    
+    parser.add_argument(
+        '--augment_copies',
+        type=int,
+        default=5,
+        help='Augmented variants per training image for --cached_features (default: 5)'
+    )
+    
+    parser.add_argument(
+        '--feature_dir',
+        type=str,
+        default='pollution_features',
+        help='Directory for cached feature files (default: pollution_features)'
+    )
+    
+    parser.add_argument(
+        '--head_batch_size',
+        type=int,
+        default=128,
+        help='Feature vectors per step for --cached_features (default: 128)'
+    )
+    
     args = parser.parse_args()
     main(args)
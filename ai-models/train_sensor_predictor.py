@@ -10,6 +10,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime
 from sensor_predictor import SensorPredictor, generate_synthetic_sensor_data
+from sensor_preprocessing import GapAwareResampler
 
 
 def plot_training_history(history, save_path='sensor_training_history.png'):
@@ -109,6 +110,7 @@ def main(args):
     print(f"  - Learning Rate: {args.learning_rate}")
     print(f"  - LSTM Units: {args.lstm_units}")
     print(f"  - Attention: {args.attention}")
+    print(f"  - Resample: {args.resample} (max fill: {args.max_fill_steps} steps, {args.interpolation})")
     print()
     
     # Load or generate data
@@ -134,18 +136,36 @@ def main(args):
     print(f"\nData statistics:")
     print(sensor_data.describe())
     
+    # Regularize onto a fixed grid so windows never silently span gaps
+    valid_rows = None
+    resampler = None
+    if args.resample and isinstance(sensor_data.index, pd.DatetimeIndex):
+        print("\nResampling onto a regular time grid...")
+        resampler = GapAwareResampler(
+            freq=args.resample_freq,
+            interpolation=args.interpolation,
+            max_fill_steps=args.max_fill_steps
+        )
+        sensor_data, valid_rows = resampler.transform(sensor_data)
+        print(f"  - Grid rows: {len(sensor_data)}")
+        print(f"  - Rows inside unfilled long gaps: {int((~valid_rows).sum())}")
+    
     # Initialize predictor
     print("\n" + "-"*70)
     print("Initializing Sensor Predictor...")
     predictor = SensorPredictor(
         sequence_length=args.sequence_length,
         prediction_horizon=args.prediction_horizon,
-        num_features=sensor_data.shape[1]
+        num_features=sensor_data.shape[1],
+        inference_profile=None
     )
+    if resampler is not None:
+        # Saved with the model, so inference regularizes data the same way
+        predictor.resampling = resampler.to_config()
     
     # Prepare data
     print("Preparing training data...")
-    X, y = predictor.prepare_data(sensor_data, scale=True)
+    X, y = predictor.prepare_data(sensor_data, scale=True, valid_rows=valid_rows)
     print(f"  - Input shape: {X.shape}")
     print(f"  - Output shape: {y.shape}")
     
@@ -344,5 +364,41 @@ if __name__ == "__main__":
         help='Number of synthetic features to generate if no data file (default: 5)'
     )
     
+    parser.add_argument(
+        '--resample',
+        action='store_true',
+        default=True,
+        help='Regularize timestamps and fill short gaps before windowing (default: True)'
+    )
+    
+    parser.add_argument(
+        '--no_resample',
+        dest='resample',
+        action='store_false',
+        help='Build windows over raw rows'
+    )
+    
+    parser.add_argument(
+        '--resample_freq',
+        type=str,
+        default=None,
+        help='Grid frequency, e.g. 1min or 1h (default: median sampling interval)'
+    )
+    
+    parser.add_argument(
+        '--interpolation',
+        type=str,
+        default='linear',
+        choices=list(GapAwareResampler.FILL_METHODS),
+        help='Fill method for short gaps (default: linear)'
+    )
+    
+    parser.add_argument(
+        '--max_fill_steps',
+        type=int,
+        default=3,
+        help='Longest gap in grid steps that is filled; longer gaps are skipped (default: 3)'
+    )
+    
     args = parser.parse_args()
     main(args)
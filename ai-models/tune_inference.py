@@ -0,0 +1,266 @@
+"""
+Inference Auto-Tuner for Pollution Detection and Sensor Prediction Models
+Benchmarks batch sizes and TensorFlow thread settings on this machine and writes
+the fastest configuration under a p99 latency limit to a hardware profile
+"""
+
+import os
+import sys
+import time
+import argparse
+import multiprocessing as mp
+import numpy as np
+from inference_profile import PROFILE_PATH, hardware_signature, write_profile
+
+
+def thread_grid(intra_op, inter_op):
+    """
+    (intra_op, inter_op) pairs to try; 0 means TensorFlow's default
+    
+    'auto' intra-op = powers of two up to the CPU count plus the CPU count
+    """
+    if intra_op == 'auto':
+        cpus = os.cpu_count() or 1
+        intra_counts = {cpus}
+        n = 1
+        while n < cpus:
+            intra_counts.add(n)
+            n *= 2
+        intra_counts = sorted(intra_counts)
+    else:
+        intra_counts = [int(n) for n in intra_op.split(',')]
+    inter_counts = [int(n) for n in inter_op.split(',')]
+    # TensorFlow's defaults as the baseline, then every explicit pair
+    return [(0, 0)] + [(intra, inter) for intra in intra_counts for inter in inter_counts]
+
+
+def measure(run_batch, batch_size, seconds=2.0, min_calls=10, warmup=2):
+    """
+    Time repeated forward passes of one batch size
+    
+    Returns:
+        dict with items/sec and per-call latency percentiles in ms
+    """
+    for _ in range(warmup):
+        run_batch()
+    latencies = []
+    start = time.perf_counter()
+    while len(latencies) < min_calls or time.perf_counter() - start < seconds:
+        call_start = time.perf_counter()
+        run_batch()
+        latencies.append(time.perf_counter() - call_start)
+    latencies = np.array(latencies) * 1000
+    return {
+        'batch_size': batch_size,
+        'calls': len(latencies),
+        'items_per_sec': round(batch_size * len(latencies) / (latencies.sum() / 1000), 2),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3)
+    }
+
+
+# Model loaded once per tuning process, reused across batch sizes
+_loaded = {}
+
+
+def _pollution_runner(settings, batch_size):
+    if 'pollution_detector' not in _loaded:
+        from pollution_detector import PollutionDetector
+        detector = PollutionDetector(img_size=settings['img_size'], inference_profile=None)
+        if os.path.exists(settings['model_path']):
+            detector.load_model(settings['model_path'])
+        else:
+            detector.build_model(pretrained=True)
+        _loaded['pollution_detector'] = detector
+    detector = _loaded['pollution_detector']
+    rng = np.random.default_rng(0)
+    images = rng.integers(0, 256, (batch_size, detector.img_size[1], detector.img_size[0], 3), dtype=np.uint8)
+    return lambda: detector.predict_arrays(images)
+
+
+def _sensor_runner(settings, batch_size):
+    if 'sensor_predictor' not in _loaded:
+        from sensor_predictor import SensorPredictor
+        predictor = SensorPredictor(inference_profile=None)
+        if os.path.exists(settings['model_path']):
+            predictor.load_model(settings['model_path'], settings['scaler_path'], settings['config_path'])
+        else:
+            predictor.num_features = settings['num_features']
+            predictor.build_model()
+        _loaded['sensor_predictor'] = predictor
+    predictor = _loaded['sensor_predictor']
+    rng = np.random.default_rng(0)
+    # One window per origin, so each call is a single forward pass of batch_size windows
+    data = rng.normal(size=(predictor.sequence_length + batch_size - 1, predictor.num_features)).astype(np.float32)
+    return lambda: predictor.predict_origins(data, batch_size=batch_size)
+
+
+RUNNERS = {'pollution_detector': _pollution_runner, 'sensor_predictor': _sensor_runner}
+
+
+def _measure_thread_config(task):
+    """Process entry point: thread pools can only be set before TensorFlow starts"""
+    section, settings, intra_op, inter_op, batch_sizes, seconds = task
+    import tensorflow as tf
+    if intra_op:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+    if inter_op:
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+    results = []
+    for batch_size in batch_sizes:
+        result = measure(RUNNERS[section](settings, batch_size), batch_size, seconds)
+        result.update(intra_op_threads=intra_op, inter_op_threads=inter_op)
+        results.append(result)
+    return results
+
+
+def choose(results, p99_limit_ms):
+    """
+    Highest throughput whose p99 latency is within the limit
+    
+    Returns:
+        (best result, whether it meets the limit); without any configuration
+        under the limit, the one with the lowest p99 is returned
+    """
+    within = [r for r in results if r['p99_ms'] <= p99_limit_ms]
+    if within:
+        return max(within, key=lambda r: r['items_per_sec']), True
+    return min(results, key=lambda r: r['p99_ms']), False
+
+
+def tune(section, settings, batch_sizes, grid, p99_limit_ms, seconds):
+    """Run the grid for one predictor, one fresh process per thread configuration"""
+    ctx = mp.get_context('spawn')
+    results = []
+    unit = 'images' if section == 'pollution_detector' else 'windows'
+    for intra_op, inter_op in grid:
+        label = 'default' if not (intra_op or inter_op) else f"intra={intra_op} inter={inter_op}"
+        print(f"\n  {label}:")
+        with ctx.Pool(processes=1) as pool:
+            rows = pool.apply(_measure_thread_config, ((section, settings, intra_op, inter_op, batch_sizes, seconds),))
+        for row in rows:
+            flag = '' if row['p99_ms'] <= p99_limit_ms else '  (over p99 limit)'
+            print(f"    batch_size={row['batch_size']:5d}: {row['items_per_sec']:10.2f} {unit}/sec, "
+                  f"p50 {row['p50_ms']:8.2f} ms, p99 {row['p99_ms']:8.2f} ms{flag}")
+        results.extend(rows)
+    
+    best, within_limit = choose(results, p99_limit_ms)
+    baseline = [r for r in results if not (r['intra_op_threads'] or r['inter_op_threads'])]
+    baseline = max(baseline, key=lambda r: r['items_per_sec'])
+    print(f"\n  Best: batch_size={best['batch_size']}, intra_op={best['intra_op_threads'] or 'default'}, "
+          f"inter_op={best['inter_op_threads'] or 'default'} -> {best['items_per_sec']:.2f} {unit}/sec, "
+          f"p99 {best['p99_ms']:.2f} ms ({best['items_per_sec'] / baseline['items_per_sec']:.2f}x the best default-thread result)")
+    if not within_limit:
+        print(f"  ⚠️  No configuration met the {p99_limit_ms} ms p99 limit; using the lowest-latency one")
+    
+    return {
+        'batch_size': best['batch_size'],
+        'intra_op_threads': best['intra_op_threads'],
+        'inter_op_threads': best['inter_op_threads'],
+        'items_per_sec': best['items_per_sec'],
+        'p99_ms': best['p99_ms'],
+        'meets_p99_limit': within_limit,
+        'model_path': settings['model_path'],
+        'measurements': results
+    }
+
+
+def main(args):
+    """Main tuning function"""
+    print("="*70)
+    print("INFERENCE AUTO-TUNER")
+    print("="*70)
+    
+    sections = [s.strip() for s in args.models.split(',')]
+    unknown = set(sections) - {'pollution', 'sensor'}
+    if unknown:
+        print(f"\nERROR: Unknown model(s): {', '.join(sorted(unknown))} (use pollution, sensor)")
+        sys.exit(1)
+    
+    grid = thread_grid(args.intra_op_threads, args.inter_op_threads)
+    signature = hardware_signature()
+    print(f"\nHardware: {signature['cpu_model']} ({signature['cpu_count']} CPUs), "
+          f"TensorFlow {signature['tensorflow']}")
+    print(f"Thread configurations: {len(grid)}, p99 limit: {args.p99_ms} ms, "
+          f"{args.seconds:g}s per measurement")
+    
+    tuned = {}
+    if 'pollution' in sections:
+        settings = {'model_path': args.pollution_model_path, 'img_size': (args.img_size, args.img_size)}
+        source = args.pollution_model_path if os.path.exists(args.pollution_model_path) else 'freshly built MobileNetV2'
+        print(f"\n{'-'*70}\nPollutionDetector ({source}), synthetic {args.img_size}x{args.img_size} images")
+        batch_sizes = [int(b) for b in args.pollution_batch_sizes.split(',')]
+        tuned['pollution_detector'] = tune('pollution_detector', settings, batch_sizes, grid, args.p99_ms, args.seconds)
+    
+    if 'sensor' in sections:
+        settings = {
+            'model_path': args.sensor_model_path,
+            'scaler_path': args.sensor_scaler_path,
+            'config_path': args.sensor_config_path,
+            'num_features': args.num_features
+        }
+        if os.path.exists(args.sensor_model_path) and not os.path.exists(args.sensor_config_path):
+            print(f"\nERROR: Config file not found: {args.sensor_config_path}")
+            sys.exit(1)
+        source = args.sensor_model_path if os.path.exists(args.sensor_model_path) else 'freshly built LSTM'
+        print(f"\n{'-'*70}\nSensorPredictor ({source}), synthetic sensor windows")
+        batch_sizes = [int(b) for b in args.sensor_batch_sizes.split(',')]
+        tuned['sensor_predictor'] = tune('sensor_predictor', settings, batch_sizes, grid, args.p99_ms, args.seconds)
+    
+    write_profile(tuned, args.output, args.p99_ms)
+    
+    print("\n" + "="*70)
+    print("TUNING COMPLETE!")
+    print("="*70)
+    print(f"\nProfile saved to: {args.output}")
+    print("PollutionDetector and SensorPredictor load it automatically when started from this directory.\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Tune inference batch size and thread settings for this machine',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Tune both predictors with the trained models in this directory
+  python tune_inference.py
+  
+  # Only the image model, under a 200 ms p99 batch latency
+  python tune_inference.py --models pollution --p99_ms 200
+  
+  # Explicit thread grid
+  python tune_inference.py --intra_op_threads 1,2,4,8 --inter_op_threads 1,2
+        """
+    )
+    
+    parser.add_argument('--models', type=str, default='pollution,sensor',
+                        help='Predictors to tune: pollution, sensor or both (default: pollution,sensor)')
+    parser.add_argument('--p99_ms', type=float, default=500.0,
+                        help='Maximum p99 latency of one batch in ms (default: 500)')
+    parser.add_argument('--pollution_model_path', type=str, default='pollution_detector_model.h5',
+                        help='Pollution model to tune (default: pollution_detector_model.h5, built if missing)')
+    parser.add_argument('--img_size', type=int, default=224,
+                        help='Pollution model input size (default: 224)')
+    parser.add_argument('--pollution_batch_sizes', type=str, default='1,4,8,16,32,64',
+                        help='Comma-separated image batch sizes (default: 1,4,8,16,32,64)')
+    parser.add_argument('--sensor_model_path', type=str, default='sensor_predictor_model.h5',
+                        help='Sensor model to tune (default: sensor_predictor_model.h5, built if missing)')
+    parser.add_argument('--sensor_scaler_path', type=str, default='sensor_scaler.pkl',
+                        help='Sensor scaler (default: sensor_scaler.pkl)')
+    parser.add_argument('--sensor_config_path', type=str, default='sensor_config.json',
+                        help='Sensor config (default: sensor_config.json)')
+    parser.add_argument('--num_features', type=int, default=5,
+                        help='Sensor features when building a fresh model (default: 5)')
+    parser.add_argument('--sensor_batch_sizes', type=str, default='1,32,128,256,1024',
+                        help='Comma-separated sensor window batch sizes (default: 1,32,128,256,1024)')
+    parser.add_argument('--intra_op_threads', type=str, default='auto',
+                        help="Comma-separated intra-op thread counts, or 'auto' (default: auto)")
+    parser.add_argument('--inter_op_threads', type=str, default='1,2',
+                        help='Comma-separated inter-op thread counts (default: 1,2)')
+    parser.add_argument('--seconds', type=float, default=2.0,
+                        help='Minimum timed seconds per batch size and thread setting (default: 2)')
+    parser.add_argument('--output', type=str, default=PROFILE_PATH,
+                        help=f'Profile file (default: {PROFILE_PATH})')
+    
+    args = parser.parse_args()
+    main(args)
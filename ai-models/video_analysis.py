@@ -0,0 +1,321 @@
+"""
+Video and Frame-Sequence Pollution Analysis
+Samples frames where the scene changes and turns detector output into a smoothed timeline
+"""
+
+import os
+import math
+import threading
+from queue import Queue, Empty, Full
+import numpy as np
+from image_discovery import discover_images
+from image_pipeline import IMAGE_EXTENSIONS, decode_image
+
+
+def frame_thumbnail(frame):
+    """Small grayscale float copy of a model-size frame, for change detection"""
+    return frame[::4, ::4].mean(axis=2, dtype=np.float32)
+
+
+class FrameSource:
+    """
+    Frames of a video file or of a directory of images, at the model input size
+    
+    Only every step-th frame is decoded to pixels, with step chosen so checks
+    are check_interval seconds apart; the frames in between are grabbed (video)
+    or never opened (image sequence). Video frames are downscaled with area
+    averaging before the color conversion, so a 1080p frame costs one resize
+    and a 224x224 copy.
+    """
+    
+    def __init__(self, source, img_size=(224, 224), check_interval=0.2, sequence_fps=1.0):
+        """
+        Args:
+            source: Video file, or directory of frames named in time order
+            img_size: Model input (width, height)
+            check_interval: Seconds of video between decoded frames
+            sequence_fps: Frame rate of image sequences (video files report their own)
+        """
+        self.source = source
+        self.img_size = tuple(img_size)
+        self.check_interval = check_interval
+        self.sequence_fps = sequence_fps
+        self.frames_read = 0
+    
+    def __iter__(self):
+        """Yield (frame index, timestamp in seconds, uint8 RGB frame of shape (*img_size, 3))"""
+        if os.path.isdir(self.source):
+            return self._sequence_frames()
+        return self._video_frames()
+    
+    def _step(self, fps):
+        return max(1, int(round(self.check_interval * fps)))
+    
+    def _sequence_frames(self):
+        paths = sorted(discover_images(self.source, recursive=False, extensions=IMAGE_EXTENSIONS))
+        if not paths:
+            raise ValueError(f"No frames found in {self.source}")
+        step = self._step(self.sequence_fps)
+        for index in range(0, len(paths), step):
+            self.frames_read = index + 1
+            yield index, index / self.sequence_fps, decode_image(paths[index], self.img_size)
+        self.frames_read = len(paths)
+    
+    def _video_frames(self):
+        try:
+            import cv2
+        except ImportError:
+            raise ImportError("Video files require OpenCV (pip install opencv-python-headless)")
+        
+        capture = cv2.VideoCapture(self.source)
+        if not capture.isOpened():
+            raise ValueError(f"Cannot open video: {self.source}")
+        try:
+            fps = capture.get(cv2.CAP_PROP_FPS) or 25.0
+            step = self._step(fps)
+            index = 0
+            while True:
+                if index % step:
+                    # Demux and decode only; no color conversion or copy
+                    if not capture.grab():
+                        break
+                else:
+                    ok, frame = capture.read()
+                    if not ok:
+                        break
+                    small = cv2.resize(frame, self.img_size, interpolation=cv2.INTER_AREA)
+                    yield index, index / fps, cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+                index += 1
+                self.frames_read = index
+        finally:
+            capture.release()
+
+
+class AdaptiveFrameSampler:
+    """
+    Decide which checked frames go to the detector
+    
+    A frame is sampled when the mean absolute difference of its grayscale
+    thumbnail from the last sampled frame's exceeds change_threshold, or when
+    max_interval seconds have passed since the last sample, so static scenes
+    still get a periodic reading. Comparing with the last sample rather than
+    the previous frame means slow drift (smoke building up) is caught too.
+    """
+    
+    def __init__(self, change_threshold=0.03, max_interval=10.0):
+        """
+        Args:
+            change_threshold: Mean absolute pixel change (fraction of 255) that triggers a sample
+            max_interval: Longest gap in seconds between samples (None = only on change)
+        """
+        self.change_threshold = change_threshold
+        self.max_interval = max_interval
+        self._reference = None
+        self._last_sampled = None
+    
+    def __call__(self, timestamp, frame):
+        """
+        Returns:
+            (sample, change): whether to run the detector on this frame, and its
+            change score against the last sampled frame (1.0 for the first frame)
+        """
+        thumbnail = frame_thumbnail(frame)
+        if self._reference is None:
+            change = 1.0
+        else:
+            change = float(np.abs(thumbnail - self._reference).mean()) / 255
+        
+        sample = (self._reference is None or change >= self.change_threshold
+                  or (self.max_interval is not None and timestamp - self._last_sampled >= self.max_interval))
+        if sample:
+            self._reference = thumbnail
+            self._last_sampled = timestamp
+        return sample, change
+
+
+class ProbabilitySmoother:
+    """
+    Exponential moving average of class probabilities over time
+    
+    The weight of a new reading grows with the time since the previous one
+    (1 - exp(-dt / time_constant)), so irregularly sampled frames are
+    smoothed consistently: a sample after a long static stretch counts
+    almost fully, a burst of samples during motion is averaged.
+    """
+    
+    def __init__(self, time_constant=5.0):
+        """
+        Args:
+            time_constant: Seconds for an old reading's weight to fall to 1/e (0 = no smoothing)
+        """
+        self.time_constant = time_constant
+        self._smoothed = None
+        self._timestamp = None
+    
+    def update(self, timestamp, probabilities):
+        """Add a reading and return the smoothed probabilities"""
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        if self._smoothed is None or self.time_constant <= 0:
+            self._smoothed = probabilities
+        else:
+            weight = 1 - math.exp(-max(timestamp - self._timestamp, 0.0) / self.time_constant)
+            self._smoothed = self._smoothed + weight * (probabilities - self._smoothed)
+        self._timestamp = timestamp
+        return self._smoothed
+
+
+class VideoPollutionAnalyzer:
+    """
+    Smoothed pollution timelines for one or more videos or frame sequences
+    
+    Each source is read on its own thread (OpenCV and PIL release the GIL
+    while decoding) and filtered by an AdaptiveFrameSampler. Sampled frames
+    from all sources share one queue, and each forward pass takes whatever
+    has accumulated, up to batch_size, so several streams are classified in
+    the same batches. Results are smoothed per source with a
+    ProbabilitySmoother.
+    """
+    
+    def __init__(self, detector, check_interval=0.2, change_threshold=0.03, max_interval=10.0,
+                 time_constant=5.0, batch_size=None, sequence_fps=1.0):
+        """
+        Args:
+            detector: Loaded PollutionDetector (Keras, TFLite or cascade)
+            check_interval: Seconds of video between frames checked for change
+            change_threshold: Mean absolute pixel change (fraction of 255) that triggers a sample
+            max_interval: Longest gap in seconds between samples of a static scene
+            time_constant: Smoothing time constant in seconds (0 = raw probabilities)
+            batch_size: Most frames per forward pass (None = detector.batch_size)
+            sequence_fps: Frame rate of image-sequence directories
+        """
+        self.detector = detector
+        self.check_interval = check_interval
+        self.change_threshold = change_threshold
+        self.max_interval = max_interval
+        self.time_constant = time_constant
+        self.batch_size = batch_size or detector.batch_size
+        self.sequence_fps = sequence_fps
+        self.stats = {}
+    
+    def _read(self, source, out, stop):
+        stats = self.stats[source]
+        
+        def put(item):
+            while not stop.is_set():
+                try:
+                    out.put(item, timeout=0.1)
+                    return
+                except Full:
+                    pass
+        
+        frames = FrameSource(source, self.detector.img_size, self.check_interval, self.sequence_fps)
+        sampler = AdaptiveFrameSampler(self.change_threshold, self.max_interval)
+        try:
+            for index, timestamp, frame in frames:
+                if stop.is_set():
+                    return
+                stats['checked'] += 1
+                stats['duration'] = timestamp
+                sample, change = sampler(timestamp, frame)
+                if sample:
+                    stats['sampled'] += 1
+                    put(('frame', source, index, timestamp, change, frame))
+        except Exception as e:
+            stats['error'] = f"{type(e).__name__}: {e}"
+        finally:
+            stats['frames'] = frames.frames_read
+            put(('done', source))
+    
+    def analyze(self, sources, confidence_threshold=0.6):
+        """
+        Classify the sampled frames of each source
+        
+        A source that cannot be read is recorded in self.stats[source]['error']
+        and the others carry on.
+        
+        Args:
+            sources: Video files and/or frame directories
+            confidence_threshold: Smoothed confidence below which an entry gets a warning
+        
+        Yields:
+            Timeline entries in the predict_image format for the smoothed
+            probabilities, plus stream, frame, timestamp, change and
+            raw_probabilities; entries of one source are in time order
+        """
+        sources = list(dict.fromkeys(sources))
+        self.stats = {
+            source: {'frames': 0, 'checked': 0, 'sampled': 0, 'duration': 0.0, 'error': None}
+            for source in sources
+        }
+        smoothers = {source: ProbabilitySmoother(self.time_constant) for source in sources}
+        queue = Queue(maxsize=4 * self.batch_size)
+        stop = threading.Event()
+        readers = [
+            threading.Thread(target=self._read, args=(source, queue, stop), daemon=True)
+            for source in sources
+        ]
+        for reader in readers:
+            reader.start()
+        
+        try:
+            active = len(sources)
+            while active:
+                # Block for one item, then batch whatever else is ready
+                items = [queue.get()]
+                while len(items) < self.batch_size:
+                    try:
+                        items.append(queue.get_nowait())
+                    except Empty:
+                        break
+                
+                frames = [item for item in items if item[0] == 'frame']
+                active -= len(items) - len(frames)
+                if not frames:
+                    continue
+                
+                probabilities = self.detector.predict_arrays(np.stack([item[5] for item in frames]))
+                for (_, source, index, timestamp, change, _), probs in zip(frames, probabilities):
+                    smoothed = smoothers[source].update(timestamp, probs)
+                    entry = self.detector._format_result(smoothed, confidence_threshold)
+                    entry.update({
+                        'stream': source,
+                        'frame': int(index),
+                        'timestamp': round(float(timestamp), 3),
+                        'change': round(change, 4),
+                        'raw_probabilities': {
+                            self.detector.class_names[i]: float(p) for i, p in enumerate(probs)
+                        }
+                    })
+                    yield entry
+        finally:
+            stop.set()
+            for reader in readers:
+                reader.join()
+
+
+def timeline_segments(entries):
+    """
+    Collapse one stream's timeline into runs of the same smoothed class
+    
+    Returns:
+        List of dicts with predicted_class, start, end (timestamps of the first
+        and last entry of the run), samples and mean_confidence
+    """
+    segments = []
+    for entry in entries:
+        if segments and segments[-1]['predicted_class'] == entry['predicted_class']:
+            segment = segments[-1]
+            segment['end'] = entry['timestamp']
+            segment['samples'] += 1
+            segment['confidence_sum'] += entry['confidence']
+        else:
+            segments.append({
+                'predicted_class': entry['predicted_class'],
+                'start': entry['timestamp'],
+                'end': entry['timestamp'],
+                'samples': 1,
+                'confidence_sum': entry['confidence']
+            })
+    for segment in segments:
+        segment['mean_confidence'] = segment.pop('confidence_sum') / segment['samples']
+    return segments